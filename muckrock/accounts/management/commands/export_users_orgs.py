@@ -2,7 +2,6 @@
 Management command to export users and organizations for squarelet
 """
 # Django
-from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.management.base import BaseCommand
 from django.db import transaction
@@ -12,10 +11,10 @@ from django.utils import timezone
 import csv
 
 # Third Party
-from boto.s3.connection import S3Connection
 from smart_open.smart_open_lib import smart_open
 
 # MuckRock
+from muckrock.core import s3
 from muckrock.organization.models import Membership, Organization
 
 
@@ -30,8 +29,7 @@ class Command(BaseCommand):
     def handle(self, *args, **kwargs):
         # pylint: disable=unused-argument
         # pylint: disable=attribute-defined-outside-init
-        conn = S3Connection(settings.AWS_ACCESS_KEY_ID, settings.AWS_SECRET_ACCESS_KEY)
-        self.bucket = conn.get_bucket(settings.AWS_STORAGE_BUCKET_NAME)
+        self.bucket = s3.get_bucket("accounts.commands.export_users_orgs")
         if kwargs["date_joined"]:
             with transaction.atomic():
                 self.export_date_joined()
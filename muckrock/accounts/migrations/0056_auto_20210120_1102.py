@@ -0,0 +1,40 @@
+# Django
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("accounts", "0055_auto_20200901_1327"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedNotification",
+            fields=[
+                ("id", models.IntegerField(primary_key=True, serialize=False)),
+                ("datetime", models.DateTimeField()),
+                ("action_id", models.IntegerField(db_index=True)),
+                ("datetime_archived", models.DateTimeField()),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_notifications",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(read=False),
+                fields=["user", "datetime"],
+                name="accounts_notification_unread",
+            ),
+        ),
+    ]
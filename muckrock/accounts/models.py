@@ -7,6 +7,7 @@ from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.postgres.fields.jsonb import KeyTextTransform
+from django.core.cache import cache
 from django.db import models, transaction
 from django.db.models import Max
 from django.db.models.functions import Cast
@@ -27,7 +28,8 @@ from memoize import mproperty
 from phonenumber_field.modelfields import PhoneNumberField
 
 # MuckRock
-from muckrock.accounts.querysets import ProfileQuerySet
+from muckrock.accounts.querysets import URL_AUTH_TOKEN_KEY, ProfileQuerySet
+from muckrock.core.models import FieldChangeMixin
 from muckrock.core.utils import cache_get_or_set, squarelet_get, stripe_retry_on_error
 from muckrock.organization.models import Organization
 
@@ -48,13 +50,14 @@ ACCT_TYPES = [
 PAYMENT_FEE = 0.05
 
 
-class Profile(models.Model):
+class Profile(FieldChangeMixin, models.Model):
     """User profile information for muckrock"""
 
     # pylint: disable=too-many-public-methods
     # pylint: disable=too-many-instance-attributes
 
     objects = ProfileQuerySet.as_manager()
+    tracked_fields = ("org_share",)
 
     email_prefs = (
         ("never", "Never"),
@@ -238,7 +241,7 @@ class Profile(models.Model):
             return resp.json().get("url_auth_token")
 
         return cache_get_or_set(
-            "url_auth_token:{}".format(self.uuid), get_url_auth_token_squarelet, 10
+            URL_AUTH_TOKEN_KEY.format(self.uuid), get_url_auth_token_squarelet, 10
         )
 
     def public_profile_page(self):
@@ -311,6 +314,50 @@ class NotificationQuerySet(models.QuerySet):
         """All unread notifications"""
         return self.filter(read=False)
 
+    def create_for_users(self, user_ids, action):
+        """Notify the users about the action, inserting the notifications in
+        batches"""
+        notifications = []
+        batch_size = settings.NOTIFICATION_BATCH_SIZE
+        for i in range(0, len(user_ids), batch_size):
+            notifications.extend(
+                self.bulk_create(
+                    [
+                        self.model(user_id=user_id, action=action)
+                        for user_id in user_ids[i : i + batch_size]
+                    ]
+                )
+            )
+        clear_unread_counts(user_ids)
+        return notifications
+
+    def mark_read(self):
+        """Mark all of these notifications as read with a single update"""
+        unread = self.filter(read=False).order_by().prefetch_related(None)
+        user_ids = set(unread.values_list("user_id", flat=True))
+        if not user_ids:
+            return 0
+        count = unread.update(read=True)
+        clear_unread_counts(user_ids)
+        return count
+
+    def unread_count(self, user):
+        """The number of unread notifications the user has, cached until they
+        change"""
+        return cache_get_or_set(
+            UNREAD_COUNT_KEY.format(user.pk),
+            lambda: self.filter(user=user, read=False).count(),
+            settings.DEFAULT_CACHE_TIMEOUT,
+        )
+
+
+UNREAD_COUNT_KEY = "notifications:unread_count:{}"
+
+
+def clear_unread_counts(user_ids):
+    """Clear the cached unread notification counts for the users"""
+    cache.delete_many([UNREAD_COUNT_KEY.format(user_id) for user_id in user_ids])
+
 
 class Notification(models.Model):
     """A notification connects an action to a user."""
@@ -323,6 +370,17 @@ class Notification(models.Model):
     read = models.BooleanField(default=False)
     objects = NotificationQuerySet.as_manager()
 
+    class Meta:
+        indexes = [
+            # unread notifications are looked up on every page for the badge
+            # and by the digests, and are a small fraction of the table
+            models.Index(
+                fields=["user", "datetime"],
+                condition=models.Q(read=False),
+                name="accounts_notification_unread",
+            )
+        ]
+
     def __str__(self):
         return "<Notification for %s>" % str(self.user.username).capitalize()
 
@@ -330,11 +388,31 @@ class Notification(models.Model):
         """Marks notification as read."""
         self.read = True
         self.save()
+        clear_unread_counts([self.user_id])
 
     def mark_unread(self):
         """Marks notification as unread."""
         self.read = False
         self.save()
+        clear_unread_counts([self.user_id])
+
+
+class ArchivedNotification(models.Model):
+    """A read notification which has been moved out of the live table
+
+    The action it refers to may since have been archived as well
+    """
+
+    id = models.IntegerField(primary_key=True)
+    datetime = models.DateTimeField()
+    user = models.ForeignKey(
+        User, related_name="archived_notifications", on_delete=models.CASCADE
+    )
+    action_id = models.IntegerField(db_index=True)
+    datetime_archived = models.DateTimeField()
+
+    def __str__(self):
+        return "<Archived Notification for %s>" % str(self.user.username).capitalize()
 
 
 class Statistics(models.Model):
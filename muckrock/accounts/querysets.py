@@ -9,11 +9,17 @@ from django.db import models, transaction
 # Standard Library
 import logging
 
+# Third Party
+import requests
+
 # MuckRock
+from muckrock.core.utils import squarelet_get
 from muckrock.organization.models import Membership, Organization
 
 logger = logging.getLogger(__name__)
 
+URL_AUTH_TOKEN_KEY = "url_auth_token:{}"
+
 
 class ProfileQuerySet(models.QuerySet):
     """Object manager for profiles"""
@@ -35,6 +41,32 @@ class ProfileQuerySet(models.QuerySet):
 
         return user, created
 
+    def prefetch_url_auth_tokens(self):
+        """Fetch the URL auth tokens for these profiles over a single squarelet
+        connection and cache them, so a batch of emails does not need to request
+        them one at a time while rendering autologin links"""
+        keys = {
+            URL_AUTH_TOKEN_KEY.format(uuid): uuid
+            for uuid in self.filter(use_autologin=True).values_list("uuid", flat=True)
+        }
+        cached = cache.get_many(list(keys))
+        tokens = {}
+        with requests.Session() as session:
+            for key, uuid in keys.items():
+                if key in cached:
+                    continue
+                try:
+                    resp = squarelet_get(
+                        "/api/url_auth_tokens/{}/".format(uuid), session=session
+                    )
+                    resp.raise_for_status()
+                except requests.exceptions.RequestException:
+                    # emails for this user will fall back to plain links
+                    continue
+                tokens[key] = resp.json().get("url_auth_token")
+        cache.set_many(tokens, settings.URL_AUTH_TOKEN_BATCH_TIMEOUT)
+        return tokens
+
     def _squarelet_update_or_create_user(self, uuid, data):
         """Format user data and update or create the user"""
         user_map = {"preferred_username": "username", "email": "email"}
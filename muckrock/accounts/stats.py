@@ -0,0 +1,390 @@
+"""
+Collect the daily site statistics
+
+Each metric group computes all of its columns in a single conditional
+aggregate query, and independent groups are run concurrently
+"""
+
+# Django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+# Standard Library
+import logging
+import time as timer
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta
+
+# MuckRock
+from muckrock.agency.models import Agency
+from muckrock.crowdfund.models import Crowdfund, CrowdfundPayment
+from muckrock.crowdsource.models import Crowdsource, CrowdsourceResponse
+from muckrock.foia.models import FOIACommunication, FOIAComposer, FOIAFile, FOIARequest
+from muckrock.foiamachine.models import FoiaMachineRequest
+from muckrock.jurisdiction.models import ExampleAppeal, Exemption, InvokedExemption
+from muckrock.news.models import Article
+from muckrock.project.models import Project
+from muckrock.task.models import FlaggedTask, Task
+
+logger = logging.getLogger(__name__)
+
+# suffix for the request statistics columns: status
+REQUEST_STATUSES = [
+    ("success", "done"),
+    ("denied", "rejected"),
+    ("submitted", "submitted"),
+    ("awaiting_ack", "ack"),
+    ("awaiting_response", "processed"),
+    ("awaiting_appeal", "appealing"),
+    ("fix_required", "fix"),
+    ("payment_required", "payment"),
+    ("no_docs", "no_docs"),
+    ("partial", "partial"),
+    ("abandoned", "abandoned"),
+    ("lawsuit", "lawsuit"),
+]
+
+# suffix for the entitlement statistics columns: entitlement slug
+ENTITLEMENTS = [
+    ("pro", "professional"),
+    ("basic", "free"),
+    ("beta", "beta"),
+    ("proxy", "proxy"),
+    ("admin", "admin"),
+]
+
+# name used in the task statistics columns: reverse name of the task subclass
+TASK_TYPES = [
+    ("orphan", "orphantask"),
+    ("snailmail", "snailmailtask"),
+    ("rejected", "rejectedemailtask"),
+    ("flagged", "flaggedtask"),
+    ("newagency", "newagencytask"),
+    ("response", "responsetask"),
+    ("faxfail", "failedfaxtask"),
+    ("crowdfundpayment", "crowdfundtask"),
+    ("reviewagency", "reviewagencytask"),
+    ("portal", "portaltask"),
+]
+
+# closed crowdfund statistics column suffix: (lower bound, upper bound)
+CROWDFUND_BUCKETS = [
+    ("0_25", 0, 0.25),
+    ("25_50", 0.25, 0.50),
+    ("50_75", 0.50, 0.75),
+    ("75_100", 0.75, 1.00),
+    ("100_125", 1.00, 1.25),
+    ("125_150", 1.25, 1.50),
+    ("150_175", 1.50, 1.75),
+    ("175_200", 1.75, 2.00),
+]
+
+
+def distinct_count(filter_=None):
+    """Count distinct primary keys, for aggregates spanning multi-valued joins"""
+    return Count("pk", distinct=True, filter=filter_)
+
+
+class StatisticsCollector:
+    """Collect the statistics for the day before `day`"""
+
+    groups = [
+        "requests",
+        "daily_requests",
+        "composers",
+        "communications",
+        "orphaned_communications",
+        "machine_requests",
+        "files",
+        "agencies",
+        "articles",
+        "tasks",
+        "crowdfunds",
+        "crowdfund_payments",
+        "projects",
+        "project_users",
+        "exemptions",
+        "crowdsources",
+        "crowdsource_responses",
+    ]
+
+    def __init__(self, day=None):
+        if day is None:
+            day = date.today()
+        self.today = day
+        midnight = time(tzinfo=timezone.get_current_timezone())
+        self.today_midnight = datetime.combine(day, midnight)
+        self.yesterday = day - timedelta(1)
+        self.yesterday_midnight = self.today_midnight - timedelta(1)
+
+    @property
+    def date_range(self):
+        """The date time range the daily statistics cover"""
+        return (self.yesterday_midnight, self.today_midnight)
+
+    def collect(self):
+        """Run all of the metric groups and return the combined statistics"""
+        start = timer.monotonic()
+        workers = settings.STATISTICS_CONCURRENCY
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(self._run_threaded, self.groups))
+        else:
+            results = [self._run(group) for group in self.groups]
+
+        stats = {}
+        for result in results:
+            stats.update(result)
+        logger.info(
+            "[STATISTICS] Collected %d statistics in %.2fs",
+            len(stats),
+            timer.monotonic() - start,
+        )
+        return stats
+
+    def _run(self, group):
+        """Run and time a single metric group"""
+        start = timer.monotonic()
+        result = getattr(self, "collect_{}".format(group))()
+        logger.info("[STATISTICS] %s: %.2fs", group, timer.monotonic() - start)
+        return result
+
+    def _run_threaded(self, group):
+        """Run a metric group in a worker thread, which gets its own connection"""
+        try:
+            return self._run(group)
+        finally:
+            connection.close()
+
+    def collect_requests(self):
+        """Request status counts, fees and processing days"""
+        aggregates = {
+            "total_requests_{}".format(name): Count("pk", filter=Q(status=status))
+            for name, status in REQUEST_STATUSES
+        }
+        return FOIARequest.objects.aggregate(
+            total_requests=Count("pk"),
+            total_fees=Sum("price"),
+            requests_processing_days=Sum(
+                self.today - F("date_processing"),
+                filter=Q(status="submitted", date_processing__isnull=False),
+            ),
+            **aggregates,
+        )
+
+    def collect_daily_requests(self):
+        """Requests submitted yesterday, broken down by entitlement"""
+        slug = "composer__organization__entitlement__slug"
+        individual = Q(composer__organization__individual=True)
+        aggregates = {
+            "daily_requests_{}".format(name): Count(
+                "pk", filter=Q(**{slug: entitlement}) & individual
+            )
+            for name, entitlement in ENTITLEMENTS
+        }
+        return FOIARequest.objects.get_submitted_range(*self.date_range).aggregate(
+            daily_requests_org=Count("pk", filter=Q(**{slug: "organization"})),
+            daily_requests_other=Count(
+                "pk",
+                filter=Q(**{"{}__isnull".format(slug): True})
+                | ~Q(
+                    **{
+                        "{}__in".format(slug): [e for _, e in ENTITLEMENTS]
+                        + ["organization"]
+                    }
+                ),
+            ),
+            **aggregates,
+        )
+
+    def collect_composers(self):
+        """Composer status counts and the number of users who have filed"""
+        return FOIAComposer.objects.aggregate(
+            total_composers=Count("pk"),
+            total_composers_draft=Count("pk", filter=Q(status="started")),
+            total_composers_submitted=Count("pk", filter=Q(status="submitted")),
+            total_composers_filed=Count("pk", filter=Q(status="filed")),
+            total_users_filed=Count("user", distinct=True),
+        )
+
+    def collect_communications(self):
+        """Communications sent yesterday, by delivery method"""
+        return FOIACommunication.objects.filter(
+            datetime__range=self.date_range, response=False
+        ).aggregate(
+            sent_communications_portal=Count("portals", distinct=True),
+            sent_communications_email=Count("emails", distinct=True),
+            sent_communications_fax=Count("faxes", distinct=True),
+            sent_communications_mail=Count("mails", distinct=True),
+        )
+
+    def collect_orphaned_communications(self):
+        """Communications not attached to a request"""
+        return FOIACommunication.objects.aggregate(
+            orphaned_communications=Count("pk", filter=Q(foia=None))
+        )
+
+    def collect_machine_requests(self):
+        """FOIA Machine request status counts"""
+        aggregates = {
+            "machine_requests_{}".format(name): Count("pk", filter=Q(status=status))
+            for name, status in REQUEST_STATUSES + [("draft", "started")]
+        }
+        return FoiaMachineRequest.objects.aggregate(
+            machine_requests=Count("pk"), **aggregates
+        )
+
+    def collect_files(self):
+        """Total pages of files"""
+        return FOIAFile.objects.aggregate(total_pages=Sum("pages"))
+
+    def collect_agencies(self):
+        """Agency counts"""
+        return Agency.objects.aggregate(
+            total_agencies=Count("pk"),
+            unapproved_agencies=Count("pk", filter=Q(status="pending")),
+            portal_agencies=Count("pk", filter=Q(portal__isnull=False)),
+        )
+
+    def collect_articles(self):
+        """Articles published yesterday"""
+        return Article.objects.aggregate(
+            daily_articles=Count("pk", filter=Q(pub_date__range=self.date_range))
+        )
+
+    def collect_tasks(self):
+        """Task counts, by task type
+
+        Each task type is a one to one child of Task, so they are all counted in a
+        single query by joining to each child table
+        """
+        undeferred = Q(date_deferred__lte=self.today) | Q(date_deferred=None)
+        unresolved = Q(resolved=False) & undeferred
+        deferred = Q(date_deferred__gt=self.today)
+        aggregates = {
+            "total_tasks": Count("pk"),
+            "total_unresolved_tasks": Count("pk", filter=unresolved),
+            "total_deferred_tasks": Count("pk", filter=deferred),
+        }
+        for name, child in TASK_TYPES:
+            is_type = Q(**{"{}__isnull".format(child): False})
+            aggregates["total_{}_tasks".format(name)] = Count("pk", filter=is_type)
+            aggregates["total_unresolved_{}_tasks".format(name)] = Count(
+                "pk", filter=is_type & unresolved
+            )
+            aggregates["total_deferred_{}_tasks".format(name)] = Count(
+                "pk", filter=is_type & deferred
+            )
+        stats = Task.objects.aggregate(
+            daily_robot_response_tasks=Count(
+                "pk",
+                filter=Q(
+                    responsetask__isnull=False,
+                    date_done__gte=self.yesterday_midnight,
+                    date_done__lt=self.today_midnight,
+                    resolved_by__username="mlrobot",
+                ),
+            ),
+            unresolved_snailmail_appeals=Count(
+                "pk", filter=unresolved & Q(snailmailtask__category="a")
+            ),
+            **aggregates,
+        )
+        stats["flag_processing_days"] = FlaggedTask.objects.get_processing_days()
+        return stats
+
+    def collect_crowdfunds(self):
+        """Crowdfund counts, by entitlement and by percent funded"""
+
+        def entitlement(slug):
+            """Crowdfunds by users with the given entitlement"""
+            return Q(foia__composer__organization__entitlement__slug=slug) | Q(
+                projects__contributors__organizations__entitlement__slug=slug
+            )
+
+        closed = Q(closed=True)
+        aggregates = {
+            "closed_crowdfunds_0": distinct_count(closed & Q(percent=0)),
+            "closed_crowdfunds_200": distinct_count(closed & Q(percent__gt=2.00)),
+        }
+        for name, lower, upper in CROWDFUND_BUCKETS:
+            aggregates["closed_crowdfunds_{}".format(name)] = distinct_count(
+                closed & Q(percent__gt=lower, percent__lte=upper)
+            )
+        for name, slug in ENTITLEMENTS:
+            aggregates["total_crowdfunds_{}".format(name)] = distinct_count(
+                entitlement(slug)
+            )
+            aggregates["open_crowdfunds_{}".format(name)] = distinct_count(
+                entitlement(slug) & Q(closed=False)
+            )
+        return Crowdfund.objects.annotate(
+            percent=F("payment_received") / F("payment_required")
+        ).aggregate(
+            total_crowdfunds=distinct_count(),
+            open_crowdfunds=distinct_count(Q(closed=False)),
+            **aggregates,
+        )
+
+    def collect_crowdfund_payments(self):
+        """Crowdfund payment counts"""
+        return CrowdfundPayment.objects.aggregate(
+            total_crowdfund_payments=Count("pk"),
+            total_crowdfund_payments_loggedin=Count("pk", filter=Q(user__isnull=False)),
+            total_crowdfund_payments_loggedout=Count("pk", filter=Q(user=None)),
+        )
+
+    def collect_projects(self):
+        """Project counts"""
+        return Project.objects.aggregate(
+            public_projects=distinct_count(Q(private=False, approved=True)),
+            private_projects=distinct_count(Q(private=True, approved=True)),
+            unapproved_projects=distinct_count(Q(approved=False)),
+            crowdfund_projects=distinct_count(Q(crowdfunds__isnull=False)),
+        )
+
+    def collect_project_users(self):
+        """Users contributing to projects, by entitlement"""
+        aggregates = {
+            "project_users_{}".format(name): distinct_count(
+                Q(organizations__entitlement__slug=slug)
+            )
+            for name, slug in ENTITLEMENTS
+        }
+        return User.objects.filter(projects__isnull=False).aggregate(
+            project_users=distinct_count(), **aggregates
+        )
+
+    def collect_exemptions(self):
+        """Exemption counts"""
+        return {
+            "total_exemptions": Exemption.objects.count(),
+            "total_invoked_exemptions": InvokedExemption.objects.count(),
+            "total_example_appeals": ExampleAppeal.objects.count(),
+        }
+
+    def collect_crowdsources(self):
+        """Crowdsource status counts"""
+        return Crowdsource.objects.aggregate(
+            total_crowdsources=Count("pk"),
+            total_draft_crowdsources=Count("pk", filter=Q(status="draft")),
+            total_open_crowdsources=Count("pk", filter=Q(status="open")),
+            total_close_crowdsources=Count("pk", filter=Q(status="close")),
+        )
+
+    def collect_crowdsource_responses(self):
+        """Crowdsource response counts, by entitlement"""
+        aggregates = {
+            "crowdsource_responses_{}".format(name): distinct_count(
+                Q(user__organizations__entitlement__slug=slug)
+            )
+            for name, slug in ENTITLEMENTS
+        }
+        return CrowdsourceResponse.objects.aggregate(
+            total_crowdsource_responses=distinct_count(),
+            num_crowdsource_responded_users=Count("user", distinct=True),
+            **aggregates,
+        )
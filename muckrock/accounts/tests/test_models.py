@@ -3,7 +3,7 @@ Tests accounts models
 """
 
 # Django
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 # Third Party
 from nose.tools import assert_false, assert_true, eq_, ok_
@@ -11,7 +11,8 @@ from nose.tools import assert_false, assert_true, eq_, ok_
 # MuckRock
 from muckrock.accounts.models import Notification, Profile
 from muckrock.core.factories import NotificationFactory, ProfileFactory, UserFactory
-from muckrock.core.utils import new_action
+from muckrock.core.test_utils import RunCommitHooksMixin
+from muckrock.core.utils import new_action, notify
 from muckrock.foia.factories import FOIARequestFactory
 from muckrock.organization.factories import (
     FreeEntitlementFactory,
@@ -75,7 +76,7 @@ class TestProfileUnit(TestCase):
         assert_false(free.is_advanced())
 
 
-class TestNotifications(TestCase):
+class TestNotifications(RunCommitHooksMixin, TestCase):
     """Notifications connect actions to users and contain a read state."""
 
     def setUp(self):
@@ -155,3 +156,25 @@ class TestNotifications(TestCase):
             self.notification not in Notification.objects.get_unread(),
             "Read notifications should not be in the set returned.",
         )
+
+    @override_settings(NOTIFICATION_BATCH_SIZE=2)
+    def test_notify_many(self):
+        """Notifications are created in batches and marked read in bulk"""
+        users = UserFactory.create_batch(5)
+        notifications = notify(users, self.action)
+        eq_(len(notifications), 5)
+        eq_(Notification.objects.filter(action=self.action).count(), 5)
+        eq_(Notification.objects.unread_count(users[0]), 1)
+        eq_(Notification.objects.filter(action=self.action).mark_read(), 5)
+        eq_(Notification.objects.unread_count(users[0]), 0)
+        eq_(Notification.objects.filter(action=self.action).mark_read(), 0)
+
+    @override_settings(NOTIFICATION_ASYNC_THRESHOLD=2)
+    def test_notify_async(self):
+        """Notifying many users is handed to a background task"""
+        users = UserFactory.create_batch(3)
+        notifications = notify(users, self.action)
+        eq_(notifications, [])
+        eq_(Notification.objects.filter(action=self.action).count(), 0)
+        self.run_commit_hooks()
+        eq_(Notification.objects.filter(action=self.action).count(), 3)
@@ -4,12 +4,22 @@ Tests tasks for the Accounts application
 
 # Django
 from django.test import TestCase
+from django.utils import timezone
+
+# Standard Library
+from datetime import date, timedelta
 
 # Third Party
+from actstream.models import Action
 from nose.tools import eq_
 
 # MuckRock
 from muckrock.accounts import models, tasks
+from muckrock.core.factories import NotificationFactory
+from muckrock.core.models import ArchivedAction
+from muckrock.foia.factories import FOIARequestFactory
+from muckrock.foia.models import FOIARequest
+from muckrock.task.factories import FlaggedTaskFactory, OrphanTaskFactory
 
 
 class TestStatisticsTask(TestCase):
@@ -23,3 +33,60 @@ class TestStatisticsTask(TestCase):
         eq_(
             new_stat_count, stat_count + 1, "A new Statistics object should be created."
         )
+
+    def test_stats_values(self):
+        """Grouped aggregates should match the individual counts"""
+        FOIARequestFactory(status="done")
+        FOIARequestFactory(status="fix")
+        OrphanTaskFactory()
+        FlaggedTaskFactory(resolved=True)
+        FlaggedTaskFactory(date_deferred=date.today() + timedelta(1))
+        tasks.store_statistics()
+        stats = models.Statistics.objects.get()
+        eq_(stats.date, date.today() - timedelta(1))
+        eq_(stats.total_requests, FOIARequest.objects.count())
+        eq_(
+            stats.total_requests_success,
+            FOIARequest.objects.filter(status="done").count(),
+        )
+        eq_(
+            stats.total_requests_fix_required,
+            FOIARequest.objects.filter(status="fix").count(),
+        )
+        eq_(stats.total_tasks, 3)
+        eq_(stats.total_orphan_tasks, 1)
+        eq_(stats.total_flagged_tasks, 2)
+        eq_(stats.total_unresolved_flagged_tasks, 0)
+        eq_(stats.total_deferred_flagged_tasks, 1)
+        eq_(stats.total_unresolved_tasks, 1)
+
+
+class TestArchiveActivityTask(TestCase):
+    """Old activity should be moved to the archive tables"""
+
+    def test_archive_activity(self):
+        """Only old read notifications, and old actions without notifications,
+        are archived"""
+        old = timezone.now() - timedelta(400)
+        old_read = NotificationFactory(read=True)
+        old_unread = NotificationFactory(read=False)
+        new_read = NotificationFactory(read=True)
+        models.Notification.objects.filter(pk__in=[old_read.pk, old_unread.pk]).update(
+            datetime=old
+        )
+        Action.objects.update(timestamp=old)
+
+        tasks.archive_activity()
+
+        eq_(
+            set(models.Notification.objects.values_list("pk", flat=True)),
+            {old_unread.pk, new_read.pk},
+        )
+        archived = models.ArchivedNotification.objects.get()
+        eq_(archived.pk, old_read.pk)
+        eq_(archived.action_id, old_read.action_id)
+        eq_(
+            set(Action.objects.values_list("pk", flat=True)),
+            {old_unread.action_id, new_read.action_id},
+        )
+        eq_(ArchivedAction.objects.get().pk, old_read.action_id)
@@ -385,11 +385,7 @@ class NotificationList(ListView):
 
     def mark_all_read(self):
         """Mark all notifications for the view as read."""
-        notifications = self.get_queryset()
-        # to be more efficient, let's just get the unread ones
-        notifications = notifications.get_unread()
-        for notification in notifications:
-            notification.mark_read()
+        self.get_queryset().mark_read()
 
     def post(self, request, *args, **kwargs):
         """Handle post actions to this view"""
@@ -14,7 +14,6 @@ from calendar import monthrange
 from datetime import date
 
 # Third Party
-from boto.s3.connection import S3Connection
 from constance import config
 from dashing.widgets import GraphWidget, ListWidget, NumberWidget, Widget
 from googleapiclient.discovery import build
@@ -25,6 +24,7 @@ from smart_open.smart_open_lib import smart_open
 # MuckRock
 from muckrock.accounts.models import Statistics
 from muckrock.accounts.utils import user_entitlement_count
+from muckrock.core import s3
 from muckrock.core.models import ExtractDay
 from muckrock.core.utils import cache_get_or_set
 from muckrock.crowdsource.models import CrowdsourceResponse
@@ -489,10 +489,7 @@ class PageViewsWidget(NumberWidget):
 
             # initalize google analytics api
             # we store the keyfile on s3
-            conn = S3Connection(
-                settings.AWS_ACCESS_KEY_ID, settings.AWS_SECRET_ACCESS_KEY
-            )
-            bucket = conn.get_bucket(settings.AWS_STORAGE_BUCKET_NAME)
+            bucket = s3.get_bucket("accounts.widgets.PageViewsWidget")
             key = bucket.get_key("google/analytics_key.json")
             with smart_open(key) as key_file:
                 credentials = ServiceAccountCredentials.from_json_keyfile_dict(
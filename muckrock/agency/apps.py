@@ -12,11 +12,17 @@ class AgencyConfig(AppConfig):
     name = "muckrock.agency"
 
     def ready(self):
-        """Registers agencies with the activity streams plugin"""
-        # pylint: disable=invalid-name, import-outside-toplevel
+        """Registers agencies with the activity streams plugin and connects the
+        signal handlers which maintain agency metrics"""
+        # pylint: disable=invalid-name, import-outside-toplevel, unused-import
         from actstream import registry as action
         from watson import search
 
+        import muckrock.agency.signals
+        from muckrock.core import changes, page_cache
+
         Agency = self.get_model("Agency")
         action.register(Agency)
         search.register(Agency.objects.get_approved())
+        changes.register(Agency)
+        page_cache.register(Agency, "jurisdiction")
@@ -3,15 +3,11 @@ Custom importers for school agencies
 """
 
 # Django
-from django.conf import settings
 from django.template.defaultfilters import slugify
 
 # Standard Library
 import csv
 
-# Third Party
-from boto.s3.connection import S3Connection
-
 # MuckRock
 from muckrock.agency.models import (
     Agency,
@@ -21,6 +17,7 @@ from muckrock.agency.models import (
     AgencyType,
 )
 from muckrock.communication.models import Address, EmailAddress, PhoneNumber
+from muckrock.core import s3
 from muckrock.jurisdiction.models import Jurisdiction
 
 # columns
@@ -51,8 +48,7 @@ LAST_UPDATE = 21
 def import_schools(file_name):
     """Import schools from spreadsheet"""
     # pylint: disable=too-many-locals
-    conn = S3Connection(settings.AWS_ACCESS_KEY_ID, settings.AWS_SECRET_ACCESS_KEY)
-    bucket = conn.get_bucket("muckrock")
+    bucket = s3.get_bucket("agency.importers", "muckrock")
     key = bucket.get_key(file_name)
     key.get_contents_to_filename("/tmp/tmp.csv")
     school_district = AgencyType.objects.get(name="School District")
@@ -106,12 +102,11 @@ def import_schools(file_name):
                 if number:
                     if row[EXT]:
                         number += " x%s" % row[EXT]
-                    phone, _ = PhoneNumber.objects.get_or_create(
-                        number=number, type="phone"
-                    )
-                    AgencyPhone.objects.get_or_create(agency=agency, phone=phone)
-                if row[EMAIL]:
-                    email = EmailAddress.objects.fetch(row[EMAIL])
+                    phone = PhoneNumber.objects.fetch(number, type_="phone")
+                    if phone:
+                        AgencyPhone.objects.get_or_create(agency=agency, phone=phone)
+                email = EmailAddress.objects.fetch(row[EMAIL]) if row[EMAIL] else None
+                if email:
                     AgencyEmail.objects.get_or_create(
                         agency=agency,
                         email=email,
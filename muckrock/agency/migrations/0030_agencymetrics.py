@@ -0,0 +1,114 @@
+# Django
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Avg, Count, F, Q, Value
+from django.db.models.functions import Coalesce
+
+# MuckRock
+from muckrock.core.models import ExtractDay
+
+STATUS_METRICS = [
+    ("number_requests_completed", "done"),
+    ("number_requests_rejected", "rejected"),
+    ("number_requests_no_docs", "no_docs"),
+    ("number_requests_ack", "ack"),
+    ("number_requests_resp", "processed"),
+    ("number_requests_fix", "fix"),
+    ("number_requests_appeal", "appealing"),
+    ("number_requests_pay", "payment"),
+    ("number_requests_partial", "partial"),
+    ("number_requests_lawsuit", "lawsuit"),
+    ("number_requests_withdrawn", "abandoned"),
+]
+
+
+def calculate_metrics(apps, schema_editor):
+    """Calculate the initial metrics for every agency"""
+    Agency = apps.get_model("agency", "Agency")
+    AgencyMetrics = apps.get_model("agency", "AgencyMetrics")
+    FOIARequest = apps.get_model("foia", "FOIARequest")
+
+    aggregates = {
+        name: Count("pk", filter=Q(status=status)) for name, status in STATUS_METRICS
+    }
+    requests = (
+        FOIARequest.objects.order_by()
+        .values("agency_id")
+        .annotate(
+            average_response_time=Coalesce(
+                ExtractDay(Avg(F("datetime_done") - F("composer__datetime_submitted"))),
+                Value(0),
+            ),
+            number_requests=Count("pk"),
+            number_fees=Count("pk", filter=Q(price__gt=0)),
+            number_success=Count("pk", filter=Q(status__in=["done", "partial"])),
+            **aggregates
+        )
+    )
+    metrics = {}
+    for values in requests.iterator():
+        agency_id = values.pop("agency_id")
+        number_fees = values.pop("number_fees")
+        number_success = values.pop("number_success")
+        total = values["number_requests"]
+        values["fee_rate"] = 100 * number_fees / total if total else 0
+        values["success_rate"] = 100 * number_success / total if total else 0
+        metrics[agency_id] = values
+
+    AgencyMetrics.objects.bulk_create(
+        (
+            AgencyMetrics(agency_id=agency_id, **metrics.get(agency_id, {}))
+            for agency_id in Agency.objects.values_list("pk", flat=True).iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("foia", "0079_auto_20201210_1302"),
+        ("agency", "0029_auto_20201016_1327"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AgencyMetrics",
+            fields=[
+                (
+                    "agency",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="metrics",
+                        serialize=False,
+                        to="agency.Agency",
+                    ),
+                ),
+                (
+                    "average_response_time",
+                    models.IntegerField(db_index=True, default=0),
+                ),
+                ("fee_rate", models.FloatField(db_index=True, default=0)),
+                ("success_rate", models.FloatField(db_index=True, default=0)),
+                (
+                    "number_requests",
+                    models.PositiveIntegerField(db_index=True, default=0),
+                ),
+                ("number_requests_completed", models.PositiveIntegerField(default=0)),
+                ("number_requests_rejected", models.PositiveIntegerField(default=0)),
+                ("number_requests_no_docs", models.PositiveIntegerField(default=0)),
+                ("number_requests_ack", models.PositiveIntegerField(default=0)),
+                ("number_requests_resp", models.PositiveIntegerField(default=0)),
+                ("number_requests_fix", models.PositiveIntegerField(default=0)),
+                ("number_requests_appeal", models.PositiveIntegerField(default=0)),
+                ("number_requests_pay", models.PositiveIntegerField(default=0)),
+                ("number_requests_partial", models.PositiveIntegerField(default=0)),
+                ("number_requests_lawsuit", models.PositiveIntegerField(default=0)),
+                ("number_requests_withdrawn", models.PositiveIntegerField(default=0)),
+                ("datetime_updated", models.DateTimeField(auto_now=True)),
+            ],
+            options={"verbose_name_plural": "agency metrics"},
+        ),
+        migrations.RunPython(calculate_metrics, migrations.RunPython.noop),
+    ]
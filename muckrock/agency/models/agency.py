@@ -21,7 +21,10 @@ from easy_thumbnails.fields import ThumbnailerImageField
 
 # MuckRock
 from muckrock.accounts.models import Profile
+from muckrock.agency.models.metrics import AgencyMetrics
+from muckrock.core import changes, page_cache
 from muckrock.core.utils import squarelet_post
+from muckrock.foia.models import FOIARequest, FOIAVisibility
 from muckrock.jurisdiction.models import Jurisdiction, RequestHelper
 from muckrock.task.models import NewAgencyTask
 
@@ -219,6 +222,7 @@ class Agency(models.Model, RequestHelper):
         self.slug = slugify(self.slug)
         self.name = self.name.strip()
         super(Agency, self).save(*args, **kwargs)
+        page_cache.purge(self)
 
     def link_display(self):
         """Returns link if approved"""
@@ -341,8 +345,15 @@ class Agency(models.Model, RequestHelper):
             "newagencytask_set",
             "staleagencytask_set",
         ]
+        foia_ids = list(agency.foiarequest_set.values_list("pk", flat=True))
         for relation in replace_relations:
             getattr(agency, relation).update(agency=self)
+        changes.record(FOIARequest, foia_ids)
+        page_cache.purge_pks(FOIARequest, foia_ids)
+        page_cache.purge(self)
+        # moving the requests changes both agencies' metrics and who may view them
+        AgencyMetrics.objects.refresh([self.pk, agency.pk])
+        FOIAVisibility.objects.filter(agency=agency).update(agency=self)
 
         replace_self_relations = [
             ("appeal_agency", "appeal_for"),
@@ -374,8 +385,12 @@ class Agency(models.Model, RequestHelper):
         try:
             old_user = agency.profile.user
             new_user = self.get_user()
-            old_user.sent_communications.update(from_user=new_user)
-            old_user.received_communications.update(to_user=new_user)
+            old_user.sent_communications.update(
+                from_user=new_user, datetime_changed=timezone.now()
+            )
+            old_user.received_communications.update(
+                to_user=new_user, datetime_changed=timezone.now()
+            )
         except Profile.DoesNotExist:
             pass
 
@@ -0,0 +1,133 @@
+"""
+Precomputed request metrics for agencies
+"""
+
+# Django
+from django.db import models, transaction
+from django.db.models import Avg, Count, F, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+# MuckRock
+from muckrock.core.models import ExtractDay
+from muckrock.foia.models import FOIARequest
+
+# metric field name: request status counted
+STATUS_METRICS = [
+    ("number_requests_completed", "done"),
+    ("number_requests_rejected", "rejected"),
+    ("number_requests_no_docs", "no_docs"),
+    ("number_requests_ack", "ack"),
+    ("number_requests_resp", "processed"),
+    ("number_requests_fix", "fix"),
+    ("number_requests_appeal", "appealing"),
+    ("number_requests_pay", "payment"),
+    ("number_requests_partial", "partial"),
+    ("number_requests_lawsuit", "lawsuit"),
+    ("number_requests_withdrawn", "abandoned"),
+]
+
+# all of the metrics which are exposed through the API
+METRIC_FIELDS = [
+    "average_response_time",
+    "fee_rate",
+    "success_rate",
+    "number_requests",
+] + [name for name, _ in STATUS_METRICS]
+
+
+class AgencyMetricsQuerySet(models.QuerySet):
+    """Object manager for agency metrics"""
+
+    def compute(self, agency_ids):
+        """Calculate the metrics for the given agencies from their requests"""
+        aggregates = {
+            name: Count("pk", filter=Q(status=status))
+            for name, status in STATUS_METRICS
+        }
+        requests = (
+            FOIARequest.objects.filter(agency__in=agency_ids)
+            .order_by()
+            .values("agency_id")
+            .annotate(
+                average_response_time=Coalesce(
+                    ExtractDay(
+                        Avg(F("datetime_done") - F("composer__datetime_submitted"))
+                    ),
+                    Value(0),
+                ),
+                number_requests=Count("pk"),
+                number_fees=Count("pk", filter=Q(price__gt=0)),
+                number_success=Count("pk", filter=Q(status__in=["done", "partial"])),
+                **aggregates
+            )
+        )
+        metrics = {}
+        for values in requests:
+            agency_id = values.pop("agency_id")
+            number_fees = values.pop("number_fees")
+            number_success = values.pop("number_success")
+            total = values["number_requests"]
+            values["fee_rate"] = 100 * number_fees / total if total else 0
+            values["success_rate"] = 100 * number_success / total if total else 0
+            metrics[agency_id] = values
+        return metrics
+
+    def refresh(self, agency_ids):
+        """Recalculate and store the metrics for the given agencies"""
+        agency_ids = list(agency_ids)
+        computed = self.compute(agency_ids)
+        now = timezone.now()
+        metrics = [
+            self.model(
+                agency_id=agency_id, datetime_updated=now, **computed.get(agency_id, {})
+            )
+            for agency_id in agency_ids
+        ]
+        with transaction.atomic():
+            existing = set(
+                self.select_for_update()
+                .filter(agency__in=agency_ids)
+                .values_list("agency_id", flat=True)
+            )
+            self.bulk_update(
+                [m for m in metrics if m.agency_id in existing],
+                METRIC_FIELDS + ["datetime_updated"],
+            )
+            self.bulk_create([m for m in metrics if m.agency_id not in existing])
+
+
+class AgencyMetrics(models.Model):
+    """Request statistics for an agency, kept up to date as its requests change
+    so they may be listed, sorted and filtered on without aggregating requests"""
+
+    agency = models.OneToOneField(
+        "agency.Agency",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="metrics",
+    )
+    average_response_time = models.IntegerField(default=0, db_index=True)
+    fee_rate = models.FloatField(default=0, db_index=True)
+    success_rate = models.FloatField(default=0, db_index=True)
+    number_requests = models.PositiveIntegerField(default=0, db_index=True)
+    number_requests_completed = models.PositiveIntegerField(default=0)
+    number_requests_rejected = models.PositiveIntegerField(default=0)
+    number_requests_no_docs = models.PositiveIntegerField(default=0)
+    number_requests_ack = models.PositiveIntegerField(default=0)
+    number_requests_resp = models.PositiveIntegerField(default=0)
+    number_requests_fix = models.PositiveIntegerField(default=0)
+    number_requests_appeal = models.PositiveIntegerField(default=0)
+    number_requests_pay = models.PositiveIntegerField(default=0)
+    number_requests_partial = models.PositiveIntegerField(default=0)
+    number_requests_lawsuit = models.PositiveIntegerField(default=0)
+    number_requests_withdrawn = models.PositiveIntegerField(default=0)
+    datetime_updated = models.DateTimeField(auto_now=True)
+
+    objects = AgencyMetricsQuerySet.as_manager()
+
+    class Meta:
+        verbose_name_plural = "agency metrics"
+
+    def __str__(self):
+        return "Metrics for {}".format(self.agency_id)
@@ -62,9 +62,11 @@ class AgencySerializer(serializers.ModelSerializer):
         queryset=Jurisdiction.objects.all(), style={"base_template": "input.html"}
     )
     absolute_url = serializers.SerializerMethodField()
-    average_response_time = serializers.ReadOnlyField(source="average_response_time_")
-    fee_rate = serializers.ReadOnlyField(source="fee_rate_")
-    success_rate = serializers.ReadOnlyField(source="success_rate_")
+    average_response_time = serializers.ReadOnlyField(
+        source="metrics.average_response_time"
+    )
+    fee_rate = serializers.ReadOnlyField(source="metrics.fee_rate")
+    success_rate = serializers.ReadOnlyField(source="metrics.success_rate")
 
     # contact fields
     has_portal = serializers.SerializerMethodField()
@@ -77,19 +79,41 @@ class AgencySerializer(serializers.ModelSerializer):
     emails = AgencyEmailSerializer(many=True, read_only=True, source="agencyemail_set")
     phones = AgencyPhoneSerializer(many=True, read_only=True, source="agencyphone_set")
 
-    # request counts
-    number_requests = serializers.ReadOnlyField()
-    number_requests_completed = serializers.ReadOnlyField()
-    number_requests_rejected = serializers.ReadOnlyField()
-    number_requests_no_docs = serializers.ReadOnlyField()
-    number_requests_ack = serializers.ReadOnlyField()
-    number_requests_resp = serializers.ReadOnlyField()
-    number_requests_fix = serializers.ReadOnlyField()
-    number_requests_appeal = serializers.ReadOnlyField()
-    number_requests_pay = serializers.ReadOnlyField()
-    number_requests_partial = serializers.ReadOnlyField()
-    number_requests_lawsuit = serializers.ReadOnlyField()
-    number_requests_withdrawn = serializers.ReadOnlyField()
+    # request counts, precomputed in AgencyMetrics
+    number_requests = serializers.ReadOnlyField(source="metrics.number_requests")
+    number_requests_completed = serializers.ReadOnlyField(
+        source="metrics.number_requests_completed"
+    )
+    number_requests_rejected = serializers.ReadOnlyField(
+        source="metrics.number_requests_rejected"
+    )
+    number_requests_no_docs = serializers.ReadOnlyField(
+        source="metrics.number_requests_no_docs"
+    )
+    number_requests_ack = serializers.ReadOnlyField(
+        source="metrics.number_requests_ack"
+    )
+    number_requests_resp = serializers.ReadOnlyField(
+        source="metrics.number_requests_resp"
+    )
+    number_requests_fix = serializers.ReadOnlyField(
+        source="metrics.number_requests_fix"
+    )
+    number_requests_appeal = serializers.ReadOnlyField(
+        source="metrics.number_requests_appeal"
+    )
+    number_requests_pay = serializers.ReadOnlyField(
+        source="metrics.number_requests_pay"
+    )
+    number_requests_partial = serializers.ReadOnlyField(
+        source="metrics.number_requests_partial"
+    )
+    number_requests_lawsuit = serializers.ReadOnlyField(
+        source="metrics.number_requests_lawsuit"
+    )
+    number_requests_withdrawn = serializers.ReadOnlyField(
+        source="metrics.number_requests_withdrawn"
+    )
 
     def __init__(self, *args, **kwargs):
         """After initializing the serializer,
@@ -0,0 +1,59 @@
+"""Model signal handlers for the agency application"""
+
+# Django
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+# MuckRock
+from muckrock.agency.models import Agency, AgencyMetrics
+from muckrock.agency.tasks import schedule_agency_metrics
+from muckrock.foia.models import FOIARequest
+
+# pylint: disable=unused-argument
+
+
+def agency_created(sender, instance, created, raw, **kwargs):
+    """Give new agencies an empty set of metrics"""
+    if created and not raw:
+        AgencyMetrics.objects.get_or_create(agency=instance)
+
+
+def request_saved(sender, instance, created, raw, **kwargs):
+    """A request being saved may change its agency's metrics, if it is new or
+    any of the fields the metrics are calculated from have changed"""
+    if raw:
+        return
+    if not created and not any(
+        instance.has_changed(f) for f in ("status", "agency", "price", "datetime_done")
+    ):
+        return
+    agency_ids = {instance.agency_id}
+    if not created and instance.has_changed("agency"):
+        # the request has moved, so its old agency's metrics change too
+        agency_ids.add(instance.saved_value("agency"))
+    for agency_id in agency_ids - {None}:
+        transaction.on_commit(lambda a=agency_id: schedule_agency_metrics(a))
+
+
+def request_deleted(sender, instance, **kwargs):
+    """A request being deleted changes its agency's metrics"""
+    if instance.agency_id is not None:
+        agency_id = instance.agency_id
+        transaction.on_commit(lambda: schedule_agency_metrics(agency_id))
+
+
+post_save.connect(
+    agency_created,
+    sender=Agency,
+    dispatch_uid="muckrock.agency.signals.agency_created",
+)
+post_save.connect(
+    request_saved,
+    sender=FOIARequest,
+    dispatch_uid="muckrock.agency.signals.request_saved",
+)
+post_delete.connect(
+    request_deleted,
+    sender=FOIARequest,
+    dispatch_uid="muckrock.agency.signals.request_deleted",
+)
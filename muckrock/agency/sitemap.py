@@ -15,6 +15,8 @@ class AgencySitemap(Sitemap):
     priority = 0.7
     changefreq = "monthly"
     limit = 500
+    # the fields each agency's URL is built from
+    digest_fields = ("slug", "jurisdiction_id", "jurisdiction__slug")
 
     def items(self):
         """Return all approved Agencies"""
@@ -2,9 +2,11 @@
 
 # Django
 from celery.schedules import crontab
-from celery.task import periodic_task
+from celery.task import periodic_task, task
+from django.core.cache import cache
 
 # Standard Library
+import logging
 import os
 
 # Third Party
@@ -12,9 +14,19 @@ from raven import Client
 from raven.contrib.celery import register_logger_signal, register_signal
 
 # MuckRock
+from muckrock.agency.models import Agency, AgencyMetrics
 from muckrock.foia.models import FOIARequest
 from muckrock.task.models import ReviewAgencyTask
 
+logger = logging.getLogger(__name__)
+
+# set while an agency metrics update is queued, to coalesce bursts of changes
+AGENCY_METRICS_KEY = "agency_metrics_queued:{}"
+# seconds to wait for further changes before updating an agency's metrics
+AGENCY_METRICS_DELAY = 60
+# number of agencies to refresh metrics for per query
+AGENCY_METRICS_BATCH_SIZE = 500
+
 client = Client(os.environ.get("SENTRY_DSN"))
 register_logger_signal(client)
 register_signal(client)
@@ -28,3 +40,31 @@ def stale():
     """Record all stale agencies once a week"""
     for foia in FOIARequest.objects.get_stale():
         ReviewAgencyTask.objects.ensure_one_created(agency=foia.agency, resolved=False)
+
+
+def schedule_agency_metrics(agency_pk):
+    """Queue an update of an agency's metrics, unless one is already queued"""
+    if cache.add(AGENCY_METRICS_KEY.format(agency_pk), True, AGENCY_METRICS_DELAY * 2):
+        update_agency_metrics.apply_async(
+            args=(agency_pk,), countdown=AGENCY_METRICS_DELAY
+        )
+
+
+@task(name="muckrock.agency.tasks.update_agency_metrics")
+def update_agency_metrics(agency_pk):
+    """Recalculate the metrics for a single agency"""
+    # clear the flag first, so changes made while we run queue another update
+    cache.delete(AGENCY_METRICS_KEY.format(agency_pk))
+    AgencyMetrics.objects.refresh([agency_pk])
+
+
+@periodic_task(
+    run_every=crontab(hour=3, minute=30),
+    name="muckrock.agency.tasks.refresh_agency_metrics",
+)
+def refresh_agency_metrics():
+    """Recalculate all agency metrics, to catch any changes the signals missed"""
+    agency_ids = list(Agency.objects.order_by("pk").values_list("pk", flat=True))
+    for i in range(0, len(agency_ids), AGENCY_METRICS_BATCH_SIZE):
+        AgencyMetrics.objects.refresh(agency_ids[i : i + AGENCY_METRICS_BATCH_SIZE])
+    logger.info("[AGENCY METRICS] Refreshed metrics for %d agencies", len(agency_ids))
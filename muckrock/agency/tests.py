@@ -16,7 +16,7 @@ from nose.tools import assert_in, assert_not_in, eq_, ok_, raises
 
 # MuckRock
 from muckrock.agency.forms import AgencyForm
-from muckrock.agency.models import Agency
+from muckrock.agency.models import Agency, AgencyMetrics
 from muckrock.agency.views import AgencyList, boilerplate, contact_info, detail
 from muckrock.communication.factories import EmailAddressFactory, PhoneNumberFactory
 from muckrock.core.factories import (
@@ -314,3 +314,43 @@ class TestAgencyForm(TestCase):
     def test_instance_form(self):
         """The form should validate given only instance data"""
         ok_(self.form.is_valid())
+
+
+class TestAgencyMetrics(TestCase):
+    """Test the precomputed agency metrics"""
+
+    def setUp(self):
+        self.agency = AgencyFactory()
+        self.other_agency = AgencyFactory()
+        FOIARequestFactory(agency=self.agency, status="done", price=10)
+        FOIARequestFactory(agency=self.agency, status="partial")
+        FOIARequestFactory(agency=self.agency, status="rejected")
+        FOIARequestFactory(agency=self.agency, status="fix")
+        AgencyMetrics.objects.refresh([self.agency.pk, self.other_agency.pk])
+
+    def test_refresh(self):
+        """Metrics should be calculated from the agency's requests"""
+        metrics = AgencyMetrics.objects.get(agency=self.agency)
+        eq_(metrics.number_requests, 4)
+        eq_(metrics.number_requests_completed, 1)
+        eq_(metrics.number_requests_partial, 1)
+        eq_(metrics.number_requests_rejected, 1)
+        eq_(metrics.number_requests_fix, 1)
+        eq_(metrics.number_requests_ack, 0)
+        eq_(metrics.success_rate, 50.0)
+        eq_(metrics.fee_rate, 25.0)
+        eq_(AgencyMetrics.objects.get(agency=self.other_agency).number_requests, 0)
+
+    def test_api_order_and_filter(self):
+        """The API should sort and filter on the metrics"""
+        url = reverse("api-agency-list")
+        response = self.client.get(url, {"ordering": "-number_requests"})
+        eq_(response.status_code, 200)
+        results = response.json()["results"]
+        eq_(results[0]["id"], self.agency.pk)
+        eq_(results[0]["number_requests"], 4)
+        eq_(results[0]["success_rate"], 50.0)
+
+        response = self.client.get(url, {"number_requests_min": 1})
+        eq_(response.status_code, 200)
+        eq_([a["id"] for a in response.json()["results"]], [self.agency.pk])
@@ -26,6 +26,7 @@ from muckrock.agency.filters import AgencyFilterSet
 from muckrock.agency.forms import AgencyMergeForm
 from muckrock.agency.models import Agency
 from muckrock.agency.utils import initial_communication_template
+from muckrock.core import page_cache
 from muckrock.core.views import MRAutocompleteView, MRSearchFilterListView
 from muckrock.jurisdiction.forms import FlagForm
 from muckrock.jurisdiction.models import Jurisdiction
@@ -104,7 +105,9 @@ def detail(request, jurisdiction, jidx, slug, idx):
 
     collect_stats(agency, context)
 
-    return render(request, "profile/agency.html", context)
+    return page_cache.tag(
+        render(request, "profile/agency.html", context), agency, agency.jurisdiction
+    )
 
 
 def redirect_old(request, jurisdiction, slug, idx, action):
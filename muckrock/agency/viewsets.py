@@ -1,21 +1,23 @@
 """Viewsets for Agency"""
 
 # Django
-from django.db.models.aggregates import Avg, Count, Sum
-from django.db.models.expressions import Case, F, Value, When
-from django.db.models.fields import FloatField, IntegerField
-from django.db.models.functions import Coalesce
+from django.db.models.aggregates import Sum
+from django.db.models.expressions import Case, When
+from django.db.models.fields import IntegerField
 from django.db.models.query import Prefetch
 
 # Third Party
 import django_filters
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets
+from rest_framework.filters import SearchFilter
 
 # MuckRock
 from muckrock.agency.models import Agency
+from muckrock.agency.models.metrics import METRIC_FIELDS
 from muckrock.agency.serializers import AgencySerializer
 from muckrock.communication.models import Address, EmailAddress, PhoneNumber
-from muckrock.core.models import ExtractDay, NullIf
+from muckrock.core.changes import ChangeFeedMixin
 
 
 def CountWhen(output_field=None, **kwargs):
@@ -26,13 +28,18 @@ def CountWhen(output_field=None, **kwargs):
     return Sum(Case(When(then=1, **kwargs), default=0), output_field=output_field)
 
 
-class AgencyViewSet(viewsets.ModelViewSet):
+def metric_filter(metric):
+    """Filter on a range of a precomputed agency metric"""
+    return django_filters.RangeFilter(field_name="metrics__{}".format(metric))
+
+
+class AgencyViewSet(ChangeFeedMixin, viewsets.ModelViewSet):
     """API views for Agency"""
 
     # pylint: disable=too-many-public-methods
     queryset = (
         Agency.objects.order_by("id")
-        .select_related("jurisdiction", "parent", "appeal_agency")
+        .select_related("jurisdiction", "parent", "appeal_agency", "metrics")
         .prefetch_related(
             Prefetch(
                 "emails",
@@ -57,54 +64,11 @@ class AgencyViewSet(viewsets.ModelViewSet):
             ),
             "types",
         )
-        .annotate(
-            average_response_time_=Coalesce(
-                ExtractDay(
-                    Avg(
-                        F("foiarequest__datetime_done")
-                        - F("foiarequest__composer__datetime_submitted")
-                    )
-                ),
-                Value(0),
-            ),
-            fee_rate_=Coalesce(
-                100
-                * CountWhen(foiarequest__price__gt=0, output_field=FloatField())
-                / NullIf(Count("foiarequest"), Value(0), output_field=FloatField()),
-                Value(0),
-            ),
-            success_rate_=Coalesce(
-                100
-                * CountWhen(
-                    foiarequest__status__in=["done", "partial"],
-                    output_field=FloatField(),
-                )
-                / NullIf(Count("foiarequest"), Value(0), output_field=FloatField()),
-                Value(0),
-            ),
-            number_requests=Count("foiarequest"),
-            number_requests_completed=CountWhen(foiarequest__status="done"),
-            number_requests_rejected=CountWhen(foiarequest__status="rejected"),
-            number_requests_no_docs=CountWhen(foiarequest__status="no_docs"),
-            number_requests_ack=CountWhen(foiarequest__status="ack"),
-            number_requests_resp=CountWhen(foiarequest__status="processed"),
-            number_requests_fix=CountWhen(foiarequest__status="fix"),
-            number_requests_appeal=CountWhen(foiarequest__status="appealing"),
-            number_requests_pay=CountWhen(foiarequest__status="payment"),
-            number_requests_partial=CountWhen(foiarequest__status="partial"),
-            number_requests_lawsuit=CountWhen(foiarequest__status="lawsuit"),
-            number_requests_withdrawn=CountWhen(foiarequest__status="abandoned"),
-        )
     )
     serializer_class = AgencySerializer
-    # don't allow ordering by computed fields
-    ordering_fields = [
-        f
-        for f in AgencySerializer.Meta.fields
-        if f
-        not in ("absolute_url", "average_response_time", "fee_rate", "success_rate")
-        and not f.startswith(("has_", "number_"))
-    ]
+    # remove default ordering backend as it does not work well with fields stored
+    # on related models
+    filter_backends = (DjangoFilterBackend, SearchFilter)
 
     def get_queryset(self):
         """Filter out non-approved agencies for non-staff"""
@@ -120,6 +84,48 @@ class AgencyViewSet(viewsets.ModelViewSet):
         types = django_filters.CharFilter(
             field_name="types__name", lookup_expr="iexact"
         )
+        # metrics may be filtered on with <metric>_min and <metric>_max
+        average_response_time = metric_filter("average_response_time")
+        fee_rate = metric_filter("fee_rate")
+        success_rate = metric_filter("success_rate")
+        number_requests = metric_filter("number_requests")
+        number_requests_completed = metric_filter("number_requests_completed")
+        number_requests_rejected = metric_filter("number_requests_rejected")
+        number_requests_no_docs = metric_filter("number_requests_no_docs")
+        number_requests_ack = metric_filter("number_requests_ack")
+        number_requests_resp = metric_filter("number_requests_resp")
+        number_requests_fix = metric_filter("number_requests_fix")
+        number_requests_appeal = metric_filter("number_requests_appeal")
+        number_requests_pay = metric_filter("number_requests_pay")
+        number_requests_partial = metric_filter("number_requests_partial")
+        number_requests_lawsuit = metric_filter("number_requests_lawsuit")
+        number_requests_withdrawn = metric_filter("number_requests_withdrawn")
+
+        order_by_field = "ordering"
+        ordering = django_filters.OrderingFilter(
+            fields=[
+                (field, field)
+                for field in (
+                    "id",
+                    "name",
+                    "slug",
+                    "status",
+                    "exempt",
+                    "requires_proxy",
+                    "jurisdiction",
+                    "website",
+                    "twitter",
+                    "twitter_handles",
+                    "parent",
+                    "appeal_agency",
+                    "url",
+                    "foia_logs",
+                    "foia_guide",
+                    "public_notes",
+                )
+            ]
+            + [("metrics__{}".format(metric), metric) for metric in METRIC_FIELDS]
+        )
 
         class Meta:
             model = Agency
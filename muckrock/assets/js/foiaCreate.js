@@ -393,18 +393,91 @@ $(document).ready(function(){
     agencyWidget.on("change.select2", changeHandler);
   }
 
+  // only the fields which have changed since the last save are sent, and
+  // agencies are sent as the ones to add and remove
+  var autosaveFields = [
+    "title", "requested_docs", "edited_boilerplate", "embargo",
+    "permanent_embargo", "tags", "parent"
+  ];
+
+  function fieldValue(name) {
+    var field = $("form.create-request [name='" + name + "']");
+    if (field.length === 0) {
+      return null;
+    }
+    if (field.is(":checkbox")) {
+      return field.is(":checked") ? "true" : "false";
+    }
+    var value = field.val();
+    return $.isArray(value) ? value.join(",") : value;
+  }
+
+  function currentState() {
+    var state = {agencies: (agencyWidget.val() || []).slice()};
+    autosaveFields.forEach(function(name) {
+      var value = fieldValue(name);
+      if (value !== null) {
+        state[name] = value;
+      }
+    });
+    return state;
+  }
+
+  // when cloning a request, the cloned values have not been saved to the
+  // draft yet, so send all of them with the first save
+  var savedState = fieldValue("parent") ? {agencies: []} : currentState();
+  var saving = false;
+  var saveQueued = false;
+
   function saveToDB() {
     var form = $("form.create-request");
+    if (saving) {
+      // wait for the save in progress, so changes are applied in order
+      saveQueued = true;
+      return;
+    }
+    var state = currentState();
+    var data = {
+      csrfmiddlewaretoken: form.find("[name='csrfmiddlewaretoken']").val()
+    };
+    var changed = false;
+    autosaveFields.forEach(function(name) {
+      if (name in state && state[name] !== savedState[name]) {
+        data[name] = state[name];
+        changed = true;
+      }
+    });
+    var add = state.agencies.filter(function(pk) {
+      return savedState.agencies.indexOf(pk) === -1;
+    });
+    var remove = savedState.agencies.filter(function(pk) {
+      return state.agencies.indexOf(pk) === -1;
+    });
+    if (add.length > 0) {
+      data.agencies_add = add;
+      changed = true;
+    }
+    if (remove.length > 0) {
+      data.agencies_remove = remove;
+      changed = true;
+    }
+    if (!changed) {
+      changeText("Draft Saved");
+      return;
+    }
+    saving = true;
     $.ajax({
       url: "/foi/composer-autosave/" + form.data("composer-pk") + "/",
       type: "POST",
-      data: form.serialize(), // serializes the form's elements.
+      data: data,
+      traditional: true,
       beforeSend: function() {
         // Let them know we are saving
         changeText("Saving Changes...");
       },
       success: function() {
         // Now show them we saved
+        savedState = state;
         changeText("Draft Saved");
         setTimeout(function(){$(".form-status-holder").addClass("hidden");}, 2000);
         if (!saveToDB.autosave_tracked) {
@@ -417,6 +490,13 @@ $(document).ready(function(){
       error: function() {
         // Now show them there was an error
         changeText("Changes Not Saved", true);
+      },
+      complete: function() {
+        saving = false;
+        if (saveQueued) {
+          saveQueued = false;
+          saveToDB();
+        }
       }
     });
   }
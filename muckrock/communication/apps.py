@@ -9,4 +9,9 @@ from django.apps import AppConfig
 class CommunicationConfig(AppConfig):
     """Communication app config"""
 
-    name = "communication"
+    name = "muckrock.communication"
+
+    def ready(self):
+        """Connect the signal handlers"""
+        # pylint: disable=import-outside-toplevel, unused-import
+        import muckrock.communication.signals
@@ -2,19 +2,16 @@
 Custom importers for addresses
 """
 
-# Django
-from django.conf import settings
-
 # Standard Library
 import csv
 import re
 
 # Third Party
-from boto.s3.connection import S3Connection
 from localflavor.us.us_states import STATE_CHOICES
 
 # MuckRock
 from muckrock.communication.models import Address
+from muckrock.core import s3
 
 # columns
 AGENCY_PK = 0
@@ -41,8 +38,7 @@ p_zip = re.compile(r"^\d{5}(?:-\d{4})?$")
 def import_addresses(file_name):
     """Import addresses from spreadsheet"""
     # pylint: disable=too-many-locals
-    conn = S3Connection(settings.AWS_ACCESS_KEY_ID, settings.AWS_SECRET_ACCESS_KEY)
-    bucket = conn.get_bucket("muckrock")
+    bucket = s3.get_bucket("communication.importers", "muckrock")
     key = bucket.get_key(file_name)
     key.get_contents_to_filename("/tmp/tmp.csv")
     with open("/tmp/tmp.csv") as tmp_file:
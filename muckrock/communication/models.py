@@ -13,6 +13,7 @@ from django.template.loader import render_to_string
 from django.urls import reverse
 
 # Standard Library
+from copy import copy
 from datetime import date
 from email.utils import getaddresses, parseaddr
 
@@ -21,12 +22,19 @@ import phonenumbers
 from localflavor.us.models import USStateField, USZipCodeField
 from localflavor.us.us_states import STATE_CHOICES
 from phonenumber_field.modelfields import PhoneNumberField
+from phonenumbers import PhoneNumberFormat
 
 # MuckRock
+from muckrock.core.models import bulk_upsert
+from muckrock.core.utils import RecentCache
 from muckrock.mailgun.models import WhitelistDomain
 
 PHONE_TYPES = (("fax", "Fax"), ("phone", "Phone"))
 
+# addresses resolved recently in this process, so repeated lookups of the same
+# addresses, such as agencies replying to a request, skip the database
+recent_addresses = RecentCache(settings.ADDRESS_CACHE_TIMEOUT)
+
 # Address models
 
 
@@ -40,26 +48,55 @@ class EmailAddressQuerySet(models.QuerySet):
             email = self._normalize_email(email)
         except ValidationError:
             return None
-        email_address, _ = self.update_or_create(email=email, defaults={"name": name})
-        return email_address
+        return self._resolve([(name, email)])[0]
 
     def fetch_many(self, *addresses, **kwargs):
         """Fetch multiple email address objects based on an email header"""
-        name_emails = getaddresses(addresses)
-        addresses = []
-        for name, email in name_emails:
+        return self._resolve(self._parse(addresses, kwargs.get("ignore_errors", True)))
+
+    def fetch_headers(self, *headers):
+        """Fetch the email address objects for each of the email headers at once,
+        returning a list of addresses per header"""
+        groups = [self._parse([header]) for header in headers]
+        resolved = iter(self._resolve([a for group in groups for a in group]))
+        return [[next(resolved) for _ in group] for group in groups]
+
+    def _parse(self, addresses, ignore_errors=True):
+        """Parse and normalize the names and emails from email headers"""
+        name_emails = []
+        for name, email in getaddresses(addresses):
             try:
                 email = self._normalize_email(email)
             except ValidationError:
-                if kwargs.get("ignore_errors", True):
+                if ignore_errors:
                     continue
                 else:
                     raise
-            email_address, _ = self.update_or_create(
-                email=email, defaults={"name": name}
-            )
-            addresses.append(email_address)
-        return addresses
+            name_emails.append((name, email))
+        return name_emails
+
+    def _resolve(self, name_emails):
+        """Get or create the email addresses, updating their names, with at most
+        a single upsert for any which were not resolved recently"""
+        resolved = {}
+        missing = {}
+        for name, email in name_emails:
+            cached = recent_addresses.get(("email", email))
+            if cached is not None and cached.name == name:
+                resolved[email] = copy(cached)
+            else:
+                # if an address is repeated, the last name wins
+                missing[email] = name
+        upserted = bulk_upsert(
+            self,
+            [self.model(email=email, name=name) for email, name in missing.items()],
+            "email",
+            ["name"],
+        )
+        for email_address in upserted:
+            recent_addresses.set(("email", email_address.email), email_address)
+            resolved[email_address.email] = email_address
+        return [resolved[email] for _, email in name_emails]
 
     @staticmethod
     def _normalize_email(email):
@@ -154,10 +191,17 @@ class PhoneNumberQuerySet(models.QuerySet):
             number = phonenumbers.parse(number, "US")
             if not phonenumbers.is_valid_number(number):
                 return None
-            phone, _ = self.update_or_create(number=number, defaults={"type": type_})
-            return phone
         except phonenumbers.NumberParseException:
             return None
+        key = ("phone", phonenumbers.format_number(number, PhoneNumberFormat.E164))
+        cached = recent_addresses.get(key)
+        if cached is not None and cached.type == type_:
+            return copy(cached)
+        (phone,) = bulk_upsert(
+            self, [self.model(number=number, type=type_)], "number", ["type"]
+        )
+        recent_addresses.set(key, phone)
+        return phone
 
 
 class PhoneNumber(models.Model):
@@ -0,0 +1,42 @@
+"""Model signal handlers for the communication application"""
+
+# Django
+from django.db.models.signals import post_delete, post_save
+
+# MuckRock
+from muckrock.communication.models import EmailAddress, PhoneNumber, recent_addresses
+
+# pylint: disable=unused-argument
+
+
+def email_changed(sender, instance, **kwargs):
+    """Do not use a stale copy of a changed email address"""
+    recent_addresses.delete(("email", instance.email))
+
+
+def phone_changed(sender, instance, **kwargs):
+    """Do not use a stale copy of a changed phone number"""
+    if instance.number:
+        recent_addresses.delete(("phone", instance.as_e164))
+
+
+post_save.connect(
+    email_changed,
+    sender=EmailAddress,
+    dispatch_uid="muckrock.communication.signals.email_saved",
+)
+post_delete.connect(
+    email_changed,
+    sender=EmailAddress,
+    dispatch_uid="muckrock.communication.signals.email_deleted",
+)
+post_save.connect(
+    phone_changed,
+    sender=PhoneNumber,
+    dispatch_uid="muckrock.communication.signals.phone_saved",
+)
+post_delete.connect(
+    phone_changed,
+    sender=PhoneNumber,
+    dispatch_uid="muckrock.communication.signals.phone_deleted",
+)
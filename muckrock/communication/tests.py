@@ -11,7 +11,7 @@ from django.test import TestCase
 from nose.tools import assert_false, assert_raises, eq_, ok_
 
 # MuckRock
-from muckrock.communication.models import EmailAddress
+from muckrock.communication.models import EmailAddress, PhoneNumber
 from muckrock.foia.factories import FOIARequestFactory
 from muckrock.mailgun.models import WhitelistDomain
 
@@ -30,6 +30,36 @@ class TestEmailAddress(TestCase):
         with assert_raises(ValidationError):
             EmailAddress.objects.fetch_many("a@a.comn, foobar", ignore_errors=False)
 
+    def test_fetch_upsert(self):
+        """Addresses should be created or renamed with a single query"""
+        existing = EmailAddress.objects.create(email="a@a.com", name="Old")
+        with self.assertNumQueries(1):
+            emails = EmailAddress.objects.fetch_many(
+                '"New" <a@A.com>, b@b.com, "B" <b@b.com>'
+            )
+        eq_([e.email for e in emails], ["a@a.com", "b@b.com", "b@b.com"])
+        eq_(emails[0].pk, existing.pk)
+        eq_(EmailAddress.objects.get(pk=existing.pk).name, "New")
+        eq_(EmailAddress.objects.get(email="b@b.com").name, "B")
+        eq_(emails[1].status, "good")
+
+    def test_fetch_headers(self):
+        """Each header's addresses should be returned separately"""
+        from_, to_, cc_ = EmailAddress.objects.fetch_headers(
+            "a@a.com", "b@b.com, foobar", ""
+        )
+        eq_([e.email for e in from_], ["a@a.com"])
+        eq_([e.email for e in to_], ["b@b.com"])
+        eq_(cc_, [])
+
+    def test_phone_fetch(self):
+        """Phone numbers should be created or updated"""
+        phone = PhoneNumber.objects.fetch("201-555-0123", type_="phone")
+        eq_(phone.type, "phone")
+        eq_(PhoneNumber.objects.fetch("(201) 555-0123").pk, phone.pk)
+        eq_(PhoneNumber.objects.get(pk=phone.pk).type, "fax")
+        ok_(PhoneNumber.objects.fetch("foobar") is None)
+
     def test_allowed(self):
         """Test allowed email function"""
         foia = FOIARequestFactory(
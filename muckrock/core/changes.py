@@ -0,0 +1,222 @@
+"""
+A log of changes, for API consumers to sync from
+
+Every save or delete of a logged object is recorded in the change log, along
+with a change to each of the objects whose API representations include it.
+Consumers read the log for a model from an opaque cursor, getting back the
+objects changed since, in the order they changed, so keeping a copy in sync
+costs time proportional to what changed rather than to the size of the table.
+
+Entries are created once the transaction making the change commits, so a long
+transaction cannot leave an entry behind a cursor which has already passed it.
+Entries are still numbered a moment before they are committed, so the feed
+only returns entries older than `CHANGE_FEED_DELAY` seconds, which need only
+cover the time it takes to insert them.
+
+As entries are written after the change commits, a crash in between loses
+them, so delivery is not guaranteed - consumers should still resync from
+scratch now and then.
+"""
+
+# Django
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils import timezone
+
+# Standard Library
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import timedelta
+
+# Third Party
+from rest_framework import decorators
+from rest_framework.exceptions import ParseError
+from rest_framework.response import Response
+
+# MuckRock
+from muckrock.core.models import ChangeLogEntry
+from muckrock.tags.models import TaggedItemBase
+
+# the logged models, and the paths to the objects which include them
+_registry = {}
+
+
+def register(model, *parents):
+    """Log changes to the model
+
+    `parents` name the paths from the model to the objects whose API
+    representations include it, which are logged as changed along with it
+    """
+    _registry[model] = [path.split("__") for path in parents]
+    label = model._meta.label
+    post_save.connect(
+        _object_saved, sender=model, dispatch_uid="changes.saved.{}".format(label)
+    )
+    post_delete.connect(
+        _object_deleted, sender=model, dispatch_uid="changes.deleted.{}".format(label)
+    )
+    m2m_changed.connect(
+        _tags_changed, sender=TaggedItemBase, dispatch_uid="changes.tags"
+    )
+
+
+def _get_parents(instance):
+    """The objects whose API representations include the instance"""
+    for path in _registry[type(instance)]:
+        obj = instance
+        for attr in path:
+            obj = getattr(obj, attr, None)
+            if obj is None:
+                break
+        else:
+            yield obj
+
+
+def _object_saved(sender, instance, raw=False, **kwargs):
+    """Log saved objects, and their parents"""
+    # pylint: disable=unused-argument
+    if raw:
+        return
+    record(sender, [instance.pk])
+    for parent in _get_parents(instance):
+        record(type(parent), [parent.pk])
+
+
+def _object_deleted(sender, instance, **kwargs):
+    """Log deleted objects, and their parents"""
+    # pylint: disable=unused-argument
+    record(sender, [instance.pk], deleted=True)
+    for parent in _get_parents(instance):
+        record(type(parent), [parent.pk])
+
+
+def _tags_changed(sender, instance, action, model, pk_set, **kwargs):
+    """Log objects whose tags changed"""
+    # pylint: disable=unused-argument
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if type(instance) in _registry:
+        record(type(instance), [instance.pk])
+    if model in _registry and pk_set:
+        record(model, pk_set)
+
+
+def record(model, pks, deleted=False):
+    """Log a change to each of the objects once the current transaction
+    commits - this must be called for changes made with bulk updates, which do
+    not send signals"""
+    content_type = ContentType.objects.get_for_model(model)
+    pks = list(pks)
+
+    def _record():
+        # the entries are created here so that they are timestamped when they
+        # are inserted, not when the change was made
+        ChangeLogEntry.objects.bulk_create(
+            ChangeLogEntry(content_type=content_type, object_id=pk, deleted=deleted)
+            for pk in pks
+        )
+
+    if pks:
+        transaction.on_commit(_record)
+
+
+def prune(batch_size=1000):
+    """Remove entries superseded by a later change to the same object"""
+    superseded = (
+        ChangeLogEntry.objects.annotate(
+            superseded=Exists(
+                ChangeLogEntry.objects.filter(
+                    content_type=OuterRef("content_type"),
+                    object_id=OuterRef("object_id"),
+                    pk__gt=OuterRef("pk"),
+                )
+            )
+        )
+        .filter(superseded=True)
+        .values_list("pk", flat=True)
+    )
+    while True:
+        pks = list(superseded[:batch_size])
+        if not pks:
+            return
+        ChangeLogEntry.objects.filter(pk__in=pks).delete()
+
+
+def encode_cursor(pk):
+    """An opaque cursor for the position after the given entry"""
+    return urlsafe_b64encode(str(pk).encode("ascii")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """The entry a cursor is positioned after, raising a ValueError for
+    invalid cursors"""
+    if not cursor:
+        return 0
+    pk = int(urlsafe_b64decode(cursor.encode("ascii")))
+    if pk < 0:
+        raise ValueError("Negative cursor")
+    return pk
+
+
+def get_changes(model, cursor, limit):
+    """The latest of up to `limit` changes to each object of the model made
+    after the cursor, in the order they were made, along with the position to
+    continue from and whether there may be more changes to read now"""
+    entries = list(
+        ChangeLogEntry.objects.filter(
+            content_type=ContentType.objects.get_for_model(model), pk__gt=cursor
+        ).order_by("pk")[:limit]
+    )
+    more = len(entries) == limit
+    horizon = timezone.now() - timedelta(seconds=settings.CHANGE_FEED_DELAY)
+    for i, entry in enumerate(entries):
+        if entry.datetime > horizon:
+            # stop at the first entry which is too recent, so that no entries
+            # from transactions still being committed are skipped over
+            entries = entries[:i]
+            more = False
+            break
+    latest = {entry.object_id: entry for entry in entries}
+    position = entries[-1].pk if entries else cursor
+    return sorted(latest.values(), key=lambda e: e.pk), position, more
+
+
+class ChangeFeedMixin:
+    """Adds a `changes` action to a viewset, listing the objects changed since
+    a cursor, in the order they changed
+
+    Objects which have been deleted, or which the user may no longer view, are
+    listed as deleted, with only their id
+    """
+
+    @decorators.action(detail=False)
+    def changes(self, request):
+        """The objects changed after the cursor"""
+        try:
+            cursor = decode_cursor(request.query_params.get("cursor"))
+        except ValueError:
+            raise ParseError("Invalid cursor")
+        queryset = self.get_queryset()
+        entries, position, more = get_changes(
+            queryset.model, cursor, settings.CHANGE_FEED_PAGE_SIZE
+        )
+        objects = queryset.in_bulk(
+            [entry.object_id for entry in entries if not entry.deleted]
+        )
+        results = []
+        for entry in entries:
+            if entry.object_id not in objects:
+                results.append({"id": entry.object_id, "deleted": True})
+            else:
+                results.append(
+                    {
+                        "id": entry.object_id,
+                        "deleted": False,
+                        "object": self.get_serializer(objects[entry.object_id]).data,
+                    }
+                )
+        return Response(
+            {"cursor": encode_cursor(position), "more": more, "results": results}
+        )
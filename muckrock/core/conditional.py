@@ -0,0 +1,53 @@
+"""
+Conditional GET support
+
+Views look up a few values which change whenever a resource does, before doing
+any of the work of loading or rendering it.  These make up the ETag, which
+also depends on who is asking, as what each user may see differs, so a client
+whose copy is current may be answered with a 304.
+"""
+
+# Django
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+# Standard Library
+import hashlib
+from calendar import timegm
+
+
+def make_etag(user, *values):
+    """An ETag for the values, as seen by the user"""
+    key = repr((user.pk,) + values).encode("utf8")
+    return quote_etag(hashlib.md5(key).hexdigest())
+
+
+def latest(*datetimes):
+    """The latest of the given datetimes, as a timestamp"""
+    datetimes = [d for d in datetimes if d is not None]
+    if not datetimes:
+        return None
+    return timegm(max(datetimes).utctimetuple())
+
+
+def get_not_modified(request, etag, last_modified=None):
+    """A 304 response if the client's copy is current
+
+    The last modified time does not cover everything the ETag does, such as
+    who is asking or removed files, so it is only used alongside the ETag - a
+    client which only sends If-Modified-Since always gets the full response
+    """
+    if request.method not in ("GET", "HEAD"):
+        return None
+    if "HTTP_IF_NONE_MATCH" not in request.META:
+        last_modified = None
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def set_validators(response, etag, last_modified=None):
+    """Send the validators for the client to make conditional requests with"""
+    if response.status_code in (200, 304):
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+    return response
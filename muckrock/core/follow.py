@@ -0,0 +1,70 @@
+"""
+Indexed lookups of who follows what
+
+actstream's helpers load every follow, and the object it points to, into
+memory.  These work directly off of the follow table's content type and object
+id, so checking or counting followers is a single query no matter how many
+followers an object has.
+"""
+
+# Django
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import IntegerField
+from django.db.models.functions import Cast
+
+# Third Party
+from actstream.models import Follow
+
+
+def follows_of(obj):
+    """All follows of the object"""
+    return Follow.objects.filter(
+        content_type=ContentType.objects.get_for_model(obj),
+        object_id=str(obj.pk),
+        flag="",
+    )
+
+
+def is_following(user, obj):
+    """Is the user following the object"""
+    if not user.is_authenticated:
+        return False
+    return follows_of(obj).filter(user=user).exists()
+
+
+def follower_count(obj):
+    """The number of users following the object"""
+    return follows_of(obj).count()
+
+
+def followers_of(obj):
+    """A queryset of the users following the object"""
+    return User.objects.filter(pk__in=follows_of(obj).values("user_id"))
+
+
+def iter_follower_ids(obj, chunk_size=1000):
+    """Yield the ids of the users following the object, in lists of at most
+    `chunk_size`"""
+    follows = follows_of(obj).order_by("pk")
+    last_pk = 0
+    while True:
+        chunk = list(
+            follows.filter(pk__gt=last_pk).values_list("pk", "user_id")[:chunk_size]
+        )
+        if not chunk:
+            return
+        last_pk = chunk[-1][0]
+        yield [user_id for _, user_id in chunk]
+
+
+def followed_pks(user, model):
+    """A subquery of the primary keys of the objects of the given model the user
+    is following"""
+    return (
+        Follow.objects.filter(
+            user=user, content_type=ContentType.objects.get_for_model(model), flag=""
+        )
+        .annotate(object_pk=Cast("object_id", IntegerField()))
+        .values("object_pk")
+    )
@@ -0,0 +1,39 @@
+"""
+Middleware for the MuckRock site
+"""
+
+# Standard Library
+import time
+
+# MuckRock
+from muckrock.core import page_cache
+from muckrock.core.permissions import permission_cache
+
+
+class PermissionCacheMiddleware:
+    """Share permission data between all permission checks made while
+    handling a single request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with permission_cache():
+            return self.get_response(request)
+
+
+class AnonymousPageCacheMiddleware:
+    """Serve pages which allow it to anonymous visitors from the page cache"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not page_cache.is_cacheable(request):
+            return self.get_response(request)
+        response = page_cache.get(request)
+        if response is None:
+            started = time.time()
+            response = self.get_response(request)
+            page_cache.store(request, response, started)
+        return response
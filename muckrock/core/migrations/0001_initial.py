@@ -0,0 +1,36 @@
+# Django
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="FileDeletion",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("path", models.CharField(max_length=255, unique=True)),
+                (
+                    "invalidate",
+                    models.BooleanField(
+                        default=True,
+                        help_text="Also clear this file from the cloudfront cache",
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("datetime_created", models.DateTimeField(auto_now_add=True)),
+            ],
+        )
+    ]
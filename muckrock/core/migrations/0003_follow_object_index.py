@@ -0,0 +1,21 @@
+# Django
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("actstream", "0001_initial"), ("core", "0002_archivedaction")]
+
+    operations = [
+        # actstream indexes content_type and object_id separately, and its
+        # unique constraint leads with user.  Looking up an object's followers
+        # through those means combining two poor matches - the content type
+        # matches most follows, and the object id matches the follows of
+        # objects of every model with that id - so index them together, to
+        # match the content type and object id filter in core.follow
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS actstream_follow_object "
+            "ON actstream_follow (content_type_id, object_id)",
+            "DROP INDEX IF EXISTS actstream_follow_object",
+        )
+    ]
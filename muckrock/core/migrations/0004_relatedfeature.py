@@ -0,0 +1,49 @@
+# Django
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("core", "0003_follow_object_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RelatedFeature",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("object_id", models.PositiveIntegerField()),
+                ("feature", models.CharField(max_length=50)),
+                ("weight", models.FloatField()),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="contenttypes.ContentType",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="relatedfeature",
+            index=models.Index(
+                fields=["feature", "content_type"], name="core_related_feature"
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="relatedfeature",
+            unique_together={("content_type", "object_id", "feature")},
+        ),
+    ]
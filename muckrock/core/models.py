@@ -3,7 +3,15 @@
 # pylint: disable=abstract-method
 
 # Django
-from django.db.models import Func, IntegerField
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections, models, transaction
+from django.db.models import F, Func, IntegerField
+from django.utils import timezone
+
+# Standard Library
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 # This is in django but does not support intervals until django 2.0
@@ -22,3 +30,349 @@ class NullIf(Func):
     """DB Function NULLIF"""
 
     function = "NULLIF"
+
+
+def bulk_upsert(queryset, objs, unique_field, update_fields):
+    """Insert the unsaved objects in a single statement, updating `update_fields`
+    on any rows which already exist with the same value for `unique_field`
+
+    Returns the saved rows as model instances.  The objects must not contain
+    the same unique value more than once.
+    """
+    # pylint: disable=protected-access
+    if not objs:
+        return []
+    model = queryset.model
+    connection = connections[queryset.db]
+    quote = connection.ops.quote_name
+    fields = [f for f in model._meta.concrete_fields if not f.primary_key]
+    columns = [f.column for f in model._meta.concrete_fields]
+    sql = (
+        "INSERT INTO {table} ({fields}) VALUES {values} "
+        "ON CONFLICT ({unique}) DO UPDATE SET {updates} "
+        "RETURNING {columns}".format(
+            table=quote(model._meta.db_table),
+            fields=", ".join(quote(f.column) for f in fields),
+            values=", ".join(
+                ["({})".format(", ".join(["%s"] * len(fields)))] * len(objs)
+            ),
+            unique=quote(model._meta.get_field(unique_field).column),
+            updates=", ".join(
+                "{0} = EXCLUDED.{0}".format(quote(model._meta.get_field(f).column))
+                for f in update_fields
+            ),
+            columns=", ".join(quote(c) for c in columns),
+        )
+    )
+    params = [
+        f.get_db_prep_save(f.pre_save(obj, True), connection)
+        for obj in objs
+        for f in fields
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    field_names = [f.attname for f in model._meta.concrete_fields]
+    return [
+        model.from_db(
+            queryset.db,
+            field_names,
+            [
+                _from_db_value(connection, f, value)
+                for f, value in zip(model._meta.concrete_fields, row)
+            ],
+        )
+        for row in rows
+    ]
+
+
+def _from_db_value(connection, field, value):
+    """Convert a raw database value to its python value"""
+    for converter in field.get_db_converters(connection):
+        value = converter(value, field, connection)
+    return value
+
+
+def archive_rows(queryset, archive_model, batch_size=1000):
+    """Move the rows selected by the queryset into the archive model's table
+
+    The archive model holds a copy of each of the source model's columns it
+    declares, under the same names, plus a `datetime_archived` column.  Each
+    batch is deleted and inserted by a single statement, so rows are never lost
+    or duplicated - a row which was already archived is overwritten with its
+    latest copy.  Returns the number of rows archived.
+    """
+    # pylint: disable=protected-access
+    model = queryset.model
+    connection = connections[queryset.db]
+    quote = connection.ops.quote_name
+    archived = quote(archive_model._meta.get_field("datetime_archived").column)
+    columns = ", ".join(
+        quote(f.column)
+        for f in archive_model._meta.concrete_fields
+        if f.name != "datetime_archived"
+    )
+    updates = ", ".join(
+        "{0} = EXCLUDED.{0}".format(quote(f.column))
+        for f in archive_model._meta.concrete_fields
+        if not f.primary_key
+    )
+    total = 0
+    while True:
+        with transaction.atomic(using=queryset.db):
+            select_sql, select_params = (
+                queryset.select_for_update(skip_locked=True)
+                .order_by("pk")
+                .values("pk")[:batch_size]
+                .query.sql_with_params()
+            )
+            sql = (
+                "WITH moved AS (DELETE FROM {table} WHERE {pk} IN ({select}) "
+                "RETURNING {columns}) "
+                "INSERT INTO {archive} ({columns}, {archived}) "
+                "SELECT {columns}, %s FROM moved "
+                "ON CONFLICT ({archive_pk}) DO UPDATE SET {updates}".format(
+                    table=quote(model._meta.db_table),
+                    pk=quote(model._meta.pk.column),
+                    select=select_sql,
+                    columns=columns,
+                    archive=quote(archive_model._meta.db_table),
+                    archived=archived,
+                    archive_pk=quote(archive_model._meta.pk.column),
+                    updates=updates,
+                )
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(sql, select_params + (timezone.now(),))
+                count = cursor.rowcount
+        total += count
+        # a short batch may only mean other rows were locked, so keep going
+        # until there is nothing left to move
+        if not count:
+            return total
+
+
+class FieldChangeMixin:
+    """Remember the values of `tracked_fields` as they were loaded from, or last
+    saved to, the database, so changes to them may be detected without querying
+    for the saved instance"""
+
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Snapshot the tracked fields on load"""
+        instance = super().from_db(db, field_names, values)
+        instance.snapshot_fields()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        """Snapshot the refreshed fields"""
+        super().refresh_from_db(using=using, fields=fields)
+        self.snapshot_fields(fields)
+
+    def save(self, *args, **kwargs):
+        """Snapshot the saved fields, after any save signals have been sent"""
+        # pylint: disable=signature-differs
+        super().save(*args, **kwargs)
+        self.snapshot_fields(kwargs.get("update_fields"))
+
+    def _tracked_attname(self, field):
+        """Values are stored by attribute name, so foreign keys are tracked by id"""
+        return self._meta.get_field(field).attname
+
+    def snapshot_fields(self, fields=None):
+        """Record the current value of the tracked fields, or only the given
+        fields if they are tracked"""
+        if fields is None or getattr(self, "_saved_values", None) is None:
+            self._saved_values = {}
+            fields = self.tracked_fields
+        for field in fields:
+            if field not in self.tracked_fields:
+                continue
+            attname = self._tracked_attname(field)
+            # deferred fields are not loaded, so there is nothing to record
+            if attname in self.__dict__:
+                self._saved_values[attname] = self.__dict__[attname]
+
+    def has_changed(self, field):
+        """Has this tracked field changed since it was loaded or saved?
+
+        Unsaved instances, and fields which were deferred on load but have since
+        been set, are always considered changed
+        """
+        saved_values = getattr(self, "_saved_values", None)
+        if saved_values is None:
+            return True
+        attname = self._tracked_attname(field)
+        if attname not in saved_values:
+            return attname in self.__dict__
+        return self.__dict__.get(attname) != saved_values[attname]
+
+    def saved_value(self, field):
+        """The value of this tracked field as it was loaded or saved, or None if
+        it is unknown"""
+        saved_values = getattr(self, "_saved_values", None) or {}
+        return saved_values.get(self._tracked_attname(field))
+
+    def changed_fields(self):
+        """All of the tracked fields which have changed"""
+        return [f for f in self.tracked_fields if self.has_changed(f)]
+
+
+class FileDeletionQuerySet(models.QuerySet):
+    """Object manager for queued file deletions"""
+
+    def enqueue(self, paths, invalidate=True):
+        """Queue files to be deleted from S3, and optionally cleared from the
+        cloudfront cache"""
+        self.bulk_create(
+            [
+                self.model(path=path, invalidate=invalidate)
+                for path in set(paths)
+                if path
+            ],
+            ignore_conflicts=True,
+        )
+
+    def flush(self, bucket=None, batch_size=1000):
+        """Delete a batch of queued files with a single multi-object delete, and
+        clear them from cloudfront with a single invalidation
+
+        Returns the number of files processed.  The default batch size is the
+        most S3 will delete in one request.
+        """
+        # pylint: disable=import-outside-toplevel
+        from muckrock.core.utils import clear_cloudfront_cache, get_s3_storage_bucket
+
+        with transaction.atomic():
+            deletions = list(
+                self.select_for_update(skip_locked=True).order_by("pk")[:batch_size]
+            )
+            if not deletions:
+                return 0
+            if bucket is None:
+                bucket = get_s3_storage_bucket("core.models.FileDeletion")
+            result = bucket.delete_keys([d.path for d in deletions], quiet=True)
+            failed = {error.key for error in result.errors}
+            if failed:
+                logger.warning("Failed to delete %d files from S3", len(failed))
+            clear_cloudfront_cache(
+                [d.path for d in deletions if d.invalidate and d.path not in failed]
+            )
+            # failures are retried on the next flush, up to a limit
+            done_pks = [d.pk for d in deletions if d.path not in failed]
+            failed_pks = [d.pk for d in deletions if d.path in failed]
+            self.filter(pk__in=done_pks).delete()
+            self.filter(pk__in=failed_pks).update(attempts=F("attempts") + 1)
+            self.filter(
+                pk__in=failed_pks, attempts__gte=self.model.MAX_ATTEMPTS
+            ).delete()
+        return len(deletions)
+
+
+class FileDeletion(models.Model):
+    """A file waiting to be deleted from S3
+
+    Deletions are queued and flushed periodically in batches, instead of
+    making several API calls for each file as it is deleted
+    """
+
+    MAX_ATTEMPTS = 5
+
+    path = models.CharField(max_length=255, unique=True)
+    invalidate = models.BooleanField(
+        default=True, help_text="Also clear this file from the cloudfront cache"
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    datetime_created = models.DateTimeField(auto_now_add=True)
+
+    objects = FileDeletionQuerySet.as_manager()
+
+    def __str__(self):
+        return self.path
+
+
+class ArchivedAction(models.Model):
+    """An activity stream action which has been moved out of the live table
+
+    Old actions are archived by a periodic task once no notifications refer to
+    them, keeping the live table small for the queries run on every page
+    """
+
+    id = models.IntegerField(primary_key=True)
+    actor_content_type = models.ForeignKey(
+        ContentType, on_delete=models.CASCADE, related_name="+"
+    )
+    actor_object_id = models.CharField(max_length=255)
+    verb = models.CharField(max_length=255)
+    description = models.TextField(blank=True, null=True)
+    target_content_type = models.ForeignKey(
+        ContentType, on_delete=models.CASCADE, related_name="+", blank=True, null=True
+    )
+    target_object_id = models.CharField(max_length=255, blank=True, null=True)
+    action_object_content_type = models.ForeignKey(
+        ContentType, on_delete=models.CASCADE, related_name="+", blank=True, null=True
+    )
+    action_object_object_id = models.CharField(max_length=255, blank=True, null=True)
+    timestamp = models.DateTimeField(db_index=True)
+    public = models.BooleanField(default=True)
+    datetime_archived = models.DateTimeField()
+
+    def __str__(self):
+        return "{} {}".format(self.actor_object_id, self.verb)
+
+
+class RelatedFeature(models.Model):
+    """A feature of an object in the related content index, such as one of its
+    tags or the user who made it
+
+    Objects sharing features are related, more so the rarer the features they
+    share are, which is reflected in the feature's weight
+    """
+
+    content_type = models.ForeignKey(
+        ContentType, on_delete=models.CASCADE, related_name="+"
+    )
+    object_id = models.PositiveIntegerField()
+    feature = models.CharField(max_length=50)
+    weight = models.FloatField()
+
+    def __str__(self):
+        return "{} {}: {}".format(self.content_type, self.object_id, self.feature)
+
+    class Meta:
+        # the unique index also serves lookups of an object's features
+        unique_together = ("content_type", "object_id", "feature")
+        indexes = [
+            models.Index(
+                fields=["feature", "content_type"], name="core_related_feature"
+            )
+        ]
+
+
+class ChangeLogEntry(models.Model):
+    """A change to an object, for API consumers to sync from
+
+    Entries in order of their ids are the changes in the order they were made.
+    Entries superseded by a later change to the same object are pruned.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    content_type = models.ForeignKey(
+        ContentType, on_delete=models.CASCADE, related_name="+"
+    )
+    object_id = models.PositiveIntegerField()
+    deleted = models.BooleanField(default=False)
+    datetime = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return "{} {}: {}".format(self.content_type, self.object_id, self.datetime)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["content_type", "id"], name="core_changelog_feed"),
+            models.Index(
+                fields=["content_type", "object_id"], name="core_changelog_object"
+            ),
+        ]
@@ -0,0 +1,210 @@
+"""
+A full page cache for anonymous visitors
+
+Pages opt in by tagging their responses with surrogate keys naming the objects
+shown on them.  Responses to anonymous GETs of tagged pages are kept in the
+cache, and the keys are also sent to any CDN in front of the site.  Purging an
+object records the time it changed, and a cached page is stale once any of
+the objects on it have changed since it started rendering.
+
+Saved objects purge their own pages.  Registered models also purge the pages
+showing them when they are deleted or their tags or other many to many
+relations change.
+
+CSRF tokens on cached pages are replaced with a fresh token for each visitor.
+"""
+
+# Django
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_cache_control
+
+# Standard Library
+import hashlib
+import re
+import time
+
+# MuckRock
+from muckrock.tags.models import TaggedItemBase
+
+PAGE_KEY = "page_cache:page:{}"
+PURGE_KEY = "page_cache:purge:{}"
+
+CSRF_PLACEHOLDER = b"__page_cache_csrf_token__"
+CSRF_TOKEN_RE = re.compile(
+    rb"(name=\"csrfmiddlewaretoken\" value=\"|'X-CSRFToken': ')[a-zA-Z0-9]+"
+)
+
+# the registered models, and the paths to the other objects whose pages show
+# them
+_registry = {}
+
+
+def surrogate_key(obj):
+    """The surrogate key for an object"""
+    return _surrogate_key(type(obj), obj.pk)
+
+
+def _surrogate_key(model, pk):
+    """The surrogate key for the object of the model with the given pk"""
+    return "{}-{}".format(model._meta.model_name, pk)
+
+
+def tag(response, *objs):
+    """Allow the response to be cached for anonymous visitors until any of the
+    objects change"""
+    response.surrogate_keys = getattr(response, "surrogate_keys", []) + [
+        surrogate_key(obj) for obj in objs if obj is not None
+    ]
+    return response
+
+
+def purge(*objs):
+    """Purge the cached pages showing any of the objects, once the current
+    transaction commits"""
+    _purge_keys(
+        surrogate_key(obj) for obj in objs if obj is not None and obj.pk is not None
+    )
+
+
+def purge_pks(model, pks):
+    """Purge the cached pages showing any of the model's objects with the given
+    pks, once the current transaction commits - this must be called for changes
+    made with bulk updates, which do not send signals"""
+    _purge_keys(_surrogate_key(model, pk) for pk in pks)
+
+
+def _purge_keys(surrogate_keys):
+    """Purge the cached pages tagged with any of the surrogate keys, once the
+    current transaction commits"""
+    keys = [PURGE_KEY.format(key) for key in surrogate_keys]
+
+    def _purge():
+        now = time.time()
+        cache.set_many({key: now for key in keys}, settings.PAGE_CACHE_TIMEOUT)
+
+    if keys and settings.PAGE_CACHE_TIMEOUT > 0:
+        transaction.on_commit(_purge)
+
+
+def register(model, *parents):
+    """Purge the pages showing the model's objects when they are deleted or
+    their many to many relations change
+
+    `parents` name the paths from the model to the other objects whose pages
+    show it, which are purged along with it when it is deleted
+    """
+    _registry[model] = [path.split("__") for path in parents]
+    label = model._meta.label
+    post_delete.connect(
+        _object_deleted,
+        sender=model,
+        dispatch_uid="page_cache.deleted.{}".format(label),
+    )
+    throughs = [TaggedItemBase] + [
+        getattr(field.remote_field, "through", None)
+        for field in model._meta.many_to_many
+    ]
+    for through in throughs:
+        if through is not None:
+            m2m_changed.connect(
+                _relations_changed,
+                sender=through,
+                dispatch_uid="page_cache.m2m.{}".format(through._meta.label),
+            )
+
+
+def _get_parents(instance):
+    """The other objects whose pages show the instance"""
+    for path in _registry[type(instance)]:
+        obj = instance
+        for attr in path:
+            # the parent may already be gone if it is being deleted too
+            obj = getattr(obj, attr, None)
+            if obj is None:
+                break
+        else:
+            yield obj
+
+
+def _object_deleted(sender, instance, **kwargs):
+    """Purge the pages showing deleted objects"""
+    # pylint: disable=unused-argument
+    purge(instance, *_get_parents(instance))
+
+
+def _relations_changed(sender, instance, action, model, pk_set, **kwargs):
+    """Purge the pages of the objects on both sides of a changed relation"""
+    # pylint: disable=unused-argument
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if type(instance) in _registry:
+        purge(instance)
+    if model in _registry and pk_set:
+        purge_pks(model, pk_set)
+
+
+def is_cacheable(request):
+    """Could the response to this request be served from the cache - only GETs
+    from visitors without a session are"""
+    return (
+        settings.PAGE_CACHE_TIMEOUT > 0
+        and request.method == "GET"
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+    )
+
+
+def _page_key(request):
+    """The cache key for the page"""
+    url = request.build_absolute_uri().encode("utf8")
+    return PAGE_KEY.format(hashlib.md5(url).hexdigest())
+
+
+def get(request):
+    """The cached response for the request, if there is a fresh one"""
+    cached = cache.get(_page_key(request))
+    if cached is None:
+        return None
+    started, keys, response = cached
+    purges = cache.get_many([PURGE_KEY.format(key) for key in keys])
+    if any(purged >= started for purged in purges.values()):
+        return None
+    response.content = response.content.replace(
+        CSRF_PLACEHOLDER, get_token(request).encode("ascii")
+    )
+    return response
+
+
+def store(request, response, started):
+    """Cache the response, if it is a tagged page which is the same for every
+    anonymous visitor"""
+    keys = getattr(response, "surrogate_keys", None)
+    session = getattr(request, "session", None)
+    if (
+        not keys
+        or response.status_code != 200
+        or response.streaming
+        or response.cookies
+        or (session is not None and session.modified)
+        or "private" in response.get("Cache-Control", "")
+        or "no-store" in response.get("Cache-Control", "")
+    ):
+        return
+    response["Surrogate-Key"] = " ".join(keys)
+    response["Cache-Tag"] = ",".join(keys)
+    if settings.PAGE_CACHE_CDN_TIMEOUT > 0:
+        patch_cache_control(
+            response, public=True, max_age=0, s_maxage=settings.PAGE_CACHE_CDN_TIMEOUT
+        )
+    cached = HttpResponse(
+        CSRF_TOKEN_RE.sub(rb"\g<1>" + CSRF_PLACEHOLDER, response.content),
+        status=response.status_code,
+    )
+    for header, value in response.items():
+        if header not in ("Content-Length", "Set-Cookie"):
+            cached[header] = value
+    cache.set(_page_key(request), (started, keys, cached), settings.PAGE_CACHE_TIMEOUT)
@@ -0,0 +1,45 @@
+"""
+Request scoped caching for permission checks
+
+Rendering a single page may check many permissions on the same objects for the
+same user, and each rules predicate would otherwise query for the data it needs
+every time it is evaluated.  While a permission cache is active, predicates may
+store that data so it is only loaded once.  The cache is activated for the
+duration of each HTTP request by PermissionCacheMiddleware, and is inactive
+everywhere else, so long running tasks never see stale permissions.
+"""
+
+# Standard Library
+import threading
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+@contextmanager
+def permission_cache():
+    """Cache permission data for the duration of the block"""
+    previous = getattr(_local, "cache", None)
+    _local.cache = {}
+    try:
+        yield
+    finally:
+        _local.cache = previous
+
+
+def clear_permission_cache():
+    """Clear the active permission cache, after the data it holds has changed"""
+    cache = getattr(_local, "cache", None)
+    if cache is not None:
+        cache.clear()
+
+
+def cached_permission_data(key, func):
+    """Return the value for key from the active permission cache, calling func to
+    load it if it is not cached yet, or if there is no active cache"""
+    cache = getattr(_local, "cache", None)
+    if cache is None:
+        return func()
+    if key not in cache:
+        cache[key] = func()
+    return cache[key]
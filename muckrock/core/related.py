@@ -0,0 +1,218 @@
+"""
+An index of related content
+
+Each indexed object is reduced to a set of features - its tags, the users who
+made it, and the projects it is in.  Suggestions are the objects sharing the
+most features with a given object, where rarer features count for more, found
+with a single grouped query over the index instead of joining the tag, user and
+project tables of every candidate.
+
+Objects are reindexed in the background as they are created, tagged or have
+their users or projects changed, and the whole index is rebuilt, and its
+weights recomputed, nightly.
+"""
+
+# Django
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+# Standard Library
+import math
+from collections import defaultdict
+
+# MuckRock
+from muckrock.core.models import RelatedFeature
+from muckrock.tags.models import TaggedItemBase
+
+# how much a shared feature of each kind counts towards relatedness, before
+# adjusting for how common the feature is
+FEATURE_WEIGHTS = {"tag": 1.0, "user": 1.0, "project": 2.0}
+
+# the indexed models, and the paths to their users and projects
+_registry = {}
+
+
+def register(model, **paths):
+    """Index the model
+
+    `user` and `project` name the paths from the model to its users and
+    projects, if it has them
+    """
+    _registry[model] = paths
+    label = model._meta.label
+    post_save.connect(
+        _object_saved, sender=model, dispatch_uid="related.saved.{}".format(label)
+    )
+    post_delete.connect(
+        _object_deleted, sender=model, dispatch_uid="related.deleted.{}".format(label)
+    )
+    m2m_changed.connect(
+        _relations_changed, sender=TaggedItemBase, dispatch_uid="related.tags"
+    )
+    for path in paths.values():
+        through = getattr(getattr(model, path, None), "through", None)
+        if through is not None:
+            m2m_changed.connect(
+                _relations_changed,
+                sender=through,
+                dispatch_uid="related.m2m.{}".format(through._meta.label),
+            )
+
+
+def _queue_refresh(model, pks):
+    """Reindex the objects once the current transaction commits"""
+    # pylint: disable=import-outside-toplevel
+    from muckrock.core.tasks import refresh_related
+
+    label = model._meta.label
+    pks = list(pks)
+    transaction.on_commit(lambda: refresh_related.delay(label, pks))
+
+
+def _object_saved(sender, instance, created, **kwargs):
+    """Index new objects - later changes to their features are all made through
+    many to many relations"""
+    # pylint: disable=unused-argument
+    if created:
+        _queue_refresh(sender, [instance.pk])
+
+
+def _object_deleted(sender, instance, **kwargs):
+    """Remove deleted objects from the index"""
+    # pylint: disable=unused-argument
+    _queue_refresh(sender, [instance.pk])
+
+
+def _relations_changed(sender, instance, action, model, pk_set, **kwargs):
+    """Reindex the objects on both sides of a changed relation"""
+    # pylint: disable=unused-argument
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if type(instance) in _registry:
+        _queue_refresh(type(instance), [instance.pk])
+    if model in _registry and pk_set:
+        _queue_refresh(model, pk_set)
+
+
+def _weight(feature, count):
+    """The weight of a feature shared by `count` objects"""
+    kind = feature.split(":", 1)[0]
+    return FEATURE_WEIGHTS[kind] / math.log(1 + count)
+
+
+def _get_features(model, pks):
+    """The features of each of the objects, as (pk, feature) pairs"""
+    content_type = ContentType.objects.get_for_model(model)
+    objects = model.objects.filter(pk__in=pks)
+    existing = set(objects.values_list("pk", flat=True))
+    features = {
+        (pk, "tag:{}".format(tag_id))
+        for pk, tag_id in TaggedItemBase.objects.filter(
+            content_type=content_type, object_id__in=existing
+        ).values_list("object_id", "tag_id")
+    }
+    for kind, path in _registry[model].items():
+        features.update(
+            (pk, "{}:{}".format(kind, value))
+            for pk, value in objects.exclude(**{path: None}).values_list("pk", path)
+        )
+    return features
+
+
+@transaction.atomic
+def refresh(model, pks):
+    """Reindex the objects, removing any which no longer exist"""
+    content_type = ContentType.objects.get_for_model(model)
+    RelatedFeature.objects.filter(content_type=content_type, object_id__in=pks).delete()
+    features = _get_features(model, pks)
+    counts = dict(
+        RelatedFeature.objects.filter(feature__in={f for _, f in features})
+        .values_list("feature")
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+    RelatedFeature.objects.bulk_create(
+        (
+            RelatedFeature(
+                content_type=content_type,
+                object_id=pk,
+                feature=feature,
+                weight=_weight(feature, counts.get(feature, 0) + 1),
+            )
+            for pk, feature in features
+        ),
+        # the same object may be reindexed concurrently, in which case its
+        # features are the same either way
+        ignore_conflicts=True,
+    )
+
+
+def reweight(batch_size=1000):
+    """Recompute the weight of every feature from how many objects share it"""
+    weights = defaultdict(list)
+    counts = (
+        RelatedFeature.objects.values_list("feature")
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+    for feature, count in counts.iterator():
+        weights[_weight(feature, count)].append(feature)
+    for weight, features in weights.items():
+        for i in range(0, len(features), batch_size):
+            RelatedFeature.objects.filter(
+                feature__in=features[i : i + batch_size]
+            ).exclude(weight=weight).update(weight=weight)
+
+
+def rebuild(batch_size=1000):
+    """Reindex every object"""
+    for model in _registry:
+        content_type = ContentType.objects.get_for_model(model)
+        RelatedFeature.objects.filter(content_type=content_type).exclude(
+            object_id__in=model.objects.values("pk")
+        ).delete()
+        pks = model.objects.order_by("pk").values_list("pk", flat=True)
+        last_pk = 0
+        while True:
+            chunk = list(pks.filter(pk__gt=last_pk)[:batch_size])
+            if not chunk:
+                break
+            last_pk = chunk[-1]
+            refresh(model, chunk)
+    reweight(batch_size)
+
+
+def suggest(obj, queryset, count, require=()):
+    """The objects from the queryset most related to the given object, most
+    related first
+
+    `require` lists kinds of features, such as "tag" or "user", of which every
+    suggestion must share at least one with the object
+    """
+    source = RelatedFeature.objects.filter(
+        content_type=ContentType.objects.get_for_model(obj), object_id=obj.pk
+    ).values("feature")
+    candidates = RelatedFeature.objects.filter(
+        content_type=ContentType.objects.get_for_model(queryset.model),
+        feature__in=source,
+        object_id__in=queryset.values("pk"),
+    )
+    if isinstance(obj, queryset.model):
+        candidates = candidates.exclude(object_id=obj.pk)
+    matches = {
+        "{}_matches".format(kind): Count(
+            "pk", filter=Q(feature__startswith="{}:".format(kind))
+        )
+        for kind in require
+    }
+    candidates = (
+        candidates.values("object_id")
+        .annotate(score=Sum("weight"), **matches)
+        .filter(**{"{}__gt".format(match): 0 for match in matches})
+        .order_by("-score", "-object_id")
+    )
+    pks = [c["object_id"] for c in candidates[:count]]
+    objects = queryset.in_bulk(pks)
+    return [objects[pk] for pk in pks if pk in objects]
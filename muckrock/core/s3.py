@@ -0,0 +1,193 @@
+"""
+A shared pool of S3 connections
+
+Connections are kept open and reused across tasks, instead of being set up on
+every call.  Each boto connection is used by only one thread, as they are not
+thread safe, while boto3 clients are shared by all threads.  Both are tagged
+with the name of the code using them, so request counts and latency may be
+tracked per caller.
+"""
+
+# Django
+from django.conf import settings
+
+# Standard Library
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Third Party
+import boto3
+from boto.s3.connection import S3Connection
+from scout_apm.api import instrument
+
+logger = logging.getLogger(__name__)
+
+
+class StorageMetrics:
+    """Request counts and latency for each caller of the pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def record(self, caller, seconds, error=False):
+        """Record a single request"""
+        with self._lock:
+            metrics = self._metrics.setdefault(
+                caller, {"requests": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0}
+            )
+            metrics["requests"] += 1
+            metrics["errors"] += int(error)
+            metrics["seconds"] += seconds
+            metrics["max_seconds"] = max(metrics["max_seconds"], seconds)
+
+    def get(self):
+        """A snapshot of the metrics so far, by caller"""
+        with self._lock:
+            return {caller: dict(metrics) for caller, metrics in self._metrics.items()}
+
+    def reset(self):
+        """Clear all metrics"""
+        with self._lock:
+            self._metrics = {}
+
+
+metrics = StorageMetrics()
+
+
+class PooledS3Connection(S3Connection):
+    """An S3 connection which records metrics for every request"""
+
+    def __init__(self, caller, *args, **kwargs):
+        self.caller = caller
+        super().__init__(*args, **kwargs)
+
+    def make_request(self, method, *args, **kwargs):
+        # pylint: disable=arguments-differ
+        start = time.monotonic()
+        error = True
+        try:
+            with self._instrument(method):
+                response = super().make_request(method, *args, **kwargs)
+            error = response.status >= 400
+            return response
+        finally:
+            seconds = time.monotonic() - start
+            metrics.record(self.caller, seconds, error)
+            logger.debug("[S3] %s %s %.3fs", self.caller, method, seconds)
+
+    @contextmanager
+    def _instrument(self, method):
+        """Time the request in the APM, if it is in use"""
+        if settings.USE_SCOUT:
+            with instrument("S3/{}".format(method), tags={"caller": self.caller}):
+                yield
+        else:
+            yield
+
+
+def _before_call(context, **kwargs):
+    """Start timing a boto3 request"""
+    # pylint: disable=unused-argument
+    context["s3_pool_start"] = time.monotonic()
+
+
+def _after_call(caller):
+    """Record a finished boto3 request for the given caller"""
+
+    def handler(http_response, context, **kwargs):
+        # pylint: disable=unused-argument
+        start = context.pop("s3_pool_start", None)
+        if start is not None:
+            seconds = time.monotonic() - start
+            metrics.record(caller, seconds, http_response.status_code >= 400)
+
+    return handler
+
+
+class S3Pool:
+    """Hands out connections and bucket handles, creating each once per thread
+    and caller, and boto3 clients, creating each once per caller"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._validated = set()
+        self._clients = {}
+        self._clients_pid = None
+
+    def _get_local(self):
+        """Per thread state, discarded after a fork, as open connections may not
+        be shared between processes"""
+        if getattr(self._local, "pid", None) != os.getpid():
+            self._local.pid = os.getpid()
+            self._local.connections = {}
+            self._local.buckets = {}
+        return self._local
+
+    def get_connection(self, caller):
+        """Get the connection for the given caller"""
+        local = self._get_local()
+        if caller not in local.connections:
+            local.connections[caller] = PooledS3Connection(
+                caller, settings.AWS_ACCESS_KEY_ID, settings.AWS_SECRET_ACCESS_KEY
+            )
+        return local.connections[caller]
+
+    def get_bucket(self, name, caller):
+        """Get a bucket handle for the given caller
+
+        Each bucket is checked to exist only the first time it is used in this
+        process, instead of on every call
+        """
+        local = self._get_local()
+        key = (caller, name)
+        if key not in local.buckets:
+            with self._lock:
+                validate = name not in self._validated
+            bucket = self.get_connection(caller).get_bucket(name, validate=validate)
+            with self._lock:
+                self._validated.add(name)
+            local.buckets[key] = bucket
+        return local.buckets[key]
+
+    def get_client(self, caller):
+        """Get the boto3 client for the given caller"""
+        with self._lock:
+            if self._clients_pid != os.getpid():
+                self._clients_pid = os.getpid()
+                self._clients = {}
+            if caller not in self._clients:
+                client = boto3.client(
+                    "s3",
+                    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                )
+                client.meta.events.register("before-call.s3", _before_call)
+                client.meta.events.register("after-call.s3", _after_call(caller))
+                self._clients[caller] = client
+            return self._clients[caller]
+
+
+pool = S3Pool()
+
+
+def get_bucket(caller, name=None):
+    """Get a pooled handle to an S3 bucket, defaulting to the storage bucket
+
+    `caller` names the code using the bucket, for metrics
+    """
+    if name is None:
+        name = settings.AWS_STORAGE_BUCKET_NAME
+    return pool.get_bucket(name, caller)
+
+
+def get_client(caller):
+    """Get a pooled boto3 S3 client
+
+    `caller` names the code using the client, for metrics
+    """
+    return pool.get_client(caller)
@@ -1,10 +1,46 @@
 """
-Sitemap for flatpages
+Sitemaps for the site
+
+Large sitemaps are expensive to serve live, as each page is an OFFSET query.
+Instead, SitemapBuilder periodically writes every section to storage as gzipped
+shards, each holding the items within a fixed range of primary keys, along with
+a sitemap index, and those files are served directly.
+
+A section's sitemap may list the fields its URLs are built from in
+`digest_fields`.  The database then digests each shard's primary keys and those
+fields, and incremental builds only rewrite the shards whose digest changed, so
+items which were added, removed, embargoed or renamed are picked up without
+relying on any timestamp.
 """
 
 # Django
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
 from django.contrib.sitemaps import Sitemap
 from django.contrib.sites.models import Site
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import F, Func, TextField, Value
+from django.db.models.functions import Cast, Concat
+from django.urls import reverse
+from django.utils import timezone
+
+# Standard Library
+import gzip
+import json
+import logging
+from datetime import date, datetime
+from xml.sax.saxutils import escape
+
+logger = logging.getLogger(__name__)
+
+# directory in storage the sitemap files are written to
+SITEMAP_DIR = "sitemaps"
+SITEMAP_INDEX = "{}/sitemap.xml".format(SITEMAP_DIR)
+SITEMAP_MANIFEST = "{}/manifest.json".format(SITEMAP_DIR)
+# the range of primary keys covered by each shard, which bounds its size well
+# below the 50,000 URLs allowed in a single sitemap
+SITEMAP_SHARD_SIZE = 10000
 
 
 class FlatPageSitemap(Sitemap):
@@ -14,3 +50,228 @@ class FlatPageSitemap(Sitemap):
         """Return all flatpages"""
         site = Site.objects.get(domain="www.muckrock.com")
         return site.flatpage_set.filter(registration_required=False)
+
+
+def get_sitemaps():
+    """All of the sitemap sections for the site"""
+    # pylint: disable=import-outside-toplevel
+    from muckrock.agency.sitemap import AgencySitemap
+    from muckrock.foia.sitemap import FoiaSitemap
+    from muckrock.jurisdiction.sitemap import JurisdictionSitemap
+    from muckrock.news.sitemap import ArticleSitemap
+    from muckrock.project.sitemap import ProjectSitemap
+    from muckrock.qanda.sitemap import QuestionSitemap
+
+    return {
+        "FOIA": FoiaSitemap,
+        "News": ArticleSitemap,
+        "Agency": AgencySitemap,
+        "Jurisdiction": JurisdictionSitemap,
+        "Question": QuestionSitemap,
+        "Project": ProjectSitemap,
+        "Flatpages": FlatPageSitemap,
+    }
+
+
+def shard_path(section, shard):
+    """The storage path for a sitemap shard"""
+    return "{}/sitemap-{}-{}.xml.gz".format(SITEMAP_DIR, section, shard)
+
+
+def format_lastmod(lastmod):
+    """Format a last modified date for a sitemap"""
+    if isinstance(lastmod, datetime):
+        return lastmod.date().isoformat()
+    elif isinstance(lastmod, date):
+        return lastmod.isoformat()
+    return None
+
+
+def index_content(urls):
+    """The contents of a sitemap index listing the given shards, as pairs of
+    their URL and last modified date"""
+    sitemaps = [
+        "<sitemap><loc>{}</loc><lastmod>{}</lastmod></sitemap>".format(
+            escape(url), lastmod
+        )
+        for url, lastmod in urls
+    ]
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        "{}\n</sitemapindex>\n".format("\n".join(sitemaps))
+    )
+
+
+class MD5(Func):
+    """The MD5 hash of a string, as hex"""
+
+    function = "MD5"
+    output_field = TextField()
+
+
+def get_digests(sitemap, queryset):
+    """A digest of each shard's items, from their primary keys and the fields
+    listed in the sitemap's `digest_fields`, or None if it does not list any"""
+    fields = getattr(sitemap, "digest_fields", ())
+    if not fields:
+        return None
+    parts = [Cast("pk", TextField())]
+    for field in fields:
+        parts.extend([Value("|"), Cast(field, TextField())])
+    digests = (
+        queryset.order_by()
+        .annotate(shard=F("pk") / SITEMAP_SHARD_SIZE)
+        .values("shard")
+        .annotate(
+            digest=MD5(
+                StringAgg(Concat(*parts, output_field=TextField()), ",", ordering="pk")
+            )
+        )
+        .values_list("shard", "digest")
+    )
+    return {str(shard): digest for shard, digest in digests}
+
+
+class SitemapBuilder:
+    """Write the sitemaps to storage
+
+    Sections whose sitemap lists `digest_fields` are updated incrementally,
+    rewriting only the shards whose digest changed since the last build.
+    All other sections, and all sections on a full build, are rewritten in a
+    single pass over their primary keys.
+    """
+
+    def __init__(self, full=False):
+        self.full = full
+        self.sitemaps = get_sitemaps()
+        self.manifest = self.load_manifest()
+
+    def load_manifest(self):
+        """Load the record of the previous build"""
+        if self.full or not default_storage.exists(SITEMAP_MANIFEST):
+            return {}
+        with default_storage.open(SITEMAP_MANIFEST) as manifest:
+            return json.loads(manifest.read())
+
+    def build(self):
+        """Build all of the sitemap sections and the index"""
+        for section, sitemap_class in self.sitemaps.items():
+            self.build_section(section, sitemap_class())
+        self.write_index()
+        self.write(SITEMAP_MANIFEST, json.dumps(self.manifest).encode("utf8"))
+
+    def build_section(self, section, sitemap):
+        """Write the changed shards for a single section"""
+        started = timezone.now()
+        queryset = sitemap.items()
+        model = queryset.model
+        previous = self.manifest.get(section, {})
+        shards = previous.get("shards", {})
+        digests = get_digests(sitemap, queryset)
+
+        if digests is not None and "digests" in previous:
+            # only shards whose items have changed since the last build, or
+            # which no longer hold any items, need to be rewritten
+            old_digests = previous["digests"]
+            shard_numbers = sorted(
+                int(shard)
+                for shard in set(digests) | set(old_digests)
+                if digests.get(shard) != old_digests.get(shard)
+            )
+        else:
+            last = model.objects.order_by("-pk").values_list("pk", flat=True).first()
+            shard_numbers = range(last // SITEMAP_SHARD_SIZE + 1) if last else []
+            # shards past the last primary key no longer hold anything
+            for shard in list(shards):
+                if int(shard) not in shard_numbers:
+                    default_storage.delete(shard_path(section, shard))
+                    del shards[shard]
+
+        for shard in shard_numbers:
+            lastmod = self.build_shard(section, sitemap, queryset, shard)
+            if lastmod is None:
+                shards.pop(str(shard), None)
+            else:
+                shards[str(shard)] = lastmod
+
+        self.manifest[section] = {"shards": shards}
+        if digests is not None:
+            self.manifest[section]["digests"] = digests
+        logger.info(
+            "[SITEMAP] %s: wrote %d shards in %s",
+            section,
+            len(shard_numbers),
+            timezone.now() - started,
+        )
+
+    def build_shard(self, section, sitemap, queryset, shard):
+        """Write one shard of a section, returning its last modified date, or None
+        if it is empty"""
+        items = list(
+            queryset.filter(
+                pk__gte=shard * SITEMAP_SHARD_SIZE,
+                pk__lt=(shard + 1) * SITEMAP_SHARD_SIZE,
+            ).order_by("pk")
+        )
+        path = shard_path(section, shard)
+        if not items:
+            if default_storage.exists(path):
+                default_storage.delete(path)
+            return None
+
+        urls = []
+        lastmods = []
+        for item in items:
+            url = [
+                "<url><loc>{}</loc>".format(
+                    escape(settings.MUCKROCK_URL + sitemap.location(item))
+                )
+            ]
+            lastmod = format_lastmod(self._get(sitemap, "lastmod", item))
+            if lastmod:
+                lastmods.append(lastmod)
+                url.append("<lastmod>{}</lastmod>".format(lastmod))
+            changefreq = self._get(sitemap, "changefreq", item)
+            if changefreq:
+                url.append("<changefreq>{}</changefreq>".format(changefreq))
+            priority = self._get(sitemap, "priority", item)
+            if priority is not None:
+                url.append("<priority>{}</priority>".format(priority))
+            url.append("</url>")
+            urls.append("".join(url))
+
+        content = (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+            "{}\n</urlset>\n".format("\n".join(urls))
+        )
+        self.write(path, gzip.compress(content.encode("utf8")))
+        return max(lastmods) if lastmods else timezone.now().date().isoformat()
+
+    def write_index(self):
+        """Write the sitemap index listing every shard"""
+        urls = []
+        for section in self.sitemaps:
+            shards = self.manifest.get(section, {}).get("shards", {})
+            for shard, lastmod in sorted(shards.items(), key=lambda s: int(s[0])):
+                url = settings.MUCKROCK_URL + reverse(
+                    "sitemap-shard", kwargs={"section": section, "shard": shard}
+                )
+                urls.append((url, lastmod))
+        self.write(SITEMAP_INDEX, index_content(urls).encode("utf8"))
+
+    @staticmethod
+    def write(path, content):
+        """Write a file to storage, replacing any existing version"""
+        if default_storage.exists(path):
+            default_storage.delete(path)
+        default_storage.save(path, ContentFile(content))
+
+    @staticmethod
+    def _get(sitemap, name, item):
+        """Get an attribute of a sitemap, which may be a method on the item"""
+        attr = getattr(sitemap, name, None)
+        if callable(attr):
+            return attr(item)
+        return attr
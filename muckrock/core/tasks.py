@@ -2,6 +2,9 @@
 Shared functionality for tasks
 """
 # Django
+from celery.schedules import crontab
+from celery.task import periodic_task, task
+from django.apps import apps
 from django.conf import settings
 from django.contrib.auth.models import User
 
@@ -11,10 +14,12 @@ from hashlib import md5
 from time import time
 
 # Third Party
-from boto.s3.connection import S3Connection
 from smart_open.smart_open_lib import smart_open
 
 # MuckRock
+from muckrock.core import changes, related, s3
+from muckrock.core.models import FileDeletion
+from muckrock.core.sitemap import SitemapBuilder
 from muckrock.message.email import TemplateEmail
 
 
@@ -34,8 +39,7 @@ class AsyncFileDownloadTask:
 
     def __init__(self, user_pk, hash_key):
         self.user = User.objects.get(pk=user_pk)
-        conn = S3Connection(settings.AWS_ACCESS_KEY_ID, settings.AWS_SECRET_ACCESS_KEY)
-        self.bucket = conn.get_bucket(settings.AWS_STORAGE_BUCKET_NAME)
+        self.bucket = s3.get_bucket("core.tasks.{}".format(type(self).__name__))
         today = date.today()
         self.file_key = "{dir_name}/{y:4d}/{m:02d}/{d:02d}/{md5}/{file_name}".format(
             dir_name=self.dir_name,
@@ -78,3 +82,63 @@ class AsyncFileDownloadTask:
     def generate_file(self, out_file):
         """Abstract method"""
         raise NotImplementedError("Subclass must override generate_file")
+
+
+@periodic_task(run_every=crontab(minute=15), name="muckrock.core.tasks.update_sitemaps")
+def update_sitemaps():
+    """Rewrite the sitemap shards which have changed since the last build"""
+    SitemapBuilder().build()
+
+
+@periodic_task(
+    run_every=crontab(hour=2, minute=45),
+    time_limit=60 * 60,
+    soft_time_limit=55 * 60,
+    name="muckrock.core.tasks.rebuild_sitemaps",
+)
+def rebuild_sitemaps():
+    """Rewrite all of the sitemaps, dropping any deleted items"""
+    SitemapBuilder(full=True).build()
+
+
+@periodic_task(
+    run_every=crontab(minute="*/5"),
+    time_limit=10 * 60,
+    soft_time_limit=9 * 60,
+    name="muckrock.core.tasks.flush_file_deletions",
+)
+def flush_file_deletions():
+    """Delete the files queued for deletion from S3 and cloudfront"""
+    bucket = s3.get_bucket("core.tasks.flush_file_deletions")
+    while FileDeletion.objects.exists():
+        if not FileDeletion.objects.flush(bucket):
+            # the remaining deletions are locked by another worker
+            break
+
+
+@task(ignore_result=True, name="muckrock.core.tasks.refresh_related")
+def refresh_related(model_label, pks):
+    """Reindex objects in the related content index"""
+    related.refresh(apps.get_model(model_label), pks)
+
+
+@periodic_task(
+    run_every=crontab(hour=3, minute=15),
+    time_limit=60 * 60,
+    soft_time_limit=55 * 60,
+    name="muckrock.core.tasks.rebuild_related",
+)
+def rebuild_related():
+    """Rebuild the related content index, recomputing its weights"""
+    related.rebuild()
+
+
+@periodic_task(
+    run_every=crontab(hour=3, minute=45),
+    time_limit=60 * 60,
+    soft_time_limit=55 * 60,
+    name="muckrock.core.tasks.prune_change_log",
+)
+def prune_change_log():
+    """Remove change log entries superseded by later changes"""
+    changes.prune()
@@ -120,3 +120,38 @@ class RunCommitHooksMixin:
                 lambda a: False,
             ):
                 transaction.get_connection(using=db_name).run_and_clear_commit_hooks()
+
+
+class FakeS3Bucket:
+    """A local stand in for a boto S3 bucket
+
+    Holds the names of the keys it contains, and fails to delete any keys
+    named in `fail`
+    """
+
+    class Result:
+        """The result of a multi-object delete"""
+
+        def __init__(self, deleted, errors):
+            self.deleted = deleted
+            self.errors = errors
+
+    class Error:
+        """An error deleting a key"""
+
+        def __init__(self, key):
+            self.key = key
+            self.code = "InternalError"
+
+    def __init__(self, keys=(), fail=()):
+        self.keys = set(keys)
+        self.fail = set(fail)
+        self.requests = 0
+
+    def delete_keys(self, keys, quiet=False):
+        """Delete multiple keys in one request"""
+        # pylint: disable=unused-argument
+        self.requests += 1
+        deleted = [k for k in keys if k not in self.fail]
+        self.keys.difference_update(deleted)
+        return self.Result(deleted, [self.Error(k) for k in keys if k in self.fail])
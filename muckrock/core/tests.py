@@ -5,14 +5,20 @@ Tests for site level functionality and helper functions for application tests
 # Django
 from django.conf import settings
 from django.contrib.sites.models import Site
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.test import RequestFactory, TestCase
+from django.core.files.storage import default_storage
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.test import RequestFactory, TestCase, override_settings
 from django.urls import reverse
 
 # Standard Library
+import gzip
 import logging
 
 # Third Party
+import actstream
 import mock
 import nose.tools
 from actstream.models import Action
@@ -21,21 +27,35 @@ from nose.tools import eq_, ok_
 
 # MuckRock
 from muckrock.accounts.models import Notification
+from muckrock.core import follow, page_cache, related
 from muckrock.core.factories import (
     AgencyFactory,
     AnswerFactory,
     ArticleFactory,
+    ProfessionalUserFactory,
     QuestionFactory,
     UserFactory,
 )
 from muckrock.core.fields import EmailsListField
 from muckrock.core.forms import NewsletterSignupForm, StripeForm
+from muckrock.core.middleware import AnonymousPageCacheMiddleware
+from muckrock.core.models import FileDeletion, RelatedFeature
+from muckrock.core.s3 import S3Pool, StorageMetrics
+from muckrock.core.sitemap import SITEMAP_DIR, SITEMAP_SHARD_SIZE, SitemapBuilder
 from muckrock.core.templatetags import tags
-from muckrock.core.test_utils import http_get_response, http_post_response
+from muckrock.core.test_utils import (
+    FakeS3Bucket,
+    RunCommitHooksMixin,
+    http_get_response,
+    http_post_response,
+)
 from muckrock.core.utils import new_action, notify
 from muckrock.core.views import DonationFormView, NewsletterSignupView
 from muckrock.crowdsource.factories import CrowdsourceResponseFactory
-from muckrock.foia.factories import FOIARequestFactory
+from muckrock.foia.factories import FOIACommunicationFactory, FOIARequestFactory
+from muckrock.foia.models import FOIARequest
+from muckrock.foia.views.list import MyRequestList
+from muckrock.news.models import Article
 from muckrock.task.factories import (
     FlaggedTaskFactory,
     NewAgencyTaskFactory,
@@ -133,15 +153,46 @@ class TestFunctional(TestCase):
 
         get_allowed(self.client, reverse("index"))
         get_allowed(self.client, "/sitemap.xml")
-        get_allowed(self.client, "/sitemap-News.xml")
-        get_allowed(self.client, "/sitemap-Jurisdiction.xml")
-        get_allowed(self.client, "/sitemap-Agency.xml")
-        get_allowed(self.client, "/sitemap-Question.xml")
-        get_allowed(self.client, "/sitemap-FOIA.xml")
+        # the old sitemap sections are all listed in the pre-built index
+        response = self.client.get("/sitemap-FOIA.xml")
+        eq_(response.status_code, 301)
+        eq_(response["Location"], "/sitemap.xml")
         get_allowed(self.client, "/news-sitemaps/index.xml")
         get_allowed(self.client, "/news-sitemaps/articles.xml")
         get_allowed(self.client, "/search/")
 
+    def test_sitemap_builder(self):
+        """Pre-built sitemaps should be served from storage"""
+        Site.objects.create(domain="www.muckrock.com")
+        foia = FOIARequestFactory()
+        # keep the shard from emptying out once the request is embargoed
+        FOIARequestFactory()
+        SitemapBuilder(full=True).build()
+        try:
+            shard_url = reverse(
+                "sitemap-shard",
+                kwargs={"section": "FOIA", "shard": foia.pk // SITEMAP_SHARD_SIZE},
+            )
+            response = self.client.get("/sitemap.xml")
+            eq_(response.status_code, 200)
+            ok_(shard_url in b"".join(response.streaming_content).decode("utf8"))
+
+            response = self.client.get(shard_url)
+            eq_(response.status_code, 200)
+            content = gzip.decompress(b"".join(response.streaming_content))
+            ok_(foia.get_absolute_url() in content.decode("utf8"))
+
+            # embargoing the request drops it on the next incremental build
+            foia.embargo = True
+            foia.save()
+            SitemapBuilder().build()
+            response = self.client.get(shard_url)
+            content = gzip.decompress(b"".join(response.streaming_content))
+            ok_(foia.get_absolute_url() not in content.decode("utf8"))
+        finally:
+            for path in default_storage.listdir(SITEMAP_DIR)[1]:
+                default_storage.delete("{}/{}".format(SITEMAP_DIR, path))
+
     def test_api_views(self):
         """Test API views"""
         user = UserFactory(username="super", is_staff=True)
@@ -185,6 +236,52 @@ class TestUnit(TestCase):
 
         field.clean("a@example.com,an.email@foo.net", model_instance)
 
+    @patch("muckrock.core.s3.PooledS3Connection.get_bucket")
+    def test_s3_pool(self, mock_get_bucket):
+        """Bucket handles should be reused, and only validated once"""
+        pool = S3Pool()
+        bucket = pool.get_bucket("bucket", "caller")
+        eq_(pool.get_bucket("bucket", "caller"), bucket)
+        mock_get_bucket.assert_called_once_with("bucket", validate=True)
+        ok_(pool.get_connection("caller") is pool.get_connection("caller"))
+        pool.get_bucket("bucket", "other")
+        mock_get_bucket.assert_called_with("bucket", validate=False)
+        ok_(pool.get_connection("caller") is not pool.get_connection("other"))
+
+    def test_storage_metrics(self):
+        """Requests should be counted and timed per caller"""
+        metrics = StorageMetrics()
+        metrics.record("a", 0.5)
+        metrics.record("a", 1.5, error=True)
+        metrics.record("b", 1.0)
+        eq_(
+            metrics.get(),
+            {
+                "a": {"requests": 2, "errors": 1, "seconds": 2.0, "max_seconds": 1.5},
+                "b": {"requests": 1, "errors": 0, "seconds": 1.0, "max_seconds": 1.0},
+            },
+        )
+
+    @patch("muckrock.core.utils.clear_cloudfront_cache")
+    def test_file_deletion_flush(self, mock_clear):
+        """Queued files should be deleted and invalidated in batches, retrying
+        failures"""
+        FileDeletion.objects.enqueue(["a.pdf", "b.pdf", "a.pdf", ""])
+        FileDeletion.objects.enqueue(["c.pdf"], invalidate=False)
+        eq_(FileDeletion.objects.count(), 3)
+        bucket = FakeS3Bucket(["a.pdf", "b.pdf", "c.pdf", "d.pdf"], fail=["b.pdf"])
+
+        eq_(FileDeletion.objects.flush(bucket), 3)
+        eq_(bucket.requests, 1)
+        eq_(bucket.keys, {"b.pdf", "d.pdf"})
+        mock_clear.assert_called_once_with(["a.pdf"])
+        eq_(list(FileDeletion.objects.values_list("path", "attempts")), [("b.pdf", 1)])
+
+        for _ in range(FileDeletion.MAX_ATTEMPTS - 1):
+            FileDeletion.objects.flush(bucket)
+        ok_(not FileDeletion.objects.exists())
+        eq_(FileDeletion.objects.flush(bucket), 0)
+
 
 class TestNewsletterSignupView(TestCase):
     """By submitting an email, users can subscribe to our MailChimp newsletter list."""
@@ -298,6 +395,131 @@ class TestNotify(TestCase):
             ok_(notification_for_user, "Each user in the list should be notified.")
 
 
+class TestFollow(TestCase):
+    """Follows are looked up without loading every follower"""
+
+    def test_follow(self):
+        """Test checking, counting and listing followers"""
+        foia = FOIARequestFactory()
+        other_foia = FOIARequestFactory()
+        users = UserFactory.create_batch(3)
+        for user in users:
+            actstream.actions.follow(user, foia, actor_only=False)
+        outsider = UserFactory()
+        actstream.actions.follow(outsider, other_foia, actor_only=False)
+
+        ok_(follow.is_following(users[0], foia))
+        ok_(not follow.is_following(outsider, foia))
+        eq_(follow.follower_count(foia), 3)
+        eq_(set(follow.followers_of(foia)), set(users))
+        eq_([len(ids) for ids in follow.iter_follower_ids(foia, chunk_size=2)], [2, 1])
+        followed = FOIARequest.objects.filter(
+            pk__in=follow.followed_pks(outsider, FOIARequest)
+        )
+        eq_(set(followed), {other_foia})
+
+
+class TestRelated(RunCommitHooksMixin, TestCase):
+    """Related content is suggested from the index"""
+
+    def test_suggest(self):
+        """Test ranking suggestions by their shared features"""
+        user = UserFactory()
+        article = ArticleFactory(authors=[user])
+        closer = ArticleFactory(authors=[user])
+        further = ArticleFactory()
+        unrelated = ArticleFactory()
+        for article_ in (article, closer, further):
+            article_.tags.add("prisons")
+        unrelated.tags.add("water")
+        self.run_commit_hooks()
+
+        articles = Article.objects.all()
+        eq_(related.suggest(article, articles, 5), [closer, further])
+        eq_(related.suggest(article, articles, 1), [closer])
+        eq_(related.suggest(article, articles, 5, require=("user",)), [closer])
+
+        RelatedFeature.objects.all().delete()
+        related.rebuild()
+        eq_(related.suggest(article, articles, 5), [closer, further])
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    PAGE_CACHE_TIMEOUT=60,
+)
+class TestPageCache(RunCommitHooksMixin, TestCase):
+    """Pages are cached for anonymous visitors until they are purged"""
+
+    def setUp(self):
+        cache.clear()
+        self.foia = FOIARequestFactory()
+        self.rendered = 0
+
+        def get_response(request):
+            """Render a page showing the request"""
+            self.rendered += 1
+            response = HttpResponse(
+                '<input type="hidden" name="csrfmiddlewaretoken" value="{}">'.format(
+                    get_token(request)
+                )
+            )
+            return page_cache.tag(response, self.foia)
+
+        self.middleware = AnonymousPageCacheMiddleware(get_response)
+        self.factory = RequestFactory()
+
+    def test_page_cache(self):
+        """Test caching, bypassing and purging the page cache"""
+        response = self.middleware(self.factory.get("/page/"))
+        eq_(response["Surrogate-Key"], "foiarequest-{}".format(self.foia.pk))
+        request = self.factory.get("/page/")
+        response = self.middleware(request)
+        eq_(self.rendered, 1)
+        ok_(page_cache.CSRF_PLACEHOLDER not in response.content)
+        # the visitor is given a csrf cookie matching the token on the page
+        ok_(request.META.get("CSRF_COOKIE_USED"))
+
+        request = self.factory.get("/page/")
+        request.COOKIES[settings.SESSION_COOKIE_NAME] = "session"
+        self.middleware(request)
+        eq_(self.rendered, 2)
+
+        page_cache.purge(self.foia)
+        self.run_commit_hooks()
+        self.middleware(self.factory.get("/page/"))
+        eq_(self.rendered, 3)
+
+    def test_purge_on_delete(self):
+        """Deleting a communication or tagging the request purges its page"""
+        comm = FOIACommunicationFactory(foia=self.foia)
+        self.run_commit_hooks()
+        self.middleware(self.factory.get("/page/"))
+        comm.delete()
+        self.run_commit_hooks()
+        self.middleware(self.factory.get("/page/"))
+        eq_(self.rendered, 2)
+        self.foia.tags.add("tag")
+        self.run_commit_hooks()
+        self.middleware(self.factory.get("/page/"))
+        eq_(self.rendered, 3)
+
+    def test_purge_on_embargo(self):
+        """Embargoing requests in bulk purges their pages"""
+        user = ProfessionalUserFactory()
+        self.foia = FOIARequestFactory(composer__user=user, status="ack")
+        self.run_commit_hooks()
+        self.middleware(self.factory.get("/page/"))
+        self.middleware(self.factory.get("/page/"))
+        eq_(self.rendered, 1)
+        MyRequestList()._extend_embargo(
+            FOIARequest.objects.filter(pk=self.foia.pk), user, {}
+        )
+        self.run_commit_hooks()
+        self.middleware(self.factory.get("/page/"))
+        eq_(self.rendered, 2)
+
+
 @patch("stripe.Charge", Mock())
 class TestDonations(TestCase):
     """Tests donation functionality"""
@@ -3,7 +3,6 @@ URL mappings for muckrock project
 """
 
 # Django
-import django.contrib.sitemaps.views
 from django.conf import settings
 from django.conf.urls import include, url
 from django.contrib import admin
@@ -26,26 +25,10 @@ import muckrock.jurisdiction.viewsets
 import muckrock.news.viewsets
 import muckrock.qanda.views
 import muckrock.task.viewsets
-from muckrock.agency.sitemap import AgencySitemap
-from muckrock.core.sitemap import FlatPageSitemap
 from muckrock.core.views import handler500  # pylint: disable=unused-import
-from muckrock.foia.sitemap import FoiaSitemap
-from muckrock.jurisdiction.sitemap import JurisdictionSitemap
-from muckrock.news.sitemap import ArticleSitemap
-from muckrock.project.sitemap import ProjectSitemap
-from muckrock.qanda.sitemap import QuestionSitemap
 
 admin.site.index_template = "admin/custom_index.html"
 
-sitemaps = {
-    "FOIA": FoiaSitemap,
-    "News": ArticleSitemap,
-    "Agency": AgencySitemap,
-    "Jurisdiction": JurisdictionSitemap,
-    "Question": QuestionSitemap,
-    "Project": ProjectSitemap,
-    "Flatpages": FlatPageSitemap,
-}
 
 router = DefaultRouter()
 router.register(
@@ -67,6 +50,7 @@ router.register(
     muckrock.foia.viewsets.FOIACommunicationViewSet,
     "api-communication",
 )
+router.register(r"file", muckrock.foia.viewsets.FOIAFileViewSet, "api-file")
 router.register(r"user", muckrock.accounts.viewsets.UserViewSet, "api-user")
 router.register(r"news", muckrock.news.viewsets.ArticleViewSet, "api-news")
 router.register(r"photos", muckrock.news.viewsets.PhotoViewSet, "api-photos")
@@ -121,17 +105,17 @@ urlpatterns = [
         r"^favicon.ico$",
         RedirectView.as_view(url=settings.STATIC_URL + "icons/favicon.ico"),
     ),
+    url(r"^sitemap\.xml$", views.sitemap_index, name="sitemap-index"),
     url(
-        r"^sitemap\.xml$",
-        django.contrib.sitemaps.views.index,
-        {"sitemaps": sitemaps},
-        name="django.contrib.sitemaps.views.index",
+        r"^sitemaps/sitemap-(?P<section>\w+)-(?P<shard>\d+)\.xml\.gz$",
+        views.sitemap_shard,
+        name="sitemap-shard",
     ),
+    # the old live sitemap sections, which paged through each section with
+    # OFFSET queries, are now all listed in the pre-built index
     url(
         r"^sitemap-(?P<section>.+)\.xml$",
-        django.contrib.sitemaps.views.sitemap,
-        {"sitemaps": sitemaps},
-        name="django.contrib.sitemaps.views.sitemap",
+        RedirectView.as_view(url="/sitemap.xml", permanent=True),
     ),
     url(r"^news-sitemaps/", include("news_sitemaps.urls")),
     url(r"^__debug__/", include(debug_toolbar.urls)),
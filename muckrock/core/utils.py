@@ -6,6 +6,8 @@ Miscellanous utilities
 from django.conf import settings
 from django.contrib.auth.models import Group, User
 from django.core.cache import cache, caches
+from django.db import transaction
+from django.db.models import QuerySet
 from django.template import Context
 from django.template.loader_tags import BlockNode, ExtendsNode
 
@@ -15,6 +17,8 @@ import logging
 import random
 import string
 import sys
+import threading
+import time
 import uuid
 
 # Third Party
@@ -22,7 +26,9 @@ import actstream
 import boto
 import requests
 import stripe
-from boto.s3.connection import S3Connection
+
+# MuckRock
+from muckrock.core import s3
 
 logger = logging.getLogger(__name__)
 
@@ -78,11 +84,15 @@ def generate_status_action(foia):
 
 
 def notify(users, action):
-    """Notify a set of users about an action and return the list of notifications."""
+    """Notify a set of users about an action and return the list of notifications.
+
+    Large sets of users are notified by a background task, in which case no
+    notifications are returned.
+    """
     # pylint: disable=import-outside-toplevel
     from muckrock.accounts.models import Notification
+    from muckrock.accounts.tasks import notify_users
 
-    notifications = []
     if isinstance(users, Group):
         # If users is a group, get the queryset of users
         users = users.user_set.all()
@@ -91,11 +101,15 @@ def notify(users, action):
         users = [users]
     if action is None:
         # If no action is provided, don't generate any notifications
-        return notifications
-    for user in users:
-        notification = Notification.objects.create(user=user, action=action)
-        notifications.append(notification)
-    return notifications
+        return []
+    if isinstance(users, QuerySet):
+        user_ids = list(users.values_list("pk", flat=True))
+    else:
+        user_ids = [user.pk for user in users]
+    if len(user_ids) > settings.NOTIFICATION_ASYNC_THRESHOLD:
+        transaction.on_commit(lambda: notify_users.delay(user_ids, action.pk))
+        return []
+    return Notification.objects.create_for_users(user_ids, action)
 
 
 def generate_key(size=12, chars=string.ascii_uppercase + string.digits):
@@ -129,6 +143,51 @@ def cache_get_or_set(key, update, timeout):
     return value
 
 
+class RecentCache:
+    """A short lived, in process cache of recently used values
+
+    Values are only cached once the current transaction commits, so values
+    which are rolled back are never cached.  A timeout of 0 disables caching.
+    """
+
+    def __init__(self, timeout, max_size=10000):
+        self.timeout = timeout
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def get(self, key):
+        """Get the value for the key, if it has not expired"""
+        with self._lock:
+            value, expires = self._values.get(key, (None, 0))
+            if expires < time.monotonic():
+                self._values.pop(key, None)
+                return None
+            return value
+
+    def set(self, key, value):
+        """Cache the value once the current transaction commits"""
+        if self.timeout:
+            transaction.on_commit(lambda: self._set(key, value))
+
+    def _set(self, key, value):
+        """Cache the value"""
+        with self._lock:
+            if len(self._values) >= self.max_size:
+                self._values = {}
+            self._values[key] = (value, time.monotonic() + self.timeout)
+
+    def delete(self, key):
+        """Remove the key from the cache"""
+        with self._lock:
+            self._values.pop(key, None)
+
+    def clear(self):
+        """Remove everything from the cache"""
+        with self._lock:
+            self._values = {}
+
+
 def retry_on_error(error, func, *args, **kwargs):
     """Retry a function on error"""
     times = kwargs.pop("times", 0) + 1
@@ -225,11 +284,13 @@ def squarelet_post(path, data):
     return _squarelet(requests.post, path, data=data)
 
 
-def squarelet_get(path, params=None):
-    """Make a get request to squarlet"""
+def squarelet_get(path, params=None, session=None):
+    """Make a get request to squarlet
+    Pass in a requests session to re-use its connection for many requests"""
     if params is None:
         params = {}
-    return _squarelet(requests.get, path, params=params)
+    method = session.get if session is not None else requests.get
+    return _squarelet(method, path, params=params)
 
 
 def _zoho(method, path, **kwargs):
@@ -251,10 +312,29 @@ def zoho_get(path, params=None):
     return _zoho(requests.get, path, params=params)
 
 
-def get_s3_storage_bucket():
+def get_s3_storage_bucket(caller="core.utils"):
     """Return the S3 storage bucket"""
-    conn = S3Connection(settings.AWS_ACCESS_KEY_ID, settings.AWS_SECRET_ACCESS_KEY)
-    return conn.get_bucket(settings.AWS_STORAGE_BUCKET_NAME)
+    return s3.get_bucket(caller)
+
+
+CLOUDFRONT_DISTRIBUTION_KEY = "cloudfront_distribution_id"
+
+
+def get_cloudfront_distribution_id(cloudfront):
+    """Find the id of the distribution serving our files, caching it to avoid
+    listing every distribution on each invalidation"""
+    distribution_id = cache.get(CLOUDFRONT_DISTRIBUTION_KEY)
+    if distribution_id is None:
+        distributions = [
+            d
+            for d in cloudfront.get_all_distributions()
+            if settings.AWS_S3_CUSTOM_DOMAIN in d.cnames
+        ]
+        if not distributions:
+            return None
+        distribution_id = distributions[0].id
+        cache.set(CLOUDFRONT_DISTRIBUTION_KEY, distribution_id, 60 * 60 * 24)
+    return distribution_id
 
 
 def clear_cloudfront_cache(file_names):
@@ -265,15 +345,9 @@ def clear_cloudfront_cache(file_names):
     cloudfront = boto.connect_cloudfront(
         settings.AWS_ACCESS_KEY_ID, settings.AWS_SECRET_ACCESS_KEY
     )
-    # find the current distribution
-    distributions = [
-        d
-        for d in cloudfront.get_all_distributions()
-        if settings.AWS_S3_CUSTOM_DOMAIN in d.cnames
-    ]
-    if distributions:
-        distribution = distributions[0]
-        cloudfront.create_invalidation_request(distribution.id, file_names)
+    distribution_id = get_cloudfront_distribution_id(cloudfront)
+    if distribution_id is not None:
+        cloudfront.create_invalidation_request(distribution_id, file_names)
 
 
 class UnclosableFile:
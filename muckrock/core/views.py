@@ -9,7 +9,9 @@ from django.contrib.auth.decorators import user_passes_test
 from django.core.cache import cache
 from django.core.cache.utils import make_template_fragment_key
 from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import default_storage
 from django.db.models import F, Q, Sum
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.template.loader import render_to_string
 from django.urls import reverse
@@ -38,6 +40,7 @@ from muckrock.accounts.utils import (
 )
 from muckrock.agency.models import Agency
 from muckrock.core.forms import NewsletterSignupForm, SearchForm, StripeForm
+from muckrock.core.sitemap import SITEMAP_INDEX, index_content, shard_path
 from muckrock.core.utils import stripe_retry_on_error
 from muckrock.foia.models import FOIAFile, FOIARequest
 from muckrock.jurisdiction.models import Jurisdiction
@@ -525,6 +528,24 @@ def jurisdiction(request, jurisdiction=None, slug=None, idx=None, view=None):
         return redirect(jmodel.get_url(view))
 
 
+def sitemap_index(request):
+    """Serve the pre-built sitemap index, or an empty one if the sitemaps have not
+    been built yet"""
+    if not default_storage.exists(SITEMAP_INDEX):
+        return HttpResponse(index_content([]), content_type="application/xml")
+    return FileResponse(
+        default_storage.open(SITEMAP_INDEX), content_type="application/xml"
+    )
+
+
+def sitemap_shard(request, section, shard):
+    """Serve a pre-built, gzipped sitemap shard"""
+    path = shard_path(section, shard)
+    if not default_storage.exists(path):
+        raise Http404
+    return FileResponse(default_storage.open(path), content_type="application/gzip")
+
+
 def handler500(request):
     """
     500 error handler which includes request in the context.
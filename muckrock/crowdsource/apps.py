@@ -10,4 +10,9 @@ from django.apps import AppConfig
 class CrowdsourceConfig(AppConfig):
     """Crowdsource config"""
 
-    name = "crowdsource"
+    name = "muckrock.crowdsource"
+
+    def ready(self):
+        """Connect the signal handlers which maintain the crowdsource counters"""
+        # pylint: disable=unused-import, import-outside-toplevel
+        import muckrock.crowdsource.signals
@@ -0,0 +1,70 @@
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_counters(apps, schema_editor):
+    Crowdsource = apps.get_model('crowdsource', 'Crowdsource')
+    crowdsources = Crowdsource.objects.annotate(
+        data_total=Count('data', distinct=True),
+        response_total=Count('responses', distinct=True),
+    )
+    for crowdsource in crowdsources.iterator():
+        public_responses = crowdsource.responses.filter(
+            public=True, user__isnull=False
+        )
+        crowdsource.data_count = crowdsource.data_total
+        crowdsource.response_count = crowdsource.response_total
+        crowdsource.contributor_count = public_responses.aggregate(
+            count=Count('user', distinct=True)
+        )['count']
+        crowdsource.top_contributors = [
+            full_name or username
+            for full_name, username in public_responses.values_list(
+                'user__profile__full_name', 'user__username'
+            ).annotate(count=Count('id')).order_by('-count', 'user__username')[:4]
+        ]
+        crowdsource.save(
+            update_fields=[
+                'data_count',
+                'response_count',
+                'contributor_count',
+                'top_contributors',
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crowdsource', '0028_auto_20201124_1123'),
+        ('accounts', '0055_auto_20200901_1327'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='crowdsource',
+            name='contributor_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='crowdsource',
+            name='data_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='crowdsource',
+            name='response_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='crowdsource',
+            name='top_contributors',
+            field=django.contrib.postgres.fields.jsonb.JSONField(
+                blank=True, default=list, editable=False
+            ),
+        ),
+        migrations.RunPython(
+            populate_counters, reverse_code=migrations.RunPython.noop
+        ),
+    ]
@@ -9,7 +9,7 @@ from django.core.mail.message import EmailMessage
 from django.core.validators import MinValueValidator
 from django.db import models, transaction
 from django.db.models.aggregates import Count
-from django.db.models.expressions import Case, Value, When
+from django.db.models.expressions import Case, F, Value, When
 from django.db.models.functions import Concat
 from django.db.models.functions.datetime import TruncDay
 from django.urls import reverse
@@ -108,6 +108,12 @@ class Crowdsource(models.Model):
         "for their response",
     )
 
+    # denormalized counters, kept up to date by muckrock.crowdsource.signals
+    data_count = models.PositiveIntegerField(default=0, editable=False)
+    response_count = models.PositiveIntegerField(default=0, editable=False)
+    contributor_count = models.PositiveIntegerField(default=0, editable=False)
+    top_contributors = JSONField(default=list, blank=True, editable=False)
+
     objects = CrowdsourceQuerySet.as_manager()
 
     def __str__(self):
@@ -219,42 +225,61 @@ class Crowdsource(models.Model):
 
     def total_assignments(self):
         """Total assignments to be completed"""
-        if not self.data.all():
+        if not self.data_count:
             return None
-        return len(self.data.all()) * self.data_limit
+        return self.data_count * self.data_limit
 
     def percent_complete(self):
         """Percent of tasks complete"""
         total = self.total_assignments()
         if not total:
             return 0
-        return int(100 * self.responses.count() / float(total))
+        return int(100 * self.response_count / float(total))
 
     def contributor_line(self):
         """Line about who has contributed"""
-        responses = self.responses.select_related("user__profile")
-        users = list({r.user for r in responses if r.user and r.public})
-        total = len(users)
-
-        def join_names(users):
-            """Create a comma seperated list of user names"""
-            return ", ".join(u.profile.full_name or u.username for u in users)
+        names = self.top_contributors
+        total = self.contributor_count
 
         if total > 4:
-            return "{} and {} others helped".format(join_names(users[:3]), total - 3)
+            return "{} and {} others helped".format(", ".join(names[:3]), total - 3)
         elif total > 1:
-            return "{} and {} helped".format(
-                join_names(users[:-1]),
-                users[-1].profile.full_name or users[-1].username,
-            )
+            return "{} and {} helped".format(", ".join(names[:-1]), names[-1])
         elif total == 1:
-            return "{} helped".format(users[0].profile.full_name or users[0].username)
-        elif responses:
+            return "{} helped".format(names[0])
+        elif self.response_count:
             # there have been responses, but none of them are public
             return ""
         else:
             return "No one has helped yet, be the first!"
 
+    def adjust_counts(self, **kwargs):
+        """Atomically adjust the denormalized counters by the given amounts"""
+        Crowdsource.objects.filter(pk=self.pk).update(
+            **{field: F(field) + amount for field, amount in kwargs.items()}
+        )
+
+    def update_contributors(self):
+        """Recalculate the public contributor count and the top contributor
+        names displayed in the contributor line"""
+        public_responses = self.responses.filter(public=True, user__isnull=False)
+        contributor_count = public_responses.aggregate(
+            count=Count("user", distinct=True)
+        )["count"]
+        top_contributors = [
+            full_name or username
+            for full_name, username in public_responses.values_list(
+                "user__profile__full_name", "user__username"
+            )
+            .annotate(count=Count("id"))
+            .order_by("-count", "user__username")[:4]
+        ]
+        Crowdsource.objects.filter(pk=self.pk).update(
+            contributor_count=contributor_count, top_contributors=top_contributors
+        )
+        self.contributor_count = contributor_count
+        self.top_contributors = top_contributors
+
     def responses_per_day(self):
         """How many responses there have been per day"""
         return (
@@ -0,0 +1,71 @@
+"""Model signal handlers for the crowdsource application"""
+
+# Django
+from django.db.models.signals import post_delete, post_save
+
+# MuckRock
+from muckrock.crowdsource.models import (
+    Crowdsource,
+    CrowdsourceData,
+    CrowdsourceResponse,
+)
+
+# pylint: disable=unused-argument
+
+
+def data_created(sender, instance, created, **kwargs):
+    """Increment the data count when new data is added"""
+    if created:
+        instance.crowdsource.adjust_counts(data_count=1)
+
+
+def data_deleted(sender, instance, **kwargs):
+    """Decrement the data count when data is removed"""
+    try:
+        instance.crowdsource.adjust_counts(data_count=-1)
+    except Crowdsource.DoesNotExist:
+        # the crowdsource itself is being deleted
+        pass
+
+
+def response_saved(sender, instance, created, **kwargs):
+    """Keep the response count and contributor summary up to date"""
+    if created:
+        instance.crowdsource.adjust_counts(response_count=1)
+    if instance.public or not created:
+        # an edited response may have changed its public status
+        instance.crowdsource.update_contributors()
+
+
+def response_deleted(sender, instance, **kwargs):
+    """Keep the response count and contributor summary up to date"""
+    try:
+        crowdsource = instance.crowdsource
+    except Crowdsource.DoesNotExist:
+        # the crowdsource itself is being deleted
+        return
+    crowdsource.adjust_counts(response_count=-1)
+    if instance.public:
+        crowdsource.update_contributors()
+
+
+post_save.connect(
+    data_created,
+    sender=CrowdsourceData,
+    dispatch_uid="muckrock.crowdsource.signals.data_created",
+)
+post_delete.connect(
+    data_deleted,
+    sender=CrowdsourceData,
+    dispatch_uid="muckrock.crowdsource.signals.data_deleted",
+)
+post_save.connect(
+    response_saved,
+    sender=CrowdsourceResponse,
+    dispatch_uid="muckrock.crowdsource.signals.response_saved",
+)
+post_delete.connect(
+    response_deleted,
+    sender=CrowdsourceResponse,
+    dispatch_uid="muckrock.crowdsource.signals.response_deleted",
+)
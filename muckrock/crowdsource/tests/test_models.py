@@ -218,6 +218,65 @@ class TestCrowdsource(TestCase):
         assert_not_in(closed_crowdsource, crowdsources)
         assert_not_in(project_crowdsource, crowdsources)
 
+    def test_counters(self):
+        """The data and response counters are maintained on create and delete"""
+        crowdsource = CrowdsourceFactory(data_limit=2)
+        eq_(crowdsource.total_assignments(), None)
+        eq_(crowdsource.percent_complete(), 0)
+
+        data = CrowdsourceDataFactory.create_batch(2, crowdsource=crowdsource)
+        response = CrowdsourceResponseFactory(crowdsource=crowdsource, data=data[0])
+        CrowdsourceResponseFactory(crowdsource=crowdsource, data=data[1])
+        crowdsource.refresh_from_db()
+        eq_(crowdsource.data_count, 2)
+        eq_(crowdsource.response_count, 2)
+        eq_(crowdsource.total_assignments(), 4)
+        eq_(crowdsource.percent_complete(), 50)
+
+        response.delete()
+        crowdsource.refresh_from_db()
+        eq_(crowdsource.response_count, 1)
+        eq_(crowdsource.percent_complete(), 25)
+
+    def test_contributor_line(self):
+        """The contributor line is built from the maintained contributor summary"""
+        crowdsource = CrowdsourceFactory()
+        eq_(crowdsource.contributor_line(), "No one has helped yet, be the first!")
+
+        CrowdsourceResponseFactory(crowdsource=crowdsource, public=False)
+        crowdsource.refresh_from_db()
+        eq_(crowdsource.contributor_line(), "")
+
+        users = UserFactory.create_batch(5)
+        for i, user in enumerate(users):
+            user.profile.full_name = "User {}".format(i)
+            user.profile.save()
+        # the first user has the most responses and should be listed first
+        CrowdsourceResponseFactory(crowdsource=crowdsource, user=users[0], public=True)
+        response = CrowdsourceResponseFactory(
+            crowdsource=crowdsource, user=users[0], public=True
+        )
+        crowdsource.refresh_from_db()
+        eq_(crowdsource.contributor_count, 1)
+        eq_(crowdsource.contributor_line(), "User 0 helped")
+
+        CrowdsourceResponseFactory(crowdsource=crowdsource, user=users[1], public=True)
+        crowdsource.refresh_from_db()
+        eq_(crowdsource.contributor_line(), "User 0 and User 1 helped")
+
+        for user in users[2:]:
+            CrowdsourceResponseFactory(crowdsource=crowdsource, user=user, public=True)
+        crowdsource.refresh_from_db()
+        eq_(crowdsource.contributor_count, 5)
+        ok_(crowdsource.contributor_line().startswith("User 0, "))
+        ok_(crowdsource.contributor_line().endswith(" and 2 others helped"))
+
+        response.public = False
+        response.save()
+        crowdsource.refresh_from_db()
+        eq_(crowdsource.contributor_count, 5)
+        eq_(len(crowdsource.top_contributors), 4)
+
 
 class TestCrowdsourceData(TestCase):
     """Test the Crowdsource Data model"""
@@ -7,7 +7,6 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.db import transaction
 from django.db.models import Count
-from django.db.models.query import Prefetch
 from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse
 from django.shortcuts import redirect
 from django.urls import reverse
@@ -77,16 +76,7 @@ class CrowdsourceExploreView(TemplateView):
             )
             .order_by("-datetime_created")
             .filter(status="open", project_only=False, featured=True)
-            .select_related("user", "project")
-            .prefetch_related(
-                "data",
-                Prefetch(
-                    "responses",
-                    queryset=CrowdsourceResponse.objects.select_related(
-                        "user__profile"
-                    ),
-                ),
-            )[:5]
+            .select_related("user", "project")[:5]
         )
         return context
 
@@ -98,9 +88,7 @@ class CrowdsourceDetailView(DetailView):
     pk_url_kwarg = "idx"
     query_pk_and_slug = True
     context_object_name = "crowdsource"
-    queryset = Crowdsource.objects.select_related("user").prefetch_related(
-        "data", "responses"
-    )
+    queryset = Crowdsource.objects.select_related("user")
 
     def dispatch(self, *args, **kwargs):
         """Redirect to assignment page for those without permission"""
@@ -522,11 +510,7 @@ class CrowdsourceListView(MRFilterListView):
     def get_queryset(self):
         """Get all open crowdsources and all crowdsources you own"""
         queryset = super(CrowdsourceListView, self).get_queryset()
-        queryset = (
-            queryset.select_related("user__profile", "project")
-            .prefetch_related("data", "responses")
-            .distinct()
-        )
+        queryset = queryset.select_related("user__profile", "project").distinct()
         return queryset.get_viewable(self.request.user)
 
     def get_context_data(self, **kwargs):
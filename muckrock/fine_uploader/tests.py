@@ -10,7 +10,9 @@ from django.urls import reverse
 import json
 
 # Third Party
-from nose.tools import assert_false, eq_
+from botocore.exceptions import ClientError
+from mock import patch
+from nose.tools import assert_false, eq_, ok_
 
 # MuckRock
 from muckrock.core.factories import UserFactory
@@ -162,6 +164,123 @@ class TestFineUploaderDeleteView(TestCase):
         eq_(response.status_code, 403)
 
 
+@patch("muckrock.core.s3.get_client")
+class TestFineUploaderMultipartViews(TestCase):
+    """Tests for fine uploader multipart upload views"""
+
+    def setUp(self):
+        self.foia = FOIARequestFactory()
+        self.request_factory = RequestFactory()
+
+    def _post(self, view, data, user=None):
+        """Post to a multipart view"""
+        request = self.request_factory.post("/", data)
+        request.user = user or self.foia.user
+        return view(request)
+
+    def _create(self, user=None):
+        """Start a multipart upload, returning its response"""
+        return self._post(
+            views.multipart_create_request,
+            {"id": self.foia.pk, "name": "file.pdf", "size": 1024, "type": "pdf"},
+            user,
+        )
+
+    def test_create(self, mock_get_client):
+        """Starting an upload should return a token and a key for it"""
+        mock_get_client.return_value.create_multipart_upload.return_value = {
+            "UploadId": "upload_id"
+        }
+        response = self._create()
+        eq_(response.status_code, 200)
+        data = json.loads(response.content)
+        ok_(data["token"])
+        ok_(
+            data["key"].startswith(
+                "outbound_request_attachments/{}/{}/".format(
+                    self.foia.user.username, self.foia.pk
+                )
+            )
+        )
+        response = self._post(
+            views.multipart_create_request,
+            {"id": self.foia.pk, "name": "file.pdf", "size": 10 ** 12},
+        )
+        eq_(response.status_code, 400)
+        # users may only upload to requests they may upload attachments to
+        eq_(self._create(UserFactory()).status_code, 403)
+        # uploads of files with the same name started at once get their own keys
+        ok_(
+            json.loads(self._create().content)["key"]
+            != json.loads(self._create().content)["key"]
+        )
+
+    def test_sign(self, mock_get_client):
+        """Each part should be signed, but only for the upload's user"""
+        client = mock_get_client.return_value
+        client.create_multipart_upload.return_value = {"UploadId": "upload_id"}
+        client.generate_presigned_url.side_effect = lambda *args, **kwargs: str(
+            kwargs["Params"]["PartNumber"]
+        )
+        token = json.loads(self._create().content)["token"]
+        response = self._post(views.multipart_sign, {"token": token, "parts": [1, 2]})
+        eq_(response.status_code, 200)
+        eq_(json.loads(response.content), {"urls": {"1": "1", "2": "2"}})
+        response = self._post(
+            views.multipart_sign, {"token": token, "parts": [1]}, UserFactory()
+        )
+        eq_(response.status_code, 403)
+
+    def test_complete(self, mock_get_client):
+        """Completing an upload should assemble the parts and attach the file"""
+        client = mock_get_client.return_value
+        client.create_multipart_upload.return_value = {"UploadId": "upload_id"}
+        client.list_parts.return_value = {
+            "Parts": [
+                {"PartNumber": 1, "ETag": "a", "Size": 512},
+                {"PartNumber": 2, "ETag": "b", "Size": 512},
+            ]
+        }
+        data = json.loads(self._create().content)
+        # the upload may only be completed to the key and request it was
+        # started for
+        for view, key, pk in [
+            (views.multipart_complete_request, "other_key", self.foia.pk),
+            (views.multipart_complete_request, data["key"], FOIARequestFactory().pk),
+            (views.multipart_complete_composer, data["key"], self.foia.pk),
+        ]:
+            response = self._post(view, {"token": data["token"], "key": key, "id": pk})
+            eq_(response.status_code, 403)
+        response = self._post(
+            views.multipart_complete_request,
+            {"token": data["token"], "key": data["key"], "id": self.foia.pk},
+        )
+        eq_(response.status_code, 200)
+        parts = client.complete_multipart_upload.call_args[1]["MultipartUpload"]
+        eq_([p["PartNumber"] for p in parts["Parts"]], [1, 2])
+        attachment = OutboundRequestAttachment.objects.get(foia=self.foia)
+        eq_(attachment.ffile.name, data["key"])
+
+    def test_complete_too_large(self, mock_get_client):
+        """An upload over the size limit is refused, even if it cannot be
+        aborted"""
+        client = mock_get_client.return_value
+        client.create_multipart_upload.return_value = {"UploadId": "upload_id"}
+        client.list_parts.return_value = {
+            "Parts": [{"PartNumber": 1, "ETag": "a", "Size": 10 ** 12}]
+        }
+        client.abort_multipart_upload.side_effect = ClientError(
+            {}, "AbortMultipartUpload"
+        )
+        data = json.loads(self._create().content)
+        response = self._post(
+            views.multipart_complete_request,
+            {"token": data["token"], "key": data["key"], "id": self.foia.pk},
+        )
+        eq_(response.status_code, 400)
+        assert_false(client.complete_multipart_upload.called)
+
+
 class TestFineUploaderSignView(TestCase):
     """Tests for fine uploader delete view"""
 
@@ -49,4 +49,47 @@ urlpatterns = [
         views.session_composer,
         name="fine-uploader-session-composer",
     ),
+    url(
+        r"^multipart/create_request/$",
+        views.multipart_create_request,
+        name="fine-uploader-multipart-create-request",
+    ),
+    url(
+        r"^multipart/create_composer/$",
+        views.multipart_create_composer,
+        name="fine-uploader-multipart-create-composer",
+    ),
+    url(
+        r"^multipart/create_comm/$",
+        views.multipart_create_comm,
+        name="fine-uploader-multipart-create-comm",
+    ),
+    url(
+        r"^multipart/sign/$", views.multipart_sign, name="fine-uploader-multipart-sign"
+    ),
+    url(
+        r"^multipart/parts/$",
+        views.multipart_parts,
+        name="fine-uploader-multipart-parts",
+    ),
+    url(
+        r"^multipart/abort/$",
+        views.multipart_abort,
+        name="fine-uploader-multipart-abort",
+    ),
+    url(
+        r"^multipart/complete_request/$",
+        views.multipart_complete_request,
+        name="fine-uploader-multipart-complete-request",
+    ),
+    url(
+        r"^multipart/complete_composer/$",
+        views.multipart_complete_composer,
+        name="fine-uploader-multipart-complete-composer",
+    ),
+    url(
+        r"^multipart/complete_comm/$",
+        views.multipart_complete_comm,
+        name="fine-uploader-multipart-complete-comm",
+    ),
 ]
@@ -3,6 +3,7 @@
 # Django
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.core import signing
 from django.core.files.storage import default_storage
 from django.http import (
     HttpResponse,
@@ -11,15 +12,23 @@ from django.http import (
     JsonResponse,
 )
 from django.utils import timezone
+from django.views.decorators.http import require_POST
 
 # Standard Library
 import base64
 import hashlib
 import hmac
 import json
+import logging
 import os
+import uuid
+
+# Third Party
+from botocore.exceptions import ClientError
 
 # MuckRock
+from muckrock.core import s3
+from muckrock.core.models import FileDeletion
 from muckrock.foia.models import (
     FOIACommunication,
     FOIAComposer,
@@ -29,6 +38,8 @@ from muckrock.foia.models import (
     OutboundRequestAttachment,
 )
 
+logger = logging.getLogger(__name__)
+
 
 def _success(request, model, attachment_model, fk_name):
     """"File has been succesfully uploaded to a FOIA/composer"""
@@ -261,6 +272,306 @@ def key_name_comm(request):
     return JsonResponse({"key": key})
 
 
+# Multipart uploads
+#
+# Large files are uploaded directly to S3 in parts, which may be uploaded
+# concurrently and retried individually.  The upload is started and each part
+# is signed here, and the parts are assembled server side on completion,
+# after which the file is handled the same as a single upload.  The token
+# returned when starting an upload ties it to the user who started it, the
+# object it is being uploaded to and the key generated for it, and must be
+# passed to every other multipart view.
+
+MULTIPART_SALT = "muckrock.fine_uploader.multipart"
+# incomplete uploads may be resumed for up to a week
+MULTIPART_MAX_AGE = 7 * 24 * 60 * 60
+# S3 does not allow more parts than this in a single upload
+MULTIPART_MAX_PARTS = 10000
+MULTIPART_URL_EXPIRES = 60 * 60
+
+
+def _load_upload(request):
+    """Load the upload from its token, if it belongs to this user"""
+    try:
+        upload = signing.loads(
+            request.POST.get("token", ""),
+            salt=MULTIPART_SALT,
+            max_age=MULTIPART_MAX_AGE,
+        )
+    except signing.BadSignature:
+        return None
+    if upload["user"] != request.user.pk:
+        return None
+    return upload
+
+
+def _max_size(user):
+    """The largest file the user may upload, or None if there is no limit"""
+    if user.has_perm("foia.unlimited_attachment_size"):
+        return None
+    return settings.MAX_ATTACHMENT_SIZE
+
+
+def _list_parts(client, upload):
+    """List all of the parts uploaded so far"""
+    parts = []
+    kwargs = {
+        "Bucket": settings.AWS_STORAGE_BUCKET_NAME,
+        "Key": upload["key"],
+        "UploadId": upload["upload_id"],
+    }
+    while True:
+        response = client.list_parts(**kwargs)
+        parts.extend(response.get("Parts", []))
+        if not response.get("IsTruncated"):
+            return parts
+        kwargs["PartNumberMarker"] = response["NextPartNumberMarker"]
+
+
+def _upload_target(request, model):
+    """The object the file is being uploaded to, if the user may upload to it"""
+    try:
+        obj = model.objects.get(pk=request.POST.get("id"))
+    except (model.DoesNotExist, ValueError):
+        return None
+    foia = obj.foia if isinstance(obj, FOIACommunication) else obj
+    if foia is None or not foia.has_perm(request.user, "upload_attachment"):
+        return None
+    return obj
+
+
+def _multipart_create(request, target, model, make_file):
+    """Start a multipart upload to the target object, returning the token for
+    the upload
+
+    The key is generated here from the file's name, under the path files for
+    the target are uploaded to, and is recorded in the token, so only keys for
+    new files may be uploaded to, or cleaned up after a failed upload.  The
+    key includes a random directory, as checking the storage for a free name
+    would let two uploads started at once pick the same key
+    """
+    obj = _upload_target(request, model)
+    if obj is None:
+        return HttpResponseForbidden()
+    name = request.POST.get("name", "")
+    if not name:
+        return HttpResponseBadRequest()
+    max_size = _max_size(request.user)
+    try:
+        size = int(request.POST.get("size", ""))
+    except ValueError:
+        return HttpResponseBadRequest()
+    if max_size is not None and size > max_size:
+        return JsonResponse({"error": "File is too large"}, status=400)
+
+    file_ = make_file(request.user, obj)
+    path, name = os.path.split(
+        file_.ffile.field.generate_filename(file_, _key_name_trim(name))
+    )
+    key = os.path.join(path, uuid.uuid4().hex, name)
+    client = s3.get_client("fine_uploader.multipart")
+    response = client.create_multipart_upload(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+        Key=key,
+        ACL=settings.AWS_DEFAULT_ACL,
+        ContentType=request.POST.get("type") or "application/octet-stream",
+    )
+    token = signing.dumps(
+        {
+            "user": request.user.pk,
+            "target": target,
+            "id": obj.pk,
+            "key": key,
+            "upload_id": response["UploadId"],
+        },
+        salt=MULTIPART_SALT,
+    )
+    return JsonResponse({"token": token, "key": key})
+
+
+@login_required
+@require_POST
+def multipart_create_request(request):
+    """Start a multipart upload to a FOIA"""
+    return _multipart_create(
+        request,
+        "request",
+        FOIARequest,
+        lambda user, foia: OutboundRequestAttachment(user=user, foia=foia),
+    )
+
+
+@login_required
+@require_POST
+def multipart_create_composer(request):
+    """Start a multipart upload to a composer"""
+    return _multipart_create(
+        request,
+        "composer",
+        FOIAComposer,
+        lambda user, composer: OutboundComposerAttachment(user=user, composer=composer),
+    )
+
+
+@login_required
+@require_POST
+def multipart_create_comm(request):
+    """Start a multipart upload directly to a communication"""
+    return _multipart_create(
+        request, "comm", FOIACommunication, lambda user, comm: FOIAFile(comm=comm)
+    )
+
+
+@login_required
+@require_POST
+def multipart_sign(request):
+    """Sign the given parts of a multipart upload, so they may be uploaded
+    directly to S3"""
+    upload = _load_upload(request)
+    if upload is None:
+        return HttpResponseForbidden()
+    try:
+        part_numbers = [int(p) for p in request.POST.getlist("parts")]
+    except ValueError:
+        return HttpResponseBadRequest()
+    if not part_numbers or not all(1 <= p <= MULTIPART_MAX_PARTS for p in part_numbers):
+        return HttpResponseBadRequest()
+
+    client = s3.get_client("fine_uploader.multipart")
+    urls = {
+        part_number: client.generate_presigned_url(
+            "upload_part",
+            Params={
+                "Bucket": settings.AWS_STORAGE_BUCKET_NAME,
+                "Key": upload["key"],
+                "UploadId": upload["upload_id"],
+                "PartNumber": part_number,
+            },
+            ExpiresIn=MULTIPART_URL_EXPIRES,
+        )
+        for part_number in part_numbers
+    }
+    return JsonResponse({"urls": urls})
+
+
+@login_required
+@require_POST
+def multipart_parts(request):
+    """List the parts which have been uploaded, so an interrupted upload may be
+    resumed"""
+    upload = _load_upload(request)
+    if upload is None:
+        return HttpResponseForbidden()
+    client = s3.get_client("fine_uploader.multipart")
+    try:
+        parts = _list_parts(client, upload)
+    except ClientError:
+        return HttpResponseBadRequest()
+    return JsonResponse(
+        {
+            "parts": [
+                {"number": p["PartNumber"], "etag": p["ETag"], "size": p["Size"]}
+                for p in parts
+            ]
+        }
+    )
+
+
+@login_required
+@require_POST
+def multipart_abort(request):
+    """Cancel a multipart upload, discarding any uploaded parts"""
+    upload = _load_upload(request)
+    if upload is None:
+        return HttpResponseForbidden()
+    client = s3.get_client("fine_uploader.multipart")
+    try:
+        client.abort_multipart_upload(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+            Key=upload["key"],
+            UploadId=upload["upload_id"],
+        )
+    except ClientError:
+        return HttpResponseBadRequest()
+    return HttpResponse()
+
+
+def _multipart_complete(request, target, success):
+    """Assemble the uploaded parts into the final file, and then handle it with
+    the given success view"""
+    upload = _load_upload(request)
+    if (
+        upload is None
+        or upload["target"] != target
+        or request.POST.get("id") != str(upload["id"])
+        or request.POST.get("key") != upload["key"]
+    ):
+        return HttpResponseForbidden()
+    client = s3.get_client("fine_uploader.multipart")
+    try:
+        parts = _list_parts(client, upload)
+    except ClientError:
+        return HttpResponseBadRequest()
+    if not parts:
+        return HttpResponseBadRequest()
+    max_size = _max_size(request.user)
+    if max_size is not None and sum(p["Size"] for p in parts) > max_size:
+        try:
+            client.abort_multipart_upload(
+                Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+                Key=upload["key"],
+                UploadId=upload["upload_id"],
+            )
+        except ClientError as exc:
+            # the upload is rejected whether or not its parts were discarded
+            logger.warning(
+                "Could not abort multipart upload %s: %s", upload["upload_id"], exc
+            )
+        return JsonResponse({"error": "File is too large"}, status=400)
+
+    try:
+        client.complete_multipart_upload(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+            Key=upload["key"],
+            UploadId=upload["upload_id"],
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": p["PartNumber"], "ETag": p["ETag"]} for p in parts
+                ]
+            },
+        )
+    except ClientError:
+        return HttpResponseBadRequest()
+
+    response = success(request)
+    if response.status_code != 200:
+        # the file was not attached to anything, so clean it up - the key
+        # was generated for this upload, so nothing else is stored there
+        FileDeletion.objects.enqueue([upload["key"]], invalidate=False)
+    return response
+
+
+@login_required
+@require_POST
+def multipart_complete_request(request):
+    """Complete a multipart upload to a FOIA"""
+    return _multipart_complete(request, "request", success_request)
+
+
+@login_required
+@require_POST
+def multipart_complete_composer(request):
+    """Complete a multipart upload to a composer"""
+    return _multipart_complete(request, "composer", success_composer)
+
+
+@login_required
+@require_POST
+def multipart_complete_comm(request):
+    """Complete a multipart upload directly to a communication"""
+    return _multipart_complete(request, "comm", success_comm)
+
+
 @login_required
 def blank(request):
     """Workaround for IE9 and older"""
@@ -20,13 +20,23 @@ class FOIAConfig(AppConfig):
         import django.utils.html
         import re
         import muckrock.foia.signals  # pylint: disable=unused-import,unused-variable
+        from muckrock.core import changes, page_cache, related
 
         FOIARequest = self.get_model("FOIARequest")
         FOIACommunication = self.get_model("FOIACommunication")
         FOIANote = self.get_model("FOIANote")
+        FOIAFile = self.get_model("FOIAFile")
         action.register(FOIARequest)
         action.register(FOIACommunication)
         action.register(FOIANote)
         search.register(FOIARequest.objects.get_public())
+        related.register(FOIARequest, user="composer__user", project="projects")
+        changes.register(FOIARequest)
+        changes.register(FOIACommunication, "foia")
+        changes.register(FOIANote, "foia")
+        changes.register(FOIAFile, "comm", "comm__foia")
+        page_cache.register(FOIARequest, "agency")
+        page_cache.register(FOIACommunication, "foia")
+        page_cache.register(FOIAFile, "comm__foia")
         # monkey patch the word_split regex so urlize works better
         django.utils.html.word_split_re = re.compile(r'([\s<>\(\)\[\]"\']+)')
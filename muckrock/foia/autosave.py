@@ -0,0 +1,173 @@
+"""
+Coalesced autosaving of draft composers
+
+Autosaves only send the fields which have changed.  Rather than writing each
+one to the database as it arrives, the changes are merged into a pending set in
+the cache, which is written out by a single trailing flush a few seconds after
+the first of them.  Anything which reads the draft for editing or submitting
+flushes the pending changes first.  The pending set is only read and written
+while holding a lock, so that changes merged at the same time are not lost - if
+the lock cannot be taken, the save or flush fails rather than risk losing them.
+
+Agencies may be changed by listing the ones to add and remove, or by sending
+the full list, which replaces any pending changes to them.
+"""
+
+# Django
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.text import slugify
+
+# Standard Library
+import logging
+import time
+from contextlib import contextmanager
+
+# MuckRock
+from muckrock.agency.models import Agency
+from muckrock.foia.exceptions import AutosaveLockError
+from muckrock.foia.models import FOIAComposer
+
+AUTOSAVE_KEY = "foia:composer_autosave:{}"
+AUTOSAVE_FLUSH_KEY = "foia:composer_autosave_flush:{}"
+AUTOSAVE_LOCK_KEY = "foia:composer_autosave_lock:{}"
+# the lock expires after this many seconds, in case its holder dies
+AUTOSAVE_LOCK_TIMEOUT = 5
+
+logger = logging.getLogger(__name__)
+
+# fields which are saved directly on the composer
+COMPOSER_FIELDS = [
+    "title",
+    "requested_docs",
+    "edited_boilerplate",
+    "embargo",
+    "permanent_embargo",
+    "parent",
+]
+
+
+def merge_changes(pending, changes):
+    """Merge newer changes into the pending changes"""
+    merged = dict(pending)
+    merged.update(
+        (k, v)
+        for k, v in changes.items()
+        if k not in ("agencies_add", "agencies_remove")
+    )
+    new_add = set(changes.get("agencies_add", ()))
+    new_remove = set(changes.get("agencies_remove", ()))
+    if "agencies" in changes:
+        # the full list replaces any pending changes to the agencies
+        merged.pop("agencies_add", None)
+        merged.pop("agencies_remove", None)
+    if "agencies" in merged:
+        merged["agencies"] = (set(merged["agencies"]) - new_remove) | new_add
+    else:
+        add = set(pending.get("agencies_add", ()))
+        remove = set(pending.get("agencies_remove", ()))
+        merged["agencies_add"] = (add - new_remove) | new_add
+        merged["agencies_remove"] = (remove - new_add) | new_remove
+    return merged
+
+
+@contextmanager
+def pending_lock(composer_pk):
+    """Hold the lock on the pending changes to a draft composer
+
+    The lock expires, so waiting for twice as long as it may be held always
+    gets it, unless it is being taken continuously, in which case an
+    AutosaveLockError is raised
+    """
+    key = AUTOSAVE_LOCK_KEY.format(composer_pk)
+    deadline = time.monotonic() + 2 * AUTOSAVE_LOCK_TIMEOUT
+    locked = cache.add(key, True, AUTOSAVE_LOCK_TIMEOUT)
+    while not locked and time.monotonic() < deadline:
+        time.sleep(0.05)
+        locked = cache.add(key, True, AUTOSAVE_LOCK_TIMEOUT)
+    if not locked:
+        logger.warning("Could not lock the autosave for composer %s", composer_pk)
+        raise AutosaveLockError
+    try:
+        yield
+    finally:
+        cache.delete(key)
+
+
+def save_changes(composer_pk, changes):
+    """Save changes to a draft composer, coalescing them with any other changes
+    made in the next few seconds"""
+    # pylint: disable=import-outside-toplevel
+    from muckrock.foia.tasks import flush_composer_autosave
+
+    delay = settings.COMPOSER_AUTOSAVE_DELAY
+    if delay <= 0:
+        apply_changes(composer_pk, changes)
+        return
+    key = AUTOSAVE_KEY.format(composer_pk)
+    with pending_lock(composer_pk):
+        # keep the changes around well past the flush, in case the worker is
+        # busy
+        cache.set(key, merge_changes(cache.get(key, {}), changes), delay * 60)
+    if cache.add(AUTOSAVE_FLUSH_KEY.format(composer_pk), True, delay * 60):
+        flush_composer_autosave.apply_async(args=(composer_pk,), countdown=delay)
+
+
+def flush_changes(composer_pk):
+    """Write out any pending changes to a draft composer"""
+    # clear the flush flag first, so changes merged from here on schedule
+    # another flush
+    cache.delete(AUTOSAVE_FLUSH_KEY.format(composer_pk))
+    key = AUTOSAVE_KEY.format(composer_pk)
+    # keep the lock while writing the changes, so that they are not overtaken
+    # by later changes flushed at the same time
+    with pending_lock(composer_pk):
+        changes = cache.get(key)
+        if changes:
+            cache.delete(key)
+            apply_changes(composer_pk, changes)
+
+
+@transaction.atomic
+def apply_changes(composer_pk, changes):
+    """Write changes to a draft composer to the database"""
+    composer = (
+        FOIAComposer.objects.select_for_update()
+        .filter(pk=composer_pk, status="started")
+        .first()
+    )
+    if composer is None:
+        # the composer has been submitted or deleted since the changes were made
+        return
+    fields = {f: changes[f] for f in COMPOSER_FIELDS if f in changes}
+    if "title" in fields:
+        fields["slug"] = slugify(fields["title"]) or "untitled"
+    if "parent" in fields:
+        fields["parent_id"] = fields.pop("parent")
+    if fields:
+        FOIAComposer.objects.filter(pk=composer_pk).update(**fields)
+    if "tags" in changes:
+        composer.tags.set(*changes["tags"])
+
+    if "agencies" in changes:
+        agencies = set(changes["agencies"])
+        current = set(composer.agencies.values_list("pk", flat=True))
+        add = agencies - current
+        remove = current - agencies
+    else:
+        add = changes.get("agencies_add")
+        remove = changes.get("agencies_remove")
+    if add:
+        composer.agencies.add(*add)
+    if remove:
+        composer.agencies.remove(*remove)
+        # delete the user's pending agencies which have been removed from
+        # composers and requests
+        Agency.objects.filter(
+            pk__in=remove,
+            status="pending",
+            user=composer.user,
+            composers=None,
+            foiarequest=None,
+        ).delete()
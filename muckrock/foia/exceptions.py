@@ -13,3 +13,7 @@ class SizeError(Exception):
 
 class InsufficientRequestsError(Exception):
     """User needs to purchase more requests"""
+
+
+class AutosaveLockError(Exception):
+    """The pending autosave changes to a composer could not be locked"""
@@ -206,6 +206,100 @@ class BaseComposerForm(forms.ModelForm):
         return cleaned_data
 
 
+class ComposerAutosaveForm(forms.Form):
+    """Validate the changes to a draft composer sent by autosave
+
+    Only the fields which are sent are changed.  Agencies may be changed by
+    sending the agencies to add and to remove, or by sending the full list of
+    agencies, which replaces the saved list along with any changes to it which
+    are still pending.
+    """
+
+    title = forms.CharField(max_length=255, required=False)
+    requested_docs = forms.CharField(required=False)
+    edited_boilerplate = forms.BooleanField(required=False)
+    embargo = forms.BooleanField(required=False)
+    permanent_embargo = forms.BooleanField(required=False)
+    tags = TagField(required=False)
+    parent = forms.ModelChoiceField(
+        queryset=FOIAComposer.objects.none(), required=False
+    )
+    agencies = forms.ModelMultipleChoiceField(
+        queryset=Agency.objects.none(), required=False
+    )
+    agencies_add = forms.ModelMultipleChoiceField(
+        queryset=Agency.objects.none(), required=False
+    )
+    agencies_remove = forms.ModelMultipleChoiceField(
+        queryset=Agency.objects.none(), required=False
+    )
+
+    def __init__(self, *args, **kwargs):
+        self.composer = kwargs.pop("composer")
+        user = kwargs.pop("user")
+        super(ComposerAutosaveForm, self).__init__(*args, **kwargs)
+        if not user.has_perm("foia.embargo_foiarequest"):
+            del self.fields["embargo"]
+        if not user.has_perm("foia.embargo_perm_foiarequest"):
+            del self.fields["permanent_embargo"]
+        self.fields["parent"].queryset = FOIAComposer.objects.get_viewable(
+            user
+        ).distinct()
+        agencies = Agency.objects.get_approved_and_pending(user)
+        self.fields["agencies"].queryset = agencies
+        self.fields["agencies_add"].queryset = agencies
+        self.fields["agencies_remove"].queryset = agencies
+
+    def clean_title(self):
+        """Make sure we have a non-blank(ish) title"""
+        return self.cleaned_data["title"].strip() or "Untitled"
+
+    def _clean_agencies(self, name):
+        """Remove exempt and uncooperative agencies"""
+        return {
+            a.pk for a in self.cleaned_data[name] if not (a.exempt or a.uncooperative)
+        }
+
+    def clean_agencies(self):
+        """Remove exempt and uncooperative agencies"""
+        return self._clean_agencies("agencies")
+
+    def clean_agencies_add(self):
+        """Remove exempt and uncooperative agencies"""
+        return self._clean_agencies("agencies_add")
+
+    def get_changes(self):
+        """The changes sent, as field values and agencies to add and remove"""
+        changes = {
+            name: self.cleaned_data[name]
+            for name in self.fields
+            if name in self.data and not name.startswith("agencies")
+        }
+        if changes.get("permanent_embargo"):
+            changes["embargo"] = True
+        if "parent" in changes:
+            # changes are kept in the cache until they are written out, so
+            # only keep the parent's id
+            parent = changes["parent"]
+            changes["parent"] = parent.pk if parent is not None else None
+        add = set()
+        remove = set()
+        if "agencies_add" in self.data:
+            add = self.cleaned_data["agencies_add"]
+        if "agencies_remove" in self.data:
+            remove = {a.pk for a in self.cleaned_data["agencies_remove"]}
+        if "agencies" in self.data:
+            # the full list of agencies was sent, which is compared to the
+            # saved list once any pending changes have been merged in
+            changes["agencies"] = (self.cleaned_data["agencies"] - remove) | add
+        else:
+            if add:
+                changes["agencies_add"] = add - remove
+            if remove:
+                changes["agencies_remove"] = remove
+        return changes
+
+
 class ComposerForm(ContactInfoForm, BuyRequestForm, BaseComposerForm):
     """Composer form, including optional subforms"""
 
@@ -0,0 +1,124 @@
+# Django
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+POPULATE_VISIBILITY = """
+    INSERT INTO foia_foiavisibility
+        (foia_id, user_id, organization_id, agency_id, public)
+    SELECT id, NULL, NULL, NULL, true FROM foia_foiarequest WHERE NOT embargo
+    UNION
+    SELECT foia.id, composer.user_id, NULL, NULL, false
+        FROM foia_foiarequest foia
+        JOIN foia_foiacomposer composer ON foia.composer_id = composer.id
+    UNION
+    SELECT foia.id, NULL, composer.organization_id, NULL, false
+        FROM foia_foiarequest foia
+        JOIN foia_foiacomposer composer ON foia.composer_id = composer.id
+        JOIN accounts_profile profile ON profile.user_id = composer.user_id
+        WHERE profile.org_share AND composer.organization_id IS NOT NULL
+    UNION
+    SELECT id, NULL, NULL, agency_id, false FROM foia_foiarequest
+        WHERE agency_id IS NOT NULL
+    UNION
+    SELECT foiarequest_id, user_id, NULL, NULL, false
+        FROM foia_foiarequest_edit_collaborators
+    UNION
+    SELECT foiarequest_id, user_id, NULL, NULL, false
+        FROM foia_foiarequest_read_collaborators
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("accounts", "0055_auto_20200901_1327"),
+        ("agency", "0030_agencymetrics"),
+        ("organization", "0032_auto_20200806_1115"),
+        ("foia", "0079_auto_20201210_1302"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FOIAVisibility",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("public", models.BooleanField(default=False)),
+                (
+                    "agency",
+                    models.ForeignKey(
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="agency.Agency",
+                    ),
+                ),
+                (
+                    "foia",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="visibility",
+                        to="foia.FOIARequest",
+                    ),
+                ),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="organization.Organization",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={"verbose_name_plural": "FOIA visibility"},
+        ),
+        migrations.AddIndex(
+            model_name="foiavisibility",
+            index=models.Index(
+                fields=["user", "foia"], name="foia_visibility_user_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="foiavisibility",
+            index=models.Index(
+                fields=["organization", "foia"], name="foia_visibility_org_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="foiavisibility",
+            index=models.Index(
+                fields=["agency", "foia"], name="foia_visibility_agency_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="foiavisibility",
+            index=models.Index(
+                condition=models.Q(public=True),
+                fields=["foia"],
+                name="foia_visibility_public_idx",
+            ),
+        ),
+        migrations.RunSQL(POPULATE_VISIBILITY, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,17 @@
+# Django
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("foia", "0080_foiavisibility")]
+
+    operations = [
+        migrations.AddField(
+            model_name="foiarequest",
+            name="datetime_changed",
+            field=models.DateTimeField(
+                auto_now=True, help_text="Date the request was last changed", null=True
+            ),
+        )
+    ]
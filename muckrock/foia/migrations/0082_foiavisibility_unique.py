@@ -0,0 +1,66 @@
+# Django
+from django.db import migrations, models
+
+REMOVE_DUPLICATES = """
+    DELETE FROM foia_foiavisibility a
+        USING foia_foiavisibility b
+        WHERE a.id > b.id
+        AND a.foia_id = b.foia_id
+        AND a.user_id IS NOT DISTINCT FROM b.user_id
+        AND a.organization_id IS NOT DISTINCT FROM b.organization_id
+        AND a.agency_id IS NOT DISTINCT FROM b.agency_id
+        AND a.public = b.public
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("foia", "0081_foiarequest_datetime_changed")]
+
+    operations = [
+        migrations.RunSQL(REMOVE_DUPLICATES, migrations.RunSQL.noop),
+        migrations.RemoveIndex(
+            model_name="foiavisibility", name="foia_visibility_user_idx"
+        ),
+        migrations.RemoveIndex(
+            model_name="foiavisibility", name="foia_visibility_org_idx"
+        ),
+        migrations.RemoveIndex(
+            model_name="foiavisibility", name="foia_visibility_agency_idx"
+        ),
+        migrations.RemoveIndex(
+            model_name="foiavisibility", name="foia_visibility_public_idx"
+        ),
+        migrations.AddConstraint(
+            model_name="foiavisibility",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(user__isnull=False),
+                fields=("user", "foia"),
+                name="foia_visibility_user_unique",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="foiavisibility",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(organization__isnull=False),
+                fields=("organization", "foia"),
+                name="foia_visibility_org_unique",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="foiavisibility",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(agency__isnull=False),
+                fields=("agency", "foia"),
+                name="foia_visibility_agency_unique",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="foiavisibility",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(public=True),
+                fields=("foia",),
+                name="foia_visibility_public_unique",
+            ),
+        ),
+    ]
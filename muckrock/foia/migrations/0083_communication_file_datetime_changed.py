@@ -0,0 +1,26 @@
+# Django
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("foia", "0082_foiavisibility_unique")]
+
+    operations = [
+        migrations.AddField(
+            model_name="foiacommunication",
+            name="datetime_changed",
+            field=models.DateTimeField(
+                auto_now=True,
+                help_text="Date the communication was last changed",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="foiafile",
+            name="datetime_changed",
+            field=models.DateTimeField(
+                auto_now=True, help_text="Date the file was last changed", null=True
+            ),
+        ),
+    ]
@@ -10,3 +10,4 @@ from muckrock.foia.models.file import *
 from muckrock.foia.models.multirequest import *
 from muckrock.foia.models.request import *
 from muckrock.foia.models.search import *
+from muckrock.foia.models.visibility import *
@@ -57,6 +57,9 @@ class FOIACommunication(models.Model):
 
     subject = models.CharField(max_length=255, blank=True, db_index=True)
     datetime = models.DateTimeField(db_index=True)
+    datetime_changed = models.DateTimeField(
+        auto_now=True, null=True, help_text="Date the communication was last changed"
+    )
 
     response = models.BooleanField(
         default=False, help_text="Is this a response (or a request)?"
@@ -21,13 +21,15 @@ from django.utils import timezone
 from django.utils.text import slugify
 
 # Standard Library
-from datetime import timedelta
+from datetime import date, timedelta
 from itertools import zip_longest
 
 # Third Party
 from taggit.managers import TaggableManager
 
 # MuckRock
+from muckrock.agency.utils import initial_communication_template
+from muckrock.core.models import FieldChangeMixin
 from muckrock.core.utils import TempDisconnectSignal
 from muckrock.foia.constants import COMPOSER_EDIT_DELAY, COMPOSER_SUBMIT_DELAY
 from muckrock.foia.models.file import FOIAFile
@@ -37,7 +39,7 @@ from muckrock.tags.models import TaggedItemBase
 STATUS = [("started", "Draft"), ("submitted", "Processing"), ("filed", "Filed")]
 
 
-class FOIAComposer(models.Model):
+class FOIAComposer(FieldChangeMixin, models.Model):
     """A FOIA request composer"""
 
     # pylint: disable=too-many-instance-attributes
@@ -78,6 +80,9 @@ class FOIAComposer(models.Model):
     objects = FOIAComposerQuerySet.as_manager()
     tags = TaggableManager(through=TaggedItemBase, blank=True)
 
+    # fields whose changes are acted on by signal handlers
+    tracked_fields = ("user", "organization")
+
     class Meta:
         verbose_name = "FOIA Composer"
 
@@ -133,6 +138,11 @@ class FOIAComposer(models.Model):
         self.delayed_id = result.id
         self.save()
 
+    def creation_progress(self):
+        """How many of this composer's requests have been created, out of the
+        total number of requests"""
+        return (self.foias.count(), self.agencies.count())
+
     def approved(self, contact_info=None):
         """A pending composer is approved for sending to the agencies"""
         for foia in self.foias.all():
@@ -227,3 +237,69 @@ class FOIAComposer(models.Model):
             a.ffile.size for a in self.pending_attachments.filter(user=user, sent=False)
         )
         return total_size > settings.MAX_ATTACHMENT_TOTAL_SIZE
+
+
+class ComposerSubmission:
+    """The data shared by all of the requests created from a composer
+
+    Creating a request needs the composer's tags and attachments, the agency's
+    calendar and proxy, and the rendered request text.  These are loaded once
+    here and reused for each agency, instead of for every request.
+    """
+
+    def __init__(self, composer, num_agencies=None):
+        self.composer = composer
+        if num_agencies is None:
+            num_agencies = composer.agencies.count()
+        self.multi = num_agencies > 1
+        self.tags = list(composer.tags.all())
+        self.attachments = list(
+            composer.pending_attachments.filter(user=composer.user, sent=False)
+        )
+        self._calendars = {}
+        self._proxy_info = {}
+        self._texts = {}
+
+    def get_title(self, agency):
+        """The title for the agency's request"""
+        if self.multi:
+            return "%s (%s)" % (self.composer.title, agency.name)
+        return self.composer.title
+
+    def get_date_due(self, jurisdiction):
+        """The due date for a request to the jurisdiction submitted today"""
+        if not jurisdiction.days:
+            return None
+        legal = jurisdiction.legal
+        if legal.pk not in self._calendars:
+            self._calendars[legal.pk] = jurisdiction.get_calendar()
+        return self._calendars[legal.pk].business_days_from(
+            date.today(), jurisdiction.days
+        )
+
+    def get_proxy_info(self, agency):
+        """The proxy information for the agency, which only depends on whether
+        it requires a proxy and which state it is in"""
+        key = (agency.requires_proxy, agency.jurisdiction.legal.pk)
+        if key not in self._proxy_info:
+            self._proxy_info[key] = agency.get_proxy_info()
+        return self._proxy_info[key]
+
+    def get_text(self, agency, from_user, proxy):
+        """The text of the initial communication to the agency"""
+        # edited boilerplate may refer to the agency by name
+        key = (
+            agency.jurisdiction.legal.pk,
+            from_user.pk,
+            proxy,
+            agency.name if self.composer.edited_boilerplate else None,
+        )
+        if key not in self._texts:
+            self._texts[key] = initial_communication_template(
+                [agency],
+                from_user.profile.full_name,
+                self.composer.requested_docs,
+                edited_boilerplate=self.composer.edited_boilerplate,
+                proxy=proxy,
+            )
+        return self._texts[key]
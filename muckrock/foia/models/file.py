@@ -35,6 +35,9 @@ class FOIAFile(models.Model):
     )
     title = models.CharField(max_length=255)
     datetime = models.DateTimeField(null=True, db_index=True)
+    datetime_changed = models.DateTimeField(
+        auto_now=True, null=True, help_text="Date the file was last changed"
+    )
     source = models.CharField(max_length=255, blank=True)
     description = models.TextField(blank=True)
     doc_id = models.SlugField(max_length=266, blank=True, editable=False)
@@ -26,7 +26,6 @@ from datetime import date, timedelta
 from hashlib import md5
 
 # Third Party
-from actstream.models import followers
 from constance import config
 from django_mailgun import MailgunAPIError
 from reversion import revisions as reversion
@@ -42,12 +41,9 @@ from muckrock.communication.models import (
     EmailError,
     PhoneNumber,
 )
-from muckrock.core import utils
-from muckrock.core.utils import (
-    TempDisconnectSignal,
-    clear_cloudfront_cache,
-    get_s3_storage_bucket,
-)
+from muckrock.core import changes, follow, utils
+from muckrock.core.models import FieldChangeMixin, FileDeletion
+from muckrock.core.utils import TempDisconnectSignal
 from muckrock.foia.querysets import FOIARequestQuerySet
 from muckrock.tags.models import Tag, TaggedItemBase, normalize
 
@@ -71,7 +67,7 @@ STATUS = [
 END_STATUS = ["rejected", "no_docs", "done", "partial", "abandoned"]
 
 
-class FOIARequest(models.Model):
+class FOIARequest(FieldChangeMixin, models.Model):
     """A Freedom of Information Act request"""
 
     # pylint: disable=too-many-public-methods
@@ -87,6 +83,9 @@ class FOIARequest(models.Model):
     datetime_updated = models.DateTimeField(
         blank=True, null=True, db_index=True, help_text="Date of latest communication"
     )
+    datetime_changed = models.DateTimeField(
+        auto_now=True, null=True, help_text="Date the request was last changed"
+    )
     datetime_done = models.DateTimeField(
         blank=True, null=True, db_index=True, verbose_name="Date response received"
     )
@@ -184,6 +183,9 @@ class FOIARequest(models.Model):
     objects = FOIARequestQuerySet.as_manager()
     tags = TaggableManager(through=TaggedItemBase, blank=True)
 
+    # fields whose changes are acted on by signal handlers
+    tracked_fields = ("title", "status", "embargo", "agency", "price", "datetime_done")
+
     def __str__(self):
         return self.title
 
@@ -361,13 +363,6 @@ class FOIARequest(models.Model):
         """Who communications are to"""
         return self.agency.get_user()
 
-    def get_saved(self):
-        """Get the old model that is saved in the db"""
-        try:
-            return FOIARequest.objects.get(pk=self.pk)
-        except FOIARequest.DoesNotExist:
-            return None
-
     def latest_response(self):
         """How many days since the last response"""
         response = self.last_response()
@@ -396,18 +391,12 @@ class FOIARequest(models.Model):
         Mark any existing notifications with the same message as read,
         to avoid notifying users with duplicated information.
         """
-        identical_notifications = (
-            Notification.objects.for_object(self)
-            .get_unread()
-            .filter(
-                action__actor_object_id=action.actor_object_id, action__verb=action.verb
-            )
-        )
-        for notification in identical_notifications:
-            notification.mark_read()
+        Notification.objects.for_object(self).filter(
+            action__actor_object_id=action.actor_object_id, action__verb=action.verb
+        ).mark_read()
         utils.notify(self.composer.user, action)
         if self.is_public():
-            utils.notify(followers(self), action)
+            utils.notify(follow.followers_of(self), action)
 
     def submit(self, appeal=False, **kwargs):
         """
@@ -588,13 +577,18 @@ class FOIARequest(models.Model):
             "a suitable proxy does not exist.",
         )
 
-    def process_attachments(self, user, composer=False):
-        """Attach all outbound attachments to the last communication"""
-        if composer:
-            attm_source = self.composer
-        else:
-            attm_source = self
-        attachments = attm_source.pending_attachments.filter(user=user, sent=False)
+    def process_attachments(self, user, composer=False, attachments=None):
+        """Attach all outbound attachments to the last communication
+
+        The composer's attachments may be passed in if they have already been
+        loaded
+        """
+        if attachments is None:
+            if composer:
+                attm_source = self.composer
+            else:
+                attm_source = self
+            attachments = attm_source.pending_attachments.filter(user=user, sent=False)
         comm = self.communications.last()
         for attachment in attachments:
             file_ = comm.files.create(
@@ -1039,7 +1033,7 @@ class FOIARequest(models.Model):
         is_owner = self.created_by(user)
         is_agency_user = user.is_authenticated and user.profile.is_agency_user
         can_follow = user.is_authenticated and not is_owner and not is_agency_user
-        is_following = user.is_authenticated and user in followers(self)
+        is_following = follow.is_following(user, self)
         is_admin = user.is_staff
         kwargs = {
             "jurisdiction": self.jurisdiction.slug,
@@ -1211,15 +1205,16 @@ class FOIARequest(models.Model):
         )
         return comm
 
-    def create_initial_communication(self, from_user, proxy):
+    def create_initial_communication(self, from_user, proxy, text=None):
         """Create the initial request communication"""
-        text = initial_communication_template(
-            [self.agency],
-            from_user.profile.full_name,
-            self.composer.requested_docs,
-            edited_boilerplate=self.composer.edited_boilerplate,
-            proxy=proxy,
-        )
+        if text is None:
+            text = initial_communication_template(
+                [self.agency],
+                from_user.profile.full_name,
+                self.composer.requested_docs,
+                edited_boilerplate=self.composer.edited_boilerplate,
+                proxy=proxy,
+            )
         comm = self.communications.create(
             from_user=from_user,
             to_user=self.get_to_user(),
@@ -1270,11 +1265,15 @@ class FOIARequest(models.Model):
         sensitive data without destroying the history that a request existed with
         this MR number"""
         # pylint: disable=import-outside-toplevel
-        from muckrock.foia.models.communication import RawEmail
+        from muckrock.foia.models.communication import FOIACommunication, RawEmail
 
         self.delete_files()
         RawEmail.objects.filter(email__communication__foia=self).delete()
-        self.communications.all().update(communication="")
+        comm_ids = list(self.communications.values_list("pk", flat=True))
+        self.communications.all().update(
+            communication="", datetime_changed=timezone.now()
+        )
+        changes.record(FOIACommunication, comm_ids)
 
         if self.status not in END_STATUS and final_message:
             self.create_out_communication(user, final_message, user)
@@ -1287,8 +1286,8 @@ class FOIARequest(models.Model):
         self.save()
 
     def delete_files(self):
-        """Delete all files for this request, batching the delete from
-        cloudfront to avoid throttle errors
+        """Delete all files for this request, queueing their removal from s3 and
+        cloudfront in bulk to avoid throttle errors
         """
         # pylint: disable=import-outside-toplevel
         from muckrock.foia.models.file import FOIAFile
@@ -1300,18 +1299,10 @@ class FOIARequest(models.Model):
 
         if settings.CLEAN_S3_ON_FOIA_DELETE:
             # only delete from s3/cloudfront if we are using s3
+            FileDeletion.objects.enqueue(f.ffile.name for f in files)
 
-            # delete from s3
-            bucket = get_s3_storage_bucket()
-            for file_ in files:
-                key = bucket.get_key(file_.ffile.name)
-                if key:
-                    key.delete()
-
-            clear_cloudfront_cache([f.ffile.name for f in files])
-
-        # disconnect the post delete signal, since we have already cleaned up
-        # s3 and cloudfront here
+        # disconnect the post delete signal, since we have already queued the
+        # clean up of s3 and cloudfront here
         disconnect_kwargs = {
             "signal": post_delete,
             "receiver": foia_file_delete_s3,
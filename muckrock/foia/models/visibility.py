@@ -0,0 +1,85 @@
+"""
+Denormalized visibility of FOIA requests
+"""
+
+# Django
+from django.db import models
+from django.db.models import Q
+
+# MuckRock
+from muckrock.foia.querysets import FOIAVisibilityQuerySet
+
+
+class FOIAVisibility(models.Model):
+    """A principal who may view a request
+
+    Exactly one of user, organization or agency is set, or public is true.  An
+    organization entry lets all of its members view the request, and an agency
+    entry lets all of the agency's users view it.  These are kept up to date
+    with the request, its collaborators and its owner's sharing settings, so
+    that checking visibility is a single indexed lookup
+    """
+
+    foia = models.ForeignKey(
+        "foia.FOIARequest", on_delete=models.CASCADE, related_name="visibility"
+    )
+    user = models.ForeignKey(
+        "auth.User",
+        on_delete=models.CASCADE,
+        null=True,
+        related_name="+",
+        db_index=False,
+    )
+    organization = models.ForeignKey(
+        "organization.Organization",
+        on_delete=models.CASCADE,
+        null=True,
+        related_name="+",
+        db_index=False,
+    )
+    agency = models.ForeignKey(
+        "agency.Agency",
+        on_delete=models.CASCADE,
+        null=True,
+        related_name="+",
+        db_index=False,
+    )
+    public = models.BooleanField(default=False)
+
+    objects = FOIAVisibilityQuerySet.as_manager()
+
+    class Meta:
+        verbose_name_plural = "FOIA visibility"
+        # each principal may only be listed once per request, which also
+        # indexes the lookups by principal
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "foia"],
+                condition=Q(user__isnull=False),
+                name="foia_visibility_user_unique",
+            ),
+            models.UniqueConstraint(
+                fields=["organization", "foia"],
+                condition=Q(organization__isnull=False),
+                name="foia_visibility_org_unique",
+            ),
+            models.UniqueConstraint(
+                fields=["agency", "foia"],
+                condition=Q(agency__isnull=False),
+                name="foia_visibility_agency_unique",
+            ),
+            models.UniqueConstraint(
+                fields=["foia"],
+                condition=Q(public=True),
+                name="foia_visibility_public_unique",
+            ),
+        ]
+
+    def __str__(self):
+        if self.public:
+            principal = "public"
+        else:
+            principal = "user {} / org {} / agency {}".format(
+                self.user_id, self.organization_id, self.agency_id
+            )
+        return "Request {} visible to {}".format(self.foia_id, principal)
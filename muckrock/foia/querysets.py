@@ -3,10 +3,15 @@ QuerySets for the FOIA application
 """
 
 # Django
+from django.apps import apps
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.aggregates import StringAgg
 from django.db import models
 from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
 from django.utils import timezone
 from django.utils.text import slugify
 
@@ -18,6 +23,37 @@ from itertools import groupby
 from muckrock.agency.constants import STALE_REPLIES
 
 
+def visibility():
+    """The FOIA visibility manager, looked up lazily as the models import this"""
+    return apps.get_model("foia", "FOIAVisibility").objects
+
+
+def _aggregate(queryset, field, aggregate):
+    """A subquery of the aggregate over the rows of the queryset whose `field`
+    refers to the outer row"""
+    return Subquery(
+        queryset.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(value=aggregate)
+        .values("value")
+    )
+
+
+def _rows_hash(table, condition, columns=("id", "datetime_changed")):
+    """A hash of the given columns of each of the table's rows which match the
+    condition - these should be small columns which together change whenever
+    the row does, so large text columns need not be read"""
+    return RawSQL(
+        "SELECT md5(string_agg(concat_ws(':', {}), ',' ORDER BY r.id)) "
+        "FROM {} r WHERE {}".format(
+            ", ".join("r.{}".format(c) for c in columns), table, condition
+        ),
+        (),
+        output_field=models.CharField(),
+    )
+
+
 class PreloadFileQuerysetMixin:
     """Mixin for preloading related files"""
 
@@ -84,22 +120,9 @@ class FOIARequestQuerySet(models.QuerySet):
 
         if user.is_authenticated:
             # Requests are visible if you own them, have view or edit permissions,
-            # or if they are not embargoed
-            query = (
-                Q(composer__user=user)
-                | Q(pk__in=user.edit_access.all())
-                | Q(pk__in=user.read_access.all())
-                | ~Q(embargo=True)
-            )
-            # agency users may also view requests for their agency
-            if user.profile.is_agency_user:
-                query = query | Q(agency=user.profile.agency)
-            # organizational users may also view requests from their org that are shared
-            query = query | Q(
-                composer__user__profile__org_share=True,
-                composer__organization__in=user.organizations.all(),
-            )
-            return self.filter(query)
+            # if they are not embargoed, if they are shared with your organization
+            # or if you are a user for their agency
+            return self.filter(pk__in=visibility().for_user(user).values("foia_id"))
         else:
             # anonymous user, filter out embargoes
             return self.exclude(embargo=True)
@@ -201,20 +224,19 @@ class FOIARequestQuerySet(models.QuerySet):
         """Exclude requests made by org users"""
         return self.filter(composer__organization__individual=True)
 
-    def create_new(self, composer, agency):
-        """Create a new request and submit it"""
-        if composer.agencies.count() > 1:
-            title = "%s (%s)" % (composer.title, agency.name)
-        else:
-            title = composer.title
-        if agency.jurisdiction.days:
-            calendar = agency.jurisdiction.get_calendar()
-            date_due = calendar.business_days_from(
-                date.today(), agency.jurisdiction.days
-            )
-        else:
-            date_due = None
-        proxy_info = agency.get_proxy_info()
+    def create_new(self, composer, agency, submission=None):
+        """Create a new request and submit it
+
+        `submission` holds the data shared between all of the composer's
+        requests, and should be passed in when creating more than one
+        """
+        # pylint: disable=import-outside-toplevel
+        from muckrock.foia.models.composer import ComposerSubmission
+
+        if submission is None:
+            submission = ComposerSubmission(composer)
+        title = submission.get_title(agency)
+        proxy_info = submission.get_proxy_info(agency)
         foia = self.create(
             status="submitted",
             title=title,
@@ -223,14 +245,20 @@ class FOIARequestQuerySet(models.QuerySet):
             embargo=composer.embargo,
             permanent_embargo=composer.permanent_embargo,
             composer=composer,
-            date_due=date_due,
+            date_due=submission.get_date_due(agency.jurisdiction),
             missing_proxy=proxy_info["missing_proxy"],
         )
-        foia.tags.set(*composer.tags.all())
+        foia.tags.set(*submission.tags)
+        from_user = proxy_info.get("from_user", composer.user)
         foia.create_initial_communication(
-            proxy_info.get("from_user", composer.user), proxy=proxy_info["proxy"]
+            from_user,
+            proxy=proxy_info["proxy"],
+            text=submission.get_text(agency, from_user, proxy_info["proxy"]),
         )
-        foia.process_attachments(composer.user, composer=True)
+        foia.process_attachments(
+            composer.user, composer=True, attachments=submission.attachments
+        )
+        return foia
 
     def get_stale(self):
         """Get stale requests"""
@@ -256,6 +284,62 @@ class FOIARequestQuerySet(models.QuerySet):
         )
         return with_response.union(without_response)
 
+    def get_validators(self):
+        """The values which together change whenever a request, its
+        crowdfund, or any of its communications, files, notes or tags, change,
+        for answering conditional requests without loading the request"""
+        # pylint: disable=import-outside-toplevel
+        from muckrock.foia.models import FOIACommunication, FOIAFile, FOIANote
+        from muckrock.tags.models import TaggedItemBase
+
+        comms = FOIACommunication.objects.all()
+        files = FOIAFile.objects.all()
+        notes = FOIANote.objects.all()
+        tags = TaggedItemBase.objects.filter(
+            content_type=ContentType.objects.get_for_model(self.model)
+        )
+        # hashing the rows catches changes which are not reflected in the
+        # datetimes, such as a removed file or a payment to the crowdfund
+        return self.annotate(
+            row_hash=RawSQL("md5(foia_foiarequest::text)", ()),
+            crowdfund_hash=_rows_hash(
+                "crowdfund_crowdfund",
+                "r.id = foia_foiarequest.crowdfund_id",
+                ("id", "payment_received", "payment_required", "date_due", "closed"),
+            ),
+            comm_hash=_rows_hash(
+                "foia_foiacommunication", "r.foia_id = foia_foiarequest.id"
+            ),
+            comm_datetime=_aggregate(comms, "foia", Max("datetime")),
+            file_hash=_rows_hash(
+                "foia_foiafile",
+                "r.comm_id IN (SELECT id FROM foia_foiacommunication "
+                "WHERE foia_id = foia_foiarequest.id)",
+            ),
+            file_datetime=_aggregate(files, "comm__foia", Max("datetime")),
+            # notes are never edited, only added or removed
+            note_hash=_rows_hash(
+                "foia_foianote", "r.foia_id = foia_foiarequest.id", ("id",)
+            ),
+            note_datetime=_aggregate(notes, "foia", Max("datetime")),
+            tag_ids=_aggregate(
+                tags,
+                "object_id",
+                StringAgg(Cast("tag_id", models.CharField()), ",", ordering="tag_id"),
+            ),
+        ).values(
+            "datetime_changed",
+            "row_hash",
+            "crowdfund_hash",
+            "comm_hash",
+            "comm_datetime",
+            "file_hash",
+            "file_datetime",
+            "note_hash",
+            "note_datetime",
+            "tag_ids",
+        )
+
 
 class FOIAComposerQuerySet(models.QuerySet):
     """Custom Query Set for FOIA Composers"""
@@ -272,14 +356,17 @@ class FOIAComposerQuerySet(models.QuerySet):
             # * the request is public
             #   * not a draft
             #   * at leats one foia request is not embargoed
+            visible = visibility().for_user(user, agency=False)
             query = (
                 Q(user=user)
-                | Q(foias__read_collaborators=user)
-                | Q(foias__edit_collaborators=user)
-                | (~Q(status="started") & Q(foias__embargo=False))
+                | Q(pk__in=visible.filter(public=False).values("foia__composer_id"))
+                | (
+                    ~Q(status="started")
+                    & Q(pk__in=visible.filter(public=True).values("foia__composer_id"))
+                )
             )
             # organizational users may also view requests from their org
-            # that are shared
+            # that are shared, including drafts
             query = query | Q(user__profile__org_share=True, organization__users=user)
             return self.filter(query)
         else:
@@ -336,22 +423,27 @@ class FOIACommunicationQuerySet(PreloadFileQuerysetMixin, models.QuerySet):
         if user.is_authenticated:
             # Requests are visible if you own them, have view or edit permissions,
             # or if they are not embargoed
-            query = (
-                Q(foia__composer__user=user)
-                | Q(foia__in=user.edit_access.all())
-                | Q(foia__in=user.read_access.all())
-                | Q(foia__embargo=False)
-            )
-            # organizational users may also view requests from their org that are shared
-            query = query | Q(
-                foia__composer__user__profile__org_share=True,
-                foia__composer__organization__in=user.organizations.all(),
-            )
-            return self.filter(query)
+            visible = visibility().for_user(user, agency=False)
+            return self.filter(foia__in=visible.values("foia_id"))
         else:
             # anonymous user, filter out embargoes
             return self.filter(foia__embargo=False)
 
+    def get_validators(self):
+        """The values which together change whenever a communication, or any of
+        its files, change, for answering conditional requests without loading
+        the communication"""
+        # pylint: disable=import-outside-toplevel
+        from muckrock.foia.models import FOIAFile
+
+        files = FOIAFile.objects.all()
+        return self.annotate(
+            file_hash=_rows_hash(
+                "foia_foiafile", "r.comm_id = foia_foiacommunication.id"
+            ),
+            file_datetime=_aggregate(files, "comm", Max("datetime")),
+        ).values("datetime_changed", "file_hash", "file_datetime")
+
 
 class FOIAFileQuerySet(models.QuerySet):
     """Custom Queryset for FOIA Files"""
@@ -380,3 +472,86 @@ class FOIAFileQuerySet(models.QuerySet):
         for ext in settings.DOCCLOUD_EXTENSIONS:
             is_doccloud |= Q(ffile__iendswith=ext)
         return self.filter(is_doccloud)
+
+
+class FOIAVisibilityQuerySet(models.QuerySet):
+    """Custom Queryset for FOIA Visibility"""
+
+    def for_user(self, user, agency=True):
+        """Visibility entries granting access to the given user"""
+        query = Q(public=True)
+        if user.is_authenticated:
+            query |= Q(user=user) | Q(organization__in=user.organizations.all())
+            if agency and user.profile.is_agency_user:
+                query |= Q(agency=user.profile.agency_id)
+        return self.filter(query)
+
+    def get_principals(self, foia_ids):
+        """Calculate who should be able to view each of the given requests
+
+        Principals are (user id, organization id, agency id, public) tuples.
+        Organizations and agencies are stored as principals, instead of each of
+        their members, so membership changes do not need to update visibility
+        """
+        # pylint: disable=invalid-name
+        FOIARequest = self.model._meta.get_field("foia").related_model
+        principals = {}
+        foias = FOIARequest.objects.filter(pk__in=foia_ids).values_list(
+            "pk",
+            "embargo",
+            "agency_id",
+            "composer__user_id",
+            "composer__organization_id",
+            "composer__user__profile__org_share",
+        )
+        for foia_id, embargo, agency_id, user_id, org_id, org_share in foias:
+            principals[foia_id] = {(user_id, None, None, False)}
+            if agency_id is not None:
+                principals[foia_id].add((None, None, agency_id, False))
+            if not embargo:
+                principals[foia_id].add((None, None, None, True))
+            if org_share and org_id is not None:
+                principals[foia_id].add((None, org_id, None, False))
+        for through in (
+            FOIARequest.edit_collaborators.through,
+            FOIARequest.read_collaborators.through,
+        ):
+            collaborators = through.objects.filter(
+                foiarequest_id__in=principals
+            ).values_list("foiarequest_id", "user_id")
+            for foia_id, user_id in collaborators:
+                principals[foia_id].add((user_id, None, None, False))
+        return principals
+
+    def update_for(self, foia_ids):
+        """Bring the visibility entries for the given requests up to date"""
+        foia_ids = list(foia_ids)
+        principals = self.get_principals(foia_ids)
+        existing = self.filter(foia__in=foia_ids).values_list(
+            "pk", "foia_id", "user_id", "organization_id", "agency_id", "public"
+        )
+        stale = []
+        for pk, foia_id, *principal in existing:
+            principal = tuple(principal)
+            if principal in principals.get(foia_id, ()):
+                principals[foia_id].remove(principal)
+            else:
+                stale.append(pk)
+        if stale:
+            self.filter(pk__in=stale).delete()
+        # an update for the same request running at the same time may have
+        # already added some of these, which the unique constraints reject
+        self.bulk_create(
+            (
+                self.model(
+                    foia_id=foia_id,
+                    user_id=user_id,
+                    organization_id=org_id,
+                    agency_id=agency_id,
+                    public=public,
+                )
+                for foia_id, foia_principals in principals.items()
+                for user_id, org_id, agency_id, public in foia_principals
+            ),
+            ignore_conflicts=True,
+        )
@@ -14,6 +14,7 @@ from functools import wraps
 from rules import add_perm, is_authenticated, is_staff, predicate
 
 # MuckRock
+from muckrock.core.permissions import cached_permission_data
 from muckrock.foia.models.request import END_STATUS
 
 
@@ -50,6 +51,27 @@ def user_authenticated(func):
     return inner
 
 
+def edit_collaborator_ids(foia):
+    return cached_permission_data(
+        ("edit_collaborators", foia.pk),
+        lambda: set(foia.edit_collaborators.values_list("pk", flat=True)),
+    )
+
+
+def read_collaborator_ids(foia):
+    return cached_permission_data(
+        ("read_collaborators", foia.pk),
+        lambda: set(foia.read_collaborators.values_list("pk", flat=True)),
+    )
+
+
+def organization_ids(user):
+    return cached_permission_data(
+        ("organizations", user.pk),
+        lambda: set(user.organizations.values_list("pk", flat=True)),
+    )
+
+
 def has_status(*statuses):
     @predicate("has_status:%s" % ",".join(statuses))
     @skip_if_not_obj
@@ -73,20 +95,23 @@ def no_foia(user, foia):
 @predicate
 @skip_if_not_obj
 def is_editor(user, foia):
-    return user.is_authenticated and foia.edit_collaborators.filter(pk=user.pk).exists()
+    return user.is_authenticated and user.pk in edit_collaborator_ids(foia)
 
 
 @predicate
 @skip_if_not_obj
 def is_read_collaborator(user, foia):
-    return user.is_authenticated and foia.read_collaborators.filter(pk=user.pk).exists()
+    return user.is_authenticated and user.pk in read_collaborator_ids(foia)
 
 
 @predicate
 @skip_if_not_obj
 @user_authenticated
 def is_org_shared(user, foia):
-    return foia.user.profile.org_share and foia.composer.organization.has_member(user)
+    return (
+        foia.user.profile.org_share
+        and foia.composer.organization_id in organization_ids(user)
+    )
 
 
 is_viewer = is_read_collaborator | is_org_shared
@@ -104,7 +129,9 @@ is_private = is_embargoed
 @predicate
 @skip_if_not_obj
 def has_thanks(user, foia):
-    return foia.communications.filter(thanks=True).exists()
+    return cached_permission_data(
+        ("thanks", foia.pk), foia.communications.filter(thanks=True).exists
+    )
 
 
 is_thankable = ~has_thanks & has_status(*END_STATUS)
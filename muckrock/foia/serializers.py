@@ -65,7 +65,7 @@ class FOIAFileSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = FOIAFile
-        exclude = ("comm",)
+        exclude = ("comm", "datetime_changed")
 
     def get_ffile(self, obj):
         """Get the ffile URL safely"""
@@ -75,6 +75,23 @@ class FOIAFileSerializer(serializers.ModelSerializer):
             return ""
 
 
+class FOIAFileDetailSerializer(FOIAFileSerializer):
+    """Serializer for FOIA File model, outside of its communication"""
+
+    class Meta:
+        model = FOIAFile
+        fields = (
+            "id",
+            "comm",
+            "ffile",
+            "title",
+            "datetime",
+            "source",
+            "description",
+            "pages",
+        )
+
+
 class FOIACommunicationSerializer(serializers.ModelSerializer):
     """Serializer for FOIA Communication model"""
 
@@ -2,26 +2,45 @@
 
 # Django
 from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.utils import make_template_fragment_key
 from django.db import transaction
-from django.db.models.signals import post_delete, pre_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 
 # Third Party
 from documentcloud import DocumentCloud
 
 # MuckRock
-from muckrock.core.utils import clear_cloudfront_cache, get_s3_storage_bucket
-from muckrock.foia.models import FOIAFile, FOIARequest, OutboundRequestAttachment
+from muckrock.accounts.models import Profile
+from muckrock.core import changes, page_cache
+from muckrock.core.models import FileDeletion
+from muckrock.core.permissions import clear_permission_cache
+from muckrock.foia.models import (
+    FOIACommunication,
+    FOIAComposer,
+    FOIAFile,
+    FOIARequest,
+    FOIAVisibility,
+    OutboundRequestAttachment,
+)
 from muckrock.foia.tasks import upload_document_cloud
 
+# the cached fragments of the request detail page
+FOIA_DETAIL_FRAGMENTS = [
+    "foia_detail_open_graph",
+    "foia_detail_twitter_card",
+    "foia_detail_top",
+    "foia_detail_bottom",
+]
+
 
 @transaction.atomic
 def foia_update_embargo(sender, **kwargs):
     """When embargo has possibly been switched, update the document cloud permissions"""
     # pylint: disable=unused-argument
     request = kwargs["instance"]
-    old_request = request.get_saved()
     # if we are saving a new FOIA Request, there are no docs to update
-    if old_request and request.embargo != old_request.embargo:
+    if request.pk is not None and request.has_changed("embargo"):
         for doc in request.get_files().get_doccloud():
             transaction.on_commit(lambda doc=doc: upload_document_cloud.delay(doc.pk))
 
@@ -33,13 +52,7 @@ def foia_file_delete_s3(sender, **kwargs):
     if settings.CLEAN_S3_ON_FOIA_DELETE:
         # only delete if we are using s3
         foia_file = kwargs["instance"]
-
-        bucket = get_s3_storage_bucket()
-        key = bucket.get_key(foia_file.ffile.name)
-        if key:
-            key.delete()
-
-        clear_cloudfront_cache([foia_file.ffile.name])
+        FileDeletion.objects.enqueue([foia_file.ffile.name])
 
 
 def foia_file_delete_dc(sender, **kwargs):
@@ -65,11 +78,115 @@ def attachment_delete_s3(sender, **kwargs):
     if settings.CLEAN_S3_ON_FOIA_DELETE:
         # only delete if we are using s3
         attachment = kwargs["instance"]
+        FileDeletion.objects.enqueue([attachment.ffile.name], invalidate=False)
+
+
+def collaborators_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Collaborator changes invalidate any cached permission data, and change
+    who may view the requests"""
+    # pylint: disable=unused-argument
+    if not action.startswith("post_"):
+        return
+    clear_permission_cache()
+    if not reverse:
+        foia_ids = [instance.pk]
+    elif pk_set:
+        foia_ids = pk_set
+    else:
+        # a user's collaborations were cleared
+        foia_ids = FOIAVisibility.objects.filter(user=instance).values_list(
+            "foia_id", flat=True
+        )
+    foia_ids = list(foia_ids)
+    FOIAVisibility.objects.update_for(foia_ids)
+    # the change feed reports requests a user can no longer view
+    changes.record(FOIARequest, foia_ids)
+
+
+def foia_update_visibility(sender, instance, created, raw=False, **kwargs):
+    """Embargo or agency changes change who may view the request"""
+    # pylint: disable=unused-argument
+    if raw:
+        return
+    if created or instance.has_changed("embargo") or instance.has_changed("agency"):
+        FOIAVisibility.objects.update_for([instance.pk])
+
+
+def foia_clear_cache(sender, instance, created, raw=False, **kwargs):
+    """Clear the cached detail page for anonymous users when the parts of the
+    request shown at the top of it change"""
+    # pylint: disable=unused-argument
+    if raw or created:
+        return
+    if any(instance.has_changed(f) for f in ("title", "status", "embargo", "agency")):
+        # use the same cache as the cache template tags
+        try:
+            fragment_cache = caches["template_fragments"]
+        except InvalidCacheBackendError:
+            fragment_cache = caches["default"]
+        fragment_cache.delete_many(
+            [
+                make_template_fragment_key(fragment, [instance.pk, None])
+                for fragment in FOIA_DETAIL_FRAGMENTS
+            ]
+        )
 
-        bucket = get_s3_storage_bucket()
-        key = bucket.get_key(attachment.ffile.name)
-        if key:
-            key.delete()
+
+def foia_purge_page(sender, instance, raw=False, **kwargs):
+    """Purge the cached pages showing the request"""
+    # pylint: disable=unused-argument
+    if not raw:
+        page_cache.purge(instance)
+
+
+def communication_purge_page(sender, instance, raw=False, **kwargs):
+    """New or changed communications change the request's page"""
+    # pylint: disable=unused-argument
+    if not raw:
+        page_cache.purge(instance.foia)
+
+
+def file_purge_page(sender, instance, raw=False, **kwargs):
+    """New or changed files change the request's page"""
+    # pylint: disable=unused-argument
+    if not raw and instance.comm is not None:
+        page_cache.purge(instance.comm.foia)
+
+
+def composer_update_visibility(sender, instance, raw=False, **kwargs):
+    """The composer's owner and organization determine who a request is shared
+    with"""
+    # pylint: disable=unused-argument
+    if raw or not (
+        instance.has_changed("user") or instance.has_changed("organization")
+    ):
+        return
+    foia_ids = list(instance.foias.values_list("pk", flat=True))
+    if foia_ids:
+        FOIAVisibility.objects.update_for(foia_ids)
+        changes.record(FOIARequest, foia_ids)
+
+
+def profile_update_visibility(sender, instance, created, raw=False, **kwargs):
+    """Turning organization sharing on or off changes who may view the user's
+    requests"""
+    # pylint: disable=unused-argument
+    if raw or created or not instance.has_changed("org_share"):
+        return
+    foia_ids = list(
+        FOIARequest.objects.filter(composer__user_id=instance.user_id).values_list(
+            "pk", flat=True
+        )
+    )
+    FOIAVisibility.objects.update_for(foia_ids)
+    changes.record(FOIARequest, foia_ids)
+
+
+def communication_thanks(sender, instance, **kwargs):
+    """Thanking an agency invalidates any cached permission data"""
+    # pylint: disable=unused-argument
+    if instance.thanks:
+        clear_permission_cache()
 
 
 pre_save.connect(
@@ -78,6 +195,48 @@ pre_save.connect(
     dispatch_uid="muckrock.foia.signals.embargo",
 )
 
+post_save.connect(
+    foia_update_visibility,
+    sender=FOIARequest,
+    dispatch_uid="muckrock.foia.signals.update_visibility",
+)
+
+post_save.connect(
+    foia_clear_cache,
+    sender=FOIARequest,
+    dispatch_uid="muckrock.foia.signals.clear_cache",
+)
+
+post_save.connect(
+    foia_purge_page,
+    sender=FOIARequest,
+    dispatch_uid="muckrock.foia.signals.purge_page",
+)
+
+post_save.connect(
+    communication_purge_page,
+    sender=FOIACommunication,
+    dispatch_uid="muckrock.foia.signals.communication_purge_page",
+)
+
+post_save.connect(
+    file_purge_page,
+    sender=FOIAFile,
+    dispatch_uid="muckrock.foia.signals.file_purge_page",
+)
+
+post_save.connect(
+    composer_update_visibility,
+    sender=FOIAComposer,
+    dispatch_uid="muckrock.foia.signals.composer_update_visibility",
+)
+
+post_save.connect(
+    profile_update_visibility,
+    sender=Profile,
+    dispatch_uid="muckrock.foia.signals.profile_update_visibility",
+)
+
 post_delete.connect(
     foia_file_delete_s3,
     sender=FOIAFile,
@@ -95,3 +254,21 @@ post_delete.connect(
     sender=OutboundRequestAttachment,
     dispatch_uid="muckrock.foia.signals.attachment_delete_s3",
 )
+
+m2m_changed.connect(
+    collaborators_changed,
+    sender=FOIARequest.edit_collaborators.through,
+    dispatch_uid="muckrock.foia.signals.edit_collaborators_changed",
+)
+
+m2m_changed.connect(
+    collaborators_changed,
+    sender=FOIARequest.read_collaborators.through,
+    dispatch_uid="muckrock.foia.signals.read_collaborators_changed",
+)
+
+post_save.connect(
+    communication_thanks,
+    sender=FOIACommunication,
+    dispatch_uid="muckrock.foia.signals.communication_thanks",
+)
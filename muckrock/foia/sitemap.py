@@ -15,6 +15,8 @@ class FoiaSitemap(Sitemap):
     priority = 0.7
     changefreq = "weekly"
     limit = 500
+    # the fields each request's URL is built from
+    digest_fields = ("slug", "agency__jurisdiction_id", "agency__jurisdiction__slug")
 
     def items(self):
         """Return all public FOIA requests except for noindex requests"""
@@ -3,7 +3,8 @@
 # pylint: disable=too-many-lines
 
 # Django
-from celery.exceptions import SoftTimeLimitExceeded
+from celery import group
+from celery.exceptions import MaxRetriesExceededError, SoftTimeLimitExceeded
 from celery.schedules import crontab
 from celery.task import periodic_task, task
 from django.conf import settings
@@ -40,7 +41,6 @@ import dill as pickle
 import lob
 import numpy as np
 import requests
-from boto.s3.connection import S3Connection
 from constance import config
 from django_mailgun import MailgunAPIError
 from documentcloud import DocumentCloud
@@ -59,11 +59,20 @@ from muckrock.communication.models import (
     FaxError,
     MailCommunication,
 )
+from muckrock.core import s3
 from muckrock.core.models import ExtractDay
 from muckrock.core.tasks import AsyncFileDownloadTask
 from muckrock.core.utils import read_in_chunks
-from muckrock.foia.exceptions import SizeError
-from muckrock.foia.models import FOIACommunication, FOIAComposer, FOIAFile, FOIARequest
+from muckrock.foia.autosave import flush_changes
+from muckrock.foia.exceptions import AutosaveLockError, SizeError
+from muckrock.foia.models import (
+    ComposerSubmission,
+    FOIACommunication,
+    FOIAComposer,
+    FOIAFile,
+    FOIARequest,
+    FOIAVisibility,
+)
 from muckrock.task.models import (
     PaymentInfoTask,
     ResponseTask,
@@ -76,6 +85,17 @@ foia_url = r"(?P<jurisdiction>[\w\d_-]+)-(?P<jidx>\d+)/(?P<slug>[\w\d_-]+)-(?P<i
 
 logger = logging.getLogger(__name__)
 
+# a foia which fails to be created is retried after a minute, and then with
+# exponential backoff - the delayed submit waits on it for at least that long
+COMPOSER_CREATE_RETRY_DELAY = 60
+COMPOSER_CREATE_BACKOFF = 300
+COMPOSER_CREATE_MAX_RETRIES = 5
+COMPOSER_SUBMIT_RETRY_DELAY = 60
+COMPOSER_SUBMIT_MAX_RETRIES = (
+    COMPOSER_CREATE_RETRY_DELAY
+    + sum(COMPOSER_CREATE_BACKOFF * 2 ** i for i in range(COMPOSER_CREATE_MAX_RETRIES))
+) // COMPOSER_SUBMIT_RETRY_DELAY + 10
+
 client = Client(os.environ.get("SENTRY_DSN"))
 register_logger_signal(client)
 register_signal(client)
@@ -324,21 +344,126 @@ def retry_stuck_documents():
     ignore_result=True, max_retries=10, name="muckrock.foia.tasks.composer_create_foias"
 )
 def composer_create_foias(composer_pk, contact_info, **kwargs):
-    """Create all the foias for a composer"""
+    """Create all the foias for a composer
+
+    The agencies are split into chunks, each created in its own transaction by
+    its own task, so large multirequests are created in parallel
+    """
     # pylint: disable=unused-argument
     composer = FOIAComposer.objects.get(pk=composer_pk)
+    agency_ids = list(composer.agencies.order_by("pk").values_list("pk", flat=True))
     logger.info(
         "Starting composer_create_foias: (%s, %s, %s)",
         composer_pk,
         contact_info,
-        composer.agencies.count(),
+        len(agency_ids),
     )
+    chunk_size = settings.COMPOSER_CREATE_CHUNK_SIZE
+    if len(agency_ids) <= chunk_size:
+        composer_create_foias_chunk(composer_pk, agency_ids)
+    else:
+        group(
+            composer_create_foias_chunk.si(composer_pk, agency_ids[i : i + chunk_size])
+            for i in range(0, len(agency_ids), chunk_size)
+        ).delay()
+
+
+@task(ignore_result=True, name="muckrock.foia.tasks.composer_create_foias_chunk")
+def composer_create_foias_chunk(composer_pk, agency_ids, **kwargs):
+    """Create the foias for some of a composer's agencies
+
+    Agencies which fail are retried individually, so one bad agency does not
+    hold up the rest
+    """
+    # pylint: disable=unused-argument
+    composer = FOIAComposer.objects.get(pk=composer_pk)
+    submission = ComposerSubmission(composer)
+    failed = []
     with transaction.atomic():
-        for agency in composer.agencies.select_related(
-            "jurisdiction__law", "jurisdiction__parent__law"
-        ).iterator():
+        # skip any agencies which already have their request, in case this
+        # chunk is being run a second time
+        agencies = (
+            composer.agencies.filter(pk__in=agency_ids)
+            .exclude(foiarequest__composer=composer)
+            .select_related(
+                "jurisdiction__law",
+                "jurisdiction__parent__law",
+                "jurisdiction__parent__parent",
+            )
+        )
+        for agency in agencies:
             logger.info("Creating the foia for agency (%s, %s)", agency.pk, agency.name)
+            try:
+                with transaction.atomic():
+                    FOIARequest.objects.create_new(
+                        composer=composer, agency=agency, submission=submission
+                    )
+            except Exception:  # pylint: disable=broad-except
+                logger.error(
+                    "Error creating the foia for agency (%s, %s), retrying",
+                    agency.pk,
+                    agency.name,
+                    exc_info=sys.exc_info(),
+                )
+                failed.append(agency.pk)
+    for agency_pk in failed:
+        composer_create_foia.apply_async(
+            args=(composer_pk, agency_pk), countdown=COMPOSER_CREATE_RETRY_DELAY
+        )
+    _composer_foias_created(composer)
+
+
+@task(
+    ignore_result=True,
+    max_retries=COMPOSER_CREATE_MAX_RETRIES,
+    name="muckrock.foia.tasks.composer_create_foia",
+)
+def composer_create_foia(composer_pk, agency_pk, **kwargs):
+    """Retry creating the foia for a single agency of a composer
+
+    If it still cannot be created after the last retry, the agency is dropped
+    from the composer, so the rest of its requests may still be submitted
+    """
+    composer = FOIAComposer.objects.get(pk=composer_pk)
+    if not composer.foias.filter(agency=agency_pk).exists():
+        agency = composer.agencies.get(pk=agency_pk)
+        try:
             FOIARequest.objects.create_new(composer=composer, agency=agency)
+        except Exception as exc:  # pylint: disable=broad-except
+            retries = composer_create_foia.request.retries
+            if retries >= composer_create_foia.max_retries:
+                _composer_drop_agency(composer, agency)
+            else:
+                raise composer_create_foia.retry(
+                    countdown=COMPOSER_CREATE_BACKOFF * 2 ** retries,
+                    args=[composer_pk, agency_pk],
+                    kwargs=kwargs,
+                    exc=exc,
+                )
+    _composer_foias_created(composer)
+
+
+def _composer_drop_agency(composer, agency):
+    """Drop an agency whose request could not be created from the composer,
+    and refund the request for it"""
+    logger.error(
+        "Giving up on creating the foia for agency (%s, %s) for composer %s, "
+        "dropping the agency and refunding its request",
+        agency.pk,
+        agency.name,
+        composer.pk,
+        exc_info=sys.exc_info(),
+    )
+    with transaction.atomic():
+        composer.agencies.remove(agency)
+        composer.return_requests(1)
+
+
+def _composer_foias_created(composer):
+    """Finish up once all of the composer's foias have been created"""
+    created, total = composer.creation_progress()
+    logger.info("Created %d of %d foias for composer %s", created, total, composer.pk)
+    if created >= total:
         # mark all attachments as sent here, after all requests have been sent
         composer.pending_attachments.filter(user=composer.user, sent=False).update(
             sent=True
@@ -347,7 +472,25 @@ def composer_create_foias(composer_pk, contact_info, **kwargs):
 
 @task(
     ignore_result=True,
-    max_retries=10,
+    max_retries=5,
+    name="muckrock.foia.tasks.flush_composer_autosave",
+)
+def flush_composer_autosave(composer_pk, **kwargs):
+    """Write out the autosaved changes to a draft composer"""
+    try:
+        flush_changes(composer_pk)
+    except AutosaveLockError as exc:
+        raise flush_composer_autosave.retry(
+            countdown=settings.COMPOSER_AUTOSAVE_DELAY,
+            args=[composer_pk],
+            kwargs=kwargs,
+            exc=exc,
+        )
+
+
+@task(
+    ignore_result=True,
+    max_retries=COMPOSER_SUBMIT_MAX_RETRIES,
     name="muckrock.foia.tasks.composer_delayed_submit",
 )
 def composer_delayed_submit(composer_pk, approve, contact_info, **kwargs):
@@ -367,6 +510,28 @@ def composer_delayed_submit(composer_pk, approve, contact_info, **kwargs):
         return
 
     logger.info("Fetched the composer")
+    created, total = composer.creation_progress()
+    if created < total:
+        # the requests are still being created, wait for them to finish before
+        # sending them or creating the task to review them
+        logger.info("Waiting on %d of %d foias", total - created, total)
+        try:
+            composer_delayed_submit.retry(
+                countdown=COMPOSER_SUBMIT_RETRY_DELAY,
+                args=[composer_pk, approve, contact_info],
+                kwargs=kwargs,
+            )
+        except MaxRetriesExceededError:
+            # agencies which fail for good are dropped from the composer, so
+            # this should not happen - but rather than never submitting, go
+            # ahead with the requests which do exist
+            logger.error(
+                "Gave up waiting on %d of %d foias for composer %s, submitting "
+                "the rest",
+                total - created,
+                total,
+                composer_pk,
+            )
     # the delayed submit is processing,
     # clear the delayed id, it is too late to cancel
     composer.delayed_id = ""
@@ -736,9 +901,10 @@ def autoimport():
     def process(log):
         """Process the files"""
         log.append("Start Time: %s" % timezone.now())
-        conn = S3Connection(settings.AWS_ACCESS_KEY_ID, settings.AWS_SECRET_ACCESS_KEY)
-        bucket = conn.get_bucket(settings.AWS_AUTOIMPORT_BUCKET_NAME)
-        storage_bucket = conn.get_bucket(settings.AWS_STORAGE_BUCKET_NAME)
+        bucket = s3.get_bucket(
+            "foia.tasks.autoimport", settings.AWS_AUTOIMPORT_BUCKET_NAME
+        )
+        storage_bucket = s3.get_bucket("foia.tasks.autoimport")
         for key in bucket.list(prefix="scans/", delimiter="/"):
             if key.name == "scans/":
                 continue
@@ -956,8 +1122,7 @@ def clean_export_csv():
     p_csv = re.compile(
         r"(\d{4})/(\d{2})/(\d{2})/[0-9a-f]+/(?:requests?|results)\.(?:csv|zip)"
     )
-    conn = S3Connection(settings.AWS_ACCESS_KEY_ID, settings.AWS_SECRET_ACCESS_KEY)
-    bucket = conn.get_bucket(settings.AWS_STORAGE_BUCKET_NAME)
+    bucket = s3.get_bucket("foia.tasks.clean_export_csv")
     older_than = date.today() - timedelta(5)
     for prefix in ["exported_csv/", "zip_request/"]:
         for key in bucket.list(prefix=prefix):
@@ -1135,3 +1300,15 @@ def _lob_create_check(comm, prepared_pdf, mail, check_address, amount):
     )
     mr_check.send_email()
     return check
+
+
+@periodic_task(
+    run_every=crontab(day_of_week="saturday", hour=3, minute=0),
+    name="muckrock.foia.tasks.sync_visibility",
+)
+def sync_visibility(batch_size=1000):
+    """Bring all request visibility entries up to date, in case any changes were
+    made without sending signals"""
+    foia_ids = list(FOIARequest.objects.order_by("pk").values_list("pk", flat=True))
+    for i in range(0, len(foia_ids), batch_size):
+        FOIAVisibility.objects.update_for(foia_ids[i : i + batch_size])
@@ -23,7 +23,12 @@ from muckrock.core.factories import (
     ProfessionalUserFactory,
     UserFactory,
 )
-from muckrock.core.test_utils import mock_squarelet
+from muckrock.core.test_utils import RunCommitHooksMixin, mock_squarelet
+from muckrock.foia.factories import (
+    FOIACommunicationFactory,
+    FOIAFileFactory,
+    FOIARequestFactory,
+)
 from muckrock.foia.models import FOIAComposer
 
 
@@ -262,3 +267,111 @@ class TestFOIAViewsetCreate(TestCase):
             code=402,
             status="Out of requests.  FOI Request has been saved.",
         )
+
+
+class TestFOIAViewsetConditional(TestCase):
+    """Unchanged requests and communications are answered with a 304"""
+
+    def test_conditional_retrieve(self):
+        """Test retrieving with an ETag"""
+        foia = FOIARequestFactory()
+        comm = FOIACommunicationFactory(foia=foia)
+        Token.objects.create(user=foia.user)
+        headers = {"HTTP_AUTHORIZATION": "Token %s" % foia.user.auth_token}
+        foia_url = reverse("api-foia-detail", kwargs={"pk": foia.pk})
+        comm_url = reverse("api-communication-detail", kwargs={"pk": comm.pk})
+        for url in (foia_url, comm_url):
+            response = self.client.get(url, **headers)
+            eq_(response.status_code, 200)
+            response = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response["ETag"], **headers
+            )
+            eq_(response.status_code, 304)
+
+        etag = self.client.get(foia_url, **headers)["ETag"]
+        # other users see a different representation
+        response = self.client.get(foia_url, HTTP_IF_NONE_MATCH=etag)
+        eq_(response.status_code, 200)
+        FOIAFileFactory(comm=comm)
+        response = self.client.get(foia_url, HTTP_IF_NONE_MATCH=etag, **headers)
+        eq_(response.status_code, 200)
+
+        # If-Modified-Since alone does not cover everything in the ETag
+        response = self.client.get(foia_url, **headers)
+        response = self.client.get(
+            foia_url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"], **headers
+        )
+        eq_(response.status_code, 200)
+
+        # editing a communication changes both it and its request
+        etags = [
+            self.client.get(url, **headers)["ETag"] for url in (foia_url, comm_url)
+        ]
+        comm.communication = "Edited"
+        comm.save()
+        for url, etag in zip((foia_url, comm_url), etags):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **headers)
+            eq_(response.status_code, 200)
+
+
+class TestFOIAViewsetChanges(RunCommitHooksMixin, TestCase):
+    """Changed requests, communications and files are listed from a cursor"""
+
+    def test_changes(self):
+        """Test reading the change feeds"""
+        foia = FOIARequestFactory()
+        comm = FOIACommunicationFactory(foia=foia)
+        Token.objects.create(user=foia.user)
+        headers = {"HTTP_AUTHORIZATION": "Token %s" % foia.user.auth_token}
+        foia_url = reverse("api-foia-changes")
+        # changes are logged once they are committed
+        self.run_commit_hooks()
+
+        response = self.client.get(foia_url, **headers)
+        eq_(response.status_code, 200)
+        eq_([r["id"] for r in response.json()["results"]], [foia.pk])
+        cursor = response.json()["cursor"]
+        response = self.client.get(foia_url, {"cursor": cursor}, **headers)
+        eq_(response.json()["results"], [])
+
+        # adding a file changes its communication and request
+        file_ = FOIAFileFactory(comm=comm)
+        self.run_commit_hooks()
+        for url, pk in [
+            (foia_url, foia.pk),
+            (reverse("api-communication-changes"), comm.pk),
+            (reverse("api-file-changes"), file_.pk),
+        ]:
+            response = self.client.get(url, {"cursor": cursor}, **headers)
+            eq_(response.status_code, 200)
+            eq_([r["id"] for r in response.json()["results"]], [pk])
+
+        comm_pk = comm.pk
+        comm.delete()
+        self.run_commit_hooks()
+        response = self.client.get(
+            reverse("api-communication-changes"), {"cursor": cursor}, **headers
+        )
+        eq_(response.json()["results"], [{"id": comm_pk, "deleted": True}])
+
+        response = self.client.get(foia_url, {"cursor": "invalid"}, **headers)
+        eq_(response.status_code, 400)
+
+    def test_collaborator_changes(self):
+        """Requests a user loses access to are listed as deleted for them"""
+        foia = FOIARequestFactory(embargo=True)
+        user = UserFactory()
+        foia.add_viewer(user)
+        Token.objects.create(user=user)
+        headers = {"HTTP_AUTHORIZATION": "Token %s" % user.auth_token}
+        foia_url = reverse("api-foia-changes")
+        self.run_commit_hooks()
+
+        response = self.client.get(foia_url, **headers)
+        eq_([r["id"] for r in response.json()["results"]], [foia.pk])
+        cursor = response.json()["cursor"]
+
+        foia.remove_viewer(user)
+        self.run_commit_hooks()
+        response = self.client.get(foia_url, {"cursor": cursor}, **headers)
+        eq_(response.json()["results"], [{"id": foia.pk, "deleted": True}])
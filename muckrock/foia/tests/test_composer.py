@@ -7,9 +7,10 @@ Tests for the FOIA Composer
 
 # Django
 from django.contrib.auth.models import AnonymousUser
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 # Third Party
+from mock import patch
 from nose.tools import assert_false, assert_true, eq_, ok_
 
 # MuckRock
@@ -17,6 +18,12 @@ from muckrock.core.factories import AgencyFactory, UserFactory
 from muckrock.foia.factories import FOIAComposerFactory, FOIARequestFactory
 from muckrock.foia.forms.composers import BaseComposerForm
 from muckrock.foia.models import FOIAComposer
+from muckrock.foia.tasks import (
+    COMPOSER_CREATE_MAX_RETRIES,
+    composer_create_foia,
+    composer_create_foias,
+    composer_create_foias_chunk,
+)
 from muckrock.organization.factories import MembershipFactory, OrganizationFactory
 
 
@@ -53,6 +60,42 @@ class TestFOIAComposer(TestCase):
                 {"regular": reg, "monthly": monthly},
             )
 
+    @override_settings(COMPOSER_CREATE_CHUNK_SIZE=2)
+    def test_create_foias(self):
+        """Test creating the requests for a composer in chunks"""
+        composer = FOIAComposerFactory(status="submitted", title="Test")
+        agencies = AgencyFactory.create_batch(3)
+        composer.agencies.set(agencies)
+        eq_(composer.creation_progress(), (0, 3))
+        composer_create_foias(composer.pk, None)
+        eq_(composer.creation_progress(), (3, 3))
+        eq_(
+            set(composer.foias.values_list("title", flat=True)),
+            {"Test ({})".format(agency.name) for agency in agencies},
+        )
+        ok_(all(foia.communications.count() == 1 for foia in composer.foias.all()))
+        # running a chunk again does not create duplicate requests
+        composer_create_foias_chunk(composer.pk, [a.pk for a in agencies])
+        eq_(composer.creation_progress(), (3, 3))
+
+    def test_create_foia_give_up(self):
+        """An agency whose request still cannot be created after the last retry
+        is dropped, and its request refunded, so the rest may be submitted"""
+        composer = FOIAComposerFactory(status="submitted", num_reg_requests=2)
+        agencies = AgencyFactory.create_batch(2)
+        composer.agencies.set(agencies)
+        FOIARequestFactory(composer=composer, agency=agencies[0])
+        with patch(
+            "muckrock.foia.querysets.FOIARequestQuerySet.create_new",
+            side_effect=ValueError,
+        ):
+            composer_create_foia.apply(
+                args=(composer.pk, agencies[1].pk), retries=COMPOSER_CREATE_MAX_RETRIES
+            )
+        composer.refresh_from_db()
+        eq_(composer.creation_progress(), (1, 1))
+        eq_(composer.num_reg_requests, 1)
+
 
 class TestFOIAComposerQueryset(TestCase):
     """Test the foia composer queryset"""
@@ -10,6 +10,7 @@ Tests using nose for the FOIA application
 # Django
 from django.contrib.auth.models import AnonymousUser
 from django.core import mail
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 from django.urls import reverse
 from django.utils import timezone
@@ -36,7 +37,12 @@ from muckrock.foia.factories import (
     FOIAFileFactory,
     FOIARequestFactory,
 )
-from muckrock.foia.models import FOIACommunication, FOIARequest, RawEmail
+from muckrock.foia.models import (
+    FOIACommunication,
+    FOIARequest,
+    FOIAVisibility,
+    RawEmail,
+)
 from muckrock.task.models import PaymentInfoTask, SnailMailTask
 
 
@@ -133,6 +139,52 @@ class TestFOIARequestUnit(RunCommitHooksMixin, TestCase):
         foias = FOIARequest.objects.get_viewable(user)
         nose.tools.assert_in(foia, foias)
 
+    def test_foia_visibility_updates(self):
+        """Visibility should follow collaborator and embargo changes"""
+        user = UserFactory()
+        foia = FOIARequestFactory(embargo=True)
+        nose.tools.assert_not_in(foia, FOIARequest.objects.get_viewable(user))
+
+        user.read_access.add(foia)
+        nose.tools.assert_in(foia, FOIARequest.objects.get_viewable(user))
+
+        user.read_access.clear()
+        nose.tools.assert_not_in(foia, FOIARequest.objects.get_viewable(user))
+
+        foia.embargo = False
+        foia.save()
+        nose.tools.assert_in(foia, FOIARequest.objects.get_viewable(user))
+
+    def test_foia_visibility_no_duplicates(self):
+        """Each principal should only be listed once per request"""
+        foia = FOIARequestFactory(embargo=False)
+        count = FOIAVisibility.objects.filter(foia=foia).count()
+        FOIAVisibility.objects.update_for([foia.pk])
+        nose.tools.eq_(FOIAVisibility.objects.filter(foia=foia).count(), count)
+        with nose.tools.assert_raises(IntegrityError):
+            with transaction.atomic():
+                FOIAVisibility.objects.create(foia=foia, public=True)
+
+    def test_foia_field_changes(self):
+        """Changes to tracked fields should be detected without a query"""
+        ok_(FOIARequest(status="started").has_changed("status"))
+        foia = FOIARequest.objects.get(pk=self.foia.pk)
+        with self.assertNumQueries(0):
+            ok_(not foia.has_changed("status"))
+            foia.status = "done"
+            ok_(foia.has_changed("status"))
+            eq_(foia.saved_value("status"), "submitted")
+            eq_(foia.changed_fields(), ["status"])
+        foia.save()
+        ok_(not foia.has_changed("status"))
+        eq_(foia.saved_value("status"), "done")
+
+        foia = FOIARequest.objects.only("pk", "title").get(pk=self.foia.pk)
+        ok_(not foia.has_changed("status"))
+        foia.refresh_from_db(fields=["status"])
+        foia.status = "ack"
+        ok_(foia.has_changed("status"))
+
     def test_foia_set_mail_id(self):
         """Test the set_mail_id function"""
         foia = FOIARequestFactory()
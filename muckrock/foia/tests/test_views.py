@@ -7,9 +7,11 @@ Tests for the FOIA views
 
 # Django
 from django.contrib.auth.models import AnonymousUser, User
+from django.db import connection
 from django.http.request import QueryDict
 from django.http.response import Http404
-from django.test import RequestFactory, TestCase
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import resolve, reverse
 from django.utils import timezone
 
@@ -22,6 +24,7 @@ from operator import attrgetter
 import nose.tools
 import requests_mock
 from actstream.actions import follow, is_following, unfollow
+from mock import patch
 from nose.tools import (
     assert_false,
     assert_in,
@@ -34,6 +37,7 @@ from nose.tools import (
 )
 
 # MuckRock
+from muckrock.agency.models import Agency
 from muckrock.core.factories import (
     AgencyFactory,
     AppealAgencyFactory,
@@ -45,12 +49,13 @@ from muckrock.core.factories import (
 from muckrock.core.test_utils import http_post_response, mock_middleware, mock_squarelet
 from muckrock.core.tests import get_404, get_allowed
 from muckrock.crowdfund.models import Crowdfund
+from muckrock.foia.autosave import flush_changes
 from muckrock.foia.factories import (
     FOIACommunicationFactory,
     FOIAComposerFactory,
     FOIARequestFactory,
 )
-from muckrock.foia.models import FOIAComposer, FOIARequest
+from muckrock.foia.models import FOIACommunication, FOIAComposer, FOIARequest
 from muckrock.foia.views import (
     ComposerDetail,
     CreateComposer,
@@ -207,6 +212,27 @@ class TestFOIAViews(TestCase):
         )
 
 
+class TestRequestDetailPermissionCache(TestCase):
+    """Permission data should be loaded once per page"""
+
+    def test_collaborator_queries(self):
+        """Rendering the detail page for a collaborator should look up each kind of
+        collaborator only once, no matter how many permissions are checked"""
+        foia = FOIARequestFactory()
+        user = UserFactory()
+        foia.add_viewer(user)
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(foia.get_absolute_url())
+        eq_(response.status_code, 200)
+        for table in (
+            "foia_foiarequest_edit_collaborators",
+            "foia_foiarequest_read_collaborators",
+        ):
+            queries = [q for q in context.captured_queries if table in q["sql"]]
+            eq_(len(queries), 1, "{} queried {} times".format(table, len(queries)))
+
+
 class TestRequestDetailView(TestCase):
     """Request detail views support a wide variety of interactions"""
 
@@ -223,6 +249,32 @@ class TestRequestDetailView(TestCase):
         }
         UserFactory(username="MuckrockStaff")
 
+    def test_conditional_get(self):
+        """Unchanged requests are answered with a 304, before loading them"""
+
+        def get(user=None, **headers):
+            request = RequestFactory().get(self.url, **headers)
+            request = mock_middleware(request)
+            request.user = user or AnonymousUser()
+            return self.view(request, **self.kwargs)
+
+        comm = FOIACommunicationFactory(foia=self.foia)
+        response = get()
+        eq_(response.status_code, 200)
+        etag = response["ETag"]
+        ok_(response.has_header("Last-Modified"))
+        with CaptureQueriesContext(connection) as queries:
+            eq_(get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        ok_(len(queries) < 5)
+        # logged in users are never answered conditionally
+        ok_(not get(self.foia.user).has_header("ETag"))
+        self.foia.tags.add("foo")
+        eq_(get(HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        etag = get()["ETag"]
+        # edits which do not change any timestamps still change the page
+        FOIACommunication.objects.filter(pk=comm.pk).update(communication="Edited")
+        eq_(get(HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
     def test_add_tags(self):
         """Posting a collection of tags to a request should update its tags."""
         data = {"action": "tags", "tags": ["foo", "bar"]}
@@ -1181,6 +1233,134 @@ class TestFOIAComposerViews(TestCase):
         eq_(composer.title, "New Title")
         eq_(composer.requested_docs, "ABC")
 
+    def test_autosave_agencies(self):
+        """Test autosaving changes to the agencies"""
+        composer = FOIAComposerFactory(status="started")
+        kept, removed, added = AgencyFactory.create_batch(3)
+        pending = AgencyFactory(status="pending", user=composer.user)
+        composer.agencies.set([kept, removed, pending])
+        request = self.request_factory.post(
+            reverse("foia-autosave", kwargs={"idx": composer.pk}),
+            {"agencies_add": [added.pk], "agencies_remove": [removed.pk, pending.pk]},
+        )
+        request.user = composer.user
+        request = mock_middleware(request)
+        response = autosave(request, idx=composer.pk)
+        eq_(response.status_code, 200)
+        eq_(set(composer.agencies.all()), {kept, added})
+        # the pending agency is no longer used anywhere
+        assert_false(Agency.objects.filter(pk=pending.pk).exists())
+        assert_true(Agency.objects.filter(pk=removed.pk).exists())
+
+    def test_autosave_remove_others_agency(self):
+        """Another user's pending agencies may not be removed"""
+        composer = FOIAComposerFactory(status="started")
+        pending = AgencyFactory(status="pending")
+        request = self.request_factory.post(
+            reverse("foia-autosave", kwargs={"idx": composer.pk}),
+            {"agencies_remove": [pending.pk]},
+        )
+        request.user = composer.user
+        request = mock_middleware(request)
+        response = autosave(request, idx=composer.pk)
+        eq_(response.status_code, 400)
+        assert_true(Agency.objects.filter(pk=pending.pk).exists())
+
+    @override_settings(
+        COMPOSER_AUTOSAVE_DELAY=10,
+        CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        },
+    )
+    def test_autosave_coalesce(self):
+        """Autosaves are coalesced until they are flushed"""
+        composer = FOIAComposerFactory(status="started", title="Old Title")
+        agency = AgencyFactory()
+        url = reverse("foia-autosave", kwargs={"idx": composer.pk})
+        with patch("muckrock.foia.tasks.flush_composer_autosave.apply_async") as flush:
+            for data in [
+                {"title": "First Title"},
+                {"agencies_add": [agency.pk]},
+                {"title": "Second Title", "requested_docs": "ABC"},
+            ]:
+                request = self.request_factory.post(url, data)
+                request.user = composer.user
+                request = mock_middleware(request)
+                eq_(autosave(request, idx=composer.pk).status_code, 200)
+            # only one flush is scheduled for all of the changes
+            eq_(flush.call_count, 1)
+        composer.refresh_from_db()
+        eq_(composer.title, "Old Title")
+        flush_changes(composer.pk)
+        composer.refresh_from_db()
+        eq_(composer.title, "Second Title")
+        eq_(composer.slug, "second-title")
+        eq_(composer.requested_docs, "ABC")
+        eq_(list(composer.agencies.all()), [agency])
+
+    def test_autosave_parent(self):
+        """The request a draft was cloned from is autosaved"""
+        parent = FOIAComposerFactory(status="submitted")
+        composer = FOIAComposerFactory(status="started", user=parent.user)
+        request = self.request_factory.post(
+            reverse("foia-autosave", kwargs={"idx": composer.pk}),
+            {"parent": parent.pk},
+        )
+        request.user = composer.user
+        request = mock_middleware(request)
+        response = autosave(request, idx=composer.pk)
+        eq_(response.status_code, 200)
+        composer.refresh_from_db()
+        eq_(composer.parent, parent)
+
+    @override_settings(
+        COMPOSER_AUTOSAVE_DELAY=10,
+        CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        },
+    )
+    def test_autosave_agencies_pending(self):
+        """A full list of agencies replaces the pending changes to them"""
+        composer = FOIAComposerFactory(status="started")
+        old, added, listed = AgencyFactory.create_batch(3)
+        composer.agencies.set([old])
+        url = reverse("foia-autosave", kwargs={"idx": composer.pk})
+        with patch("muckrock.foia.tasks.flush_composer_autosave.apply_async"):
+            for data in [
+                {"agencies_add": [added.pk]},
+                {"agencies": [old.pk, listed.pk]},
+                {"agencies_remove": [old.pk]},
+            ]:
+                request = self.request_factory.post(url, data)
+                request.user = composer.user
+                request = mock_middleware(request)
+                eq_(autosave(request, idx=composer.pk).status_code, 200)
+        flush_changes(composer.pk)
+        eq_(set(composer.agencies.all()), {listed})
+
+    @override_settings(
+        COMPOSER_AUTOSAVE_DELAY=10,
+        CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        },
+    )
+    def test_autosave_locked(self):
+        """An autosave fails if the pending changes stay locked"""
+        composer = FOIAComposerFactory(status="started", title="Old Title")
+        request = self.request_factory.post(
+            reverse("foia-autosave", kwargs={"idx": composer.pk}),
+            {"title": "New Title"},
+        )
+        request.user = composer.user
+        request = mock_middleware(request)
+        with patch("muckrock.foia.autosave.cache.add", return_value=False), patch(
+            "muckrock.foia.autosave.AUTOSAVE_LOCK_TIMEOUT", 0
+        ):
+            response = autosave(request, idx=composer.pk)
+        eq_(response.status_code, 503)
+        composer.refresh_from_db()
+        eq_(composer.title, "Old Title")
+
     def test_autosave_bad(self):
         """Test a failed autosave"""
         composer = FOIAComposerFactory(status="started")
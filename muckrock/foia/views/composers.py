@@ -26,8 +26,9 @@ import requests
 from muckrock.accounts.mixins import BuyRequestsMixin, MiniregMixin
 from muckrock.accounts.utils import mixpanel_event
 from muckrock.agency.models import Agency
-from muckrock.foia.exceptions import InsufficientRequestsError
-from muckrock.foia.forms import BaseComposerForm, ComposerForm, ContactInfoForm
+from muckrock.foia.autosave import flush_changes, save_changes
+from muckrock.foia.exceptions import AutosaveLockError, InsufficientRequestsError
+from muckrock.foia.forms import ComposerAutosaveForm, ComposerForm, ContactInfoForm
 from muckrock.foia.models import FOIAComposer, FOIARequest
 
 
@@ -349,6 +350,8 @@ class UpdateComposer(LoginRequiredMixin, GenericComposer, UpdateView):
 
     def get_object(self, queryset=None):
         """Convert object back to draft if it has been submitted recently"""
+        # write out any autosaved changes before loading the draft
+        flush_changes(self.kwargs[self.pk_url_kwarg])
         composer = super(UpdateComposer, self).get_object(queryset)
         if composer.revokable():
             composer.revoke()
@@ -403,27 +406,22 @@ class UpdateComposer(LoginRequiredMixin, GenericComposer, UpdateView):
 @login_required
 @require_POST
 def autosave(request, idx):
-    """Save the composer via AJAX"""
+    """Save changes to the composer via AJAX
+
+    Only the fields which have changed need to be sent.  Changes are coalesced
+    and written out shortly after.
+    """
     composer = get_object_or_404(
         FOIAComposer, pk=idx, status="started", user=request.user
     )
-    old_agencies = set(composer.agencies.all())
-    data = request.POST.copy()
-    # we are always just saving
-    data["action"] = "save"
-    form = BaseComposerForm(data, instance=composer, user=request.user, request=request)
+    form = ComposerAutosaveForm(request.POST, composer=composer, user=request.user)
     if form.is_valid():
-        composer = form.save(update_owners=False)
-        new_agencies = set(composer.agencies.all())
-        removed_agencies = old_agencies - new_agencies
-        # delete pending agencies which have been removed from composers and requests
-        for agency in removed_agencies:
-            if (
-                agency.status == "pending"
-                and agency.composers.count() == 0
-                and agency.foiarequest_set.count() == 0
-            ):
-                agency.delete()
+        try:
+            save_changes(composer.pk, form.get_changes())
+        except AutosaveLockError:
+            # the changes were not saved, so the client will send them again
+            # with its next save
+            return HttpResponse("Busy", status=503)
         return HttpResponse("OK")
     else:
         return HttpResponseBadRequest(form.errors.as_json())
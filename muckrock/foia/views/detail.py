@@ -40,6 +40,7 @@ from muckrock.communication.models import (
     FaxCommunication,
     WebCommunication,
 )
+from muckrock.core import conditional, page_cache
 from muckrock.core.utils import new_action
 from muckrock.crowdfund.forms import CrowdfundForm
 from muckrock.foia.constants import COMPOSER_EDIT_DELAY
@@ -104,10 +105,16 @@ class Detail(DetailView):
         self.admin_fix_form = None
         self.resend_forms = None
         self.fee_form = None
+        self._validators = None
         super(Detail, self).__init__(*args, **kwargs)
 
     def dispatch(self, request, *args, **kwargs):
         """Handle forms"""
+        self._validators = self._get_validators()
+        if self._validators is not None:
+            response = conditional.get_not_modified(request, *self._validators)
+            if response is not None:
+                return conditional.set_validators(response, *self._validators)
         foia = self.get_object()
         self.admin_fix_form = FOIAAdminFixForm(
             prefix="admin_fix",
@@ -134,6 +141,44 @@ class Detail(DetailView):
 
         return super(Detail, self).dispatch(request, *args, **kwargs)
 
+    def _get_validators(self):
+        """Cheaply find the ETag and last modified time of the page, without
+        loading the request, if the user may view it
+
+        Only anonymous visitors are answered conditionally, as the page shows
+        logged in users what they follow, their notifications and the actions
+        their permissions allow, none of which the validators cover
+        """
+        user = self.request.user
+        if (
+            self.request.method not in ("GET", "HEAD")
+            or user.is_authenticated
+            or "key" in self.request.GET
+            or "zip_download" in self.request.GET
+        ):
+            return None
+        validators = (
+            FOIARequest.objects.get_viewable(user)
+            .filter(
+                agency__jurisdiction__slug=self.kwargs["jurisdiction"],
+                agency__jurisdiction__pk=self.kwargs["jidx"],
+                slug=self.kwargs["slug"],
+                pk=self.kwargs["idx"],
+            )
+            .get_validators()
+            .first()
+        )
+        if validators is None:
+            return None
+        etag = conditional.make_etag(user, *validators.values())
+        last_modified = conditional.latest(
+            validators["datetime_changed"],
+            validators["comm_datetime"],
+            validators["file_datetime"],
+            validators["note_datetime"],
+        )
+        return etag, last_modified
+
     def get_object(self, queryset=None):
         """Get the FOIA Request"""
         # pylint: disable=unused-argument
@@ -303,16 +348,15 @@ class Detail(DetailView):
         user = request.user
         foia = self.get_object()
         if user.is_authenticated:
-            notifications = (
-                Notification.objects.for_user(user).for_object(foia).get_unread()
-            )
-            for notification in notifications:
-                notification.mark_read()
+            Notification.objects.for_user(user).for_object(foia).mark_read()
         if foia.has_perm(request.user, "zip_download") and request.GET.get(
             "zip_download"
         ):
             return self._get_zip_download()
-        return super(Detail, self).get(request, *args, **kwargs)
+        response = super(Detail, self).get(request, *args, **kwargs)
+        if self._validators is not None:
+            conditional.set_validators(response, *self._validators)
+        return page_cache.tag(response, foia, foia.agency)
 
     def post(self, request):
         """Handle form submissions"""
@@ -379,6 +423,9 @@ class Detail(DetailView):
         staff_editable = request.user.is_staff and status in allowed_statuses
         if foia.status != "submitted" and (user_editable or staff_editable):
             foia.status = status
+            if not foia.has_changed("status"):
+                # nothing to save or for staff to review
+                return redirect(foia.get_absolute_url() + "#")
             foia.save(comment="status updated")
             if staff_editable:
                 kwargs = {
@@ -977,9 +1024,9 @@ class ComposerDetail(DetailView):
         context["sidebar_admin_url"] = reverse(
             "admin:foia_foiacomposer_change", args=(composer.pk,)
         )
-        context["processing"] = composer.status == "submitted" and (
-            composer.foias.count() != composer.agencies.count()
-        )
+        created, total = composer.creation_progress()
+        context["processing"] = composer.status == "submitted" and created != total
+        context["progress"] = {"created": created, "total": total}
         if composer.status == "submitted" and composer.datetime_submitted is not None:
             context["edit_deadline"] = composer.datetime_submitted + timedelta(
                 seconds=COMPOSER_EDIT_DELAY
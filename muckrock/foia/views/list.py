@@ -10,6 +10,7 @@ from django.db.models import Count, Prefetch
 from django.http import Http404
 from django.shortcuts import redirect
 from django.urls import reverse
+from django.utils import timezone
 from django.views.generic import TemplateView
 
 # Standard Library
@@ -17,11 +18,12 @@ from datetime import date, timedelta
 
 # Third Party
 import actstream
-from actstream.models import following
 from furl import furl
 
 # MuckRock
 from muckrock.agency.models import Agency
+from muckrock.core import changes, page_cache
+from muckrock.core.follow import followed_pks
 from muckrock.core.forms import TagManagerForm
 from muckrock.core.views import MRListView, MRSearchFilterListView, class_view_decorator
 from muckrock.crowdsource.forms import CrowdsourceChoiceForm
@@ -33,7 +35,13 @@ from muckrock.foia.filters import (
     ProcessingFOIARequestFilterSet,
 )
 from muckrock.foia.forms import FOIAAccessForm, SaveSearchForm, SaveSearchFormHandler
-from muckrock.foia.models import END_STATUS, FOIAComposer, FOIARequest, FOIASavedSearch
+from muckrock.foia.models import (
+    END_STATUS,
+    FOIAComposer,
+    FOIARequest,
+    FOIASavedSearch,
+    FOIAVisibility,
+)
 from muckrock.foia.rules import can_embargo, can_embargo_permananently
 from muckrock.foia.tasks import export_csv
 from muckrock.news.models import Article
@@ -363,26 +371,41 @@ class MyRequestList(RequestList):
         """Extend the embargo on the selected requests"""
         end_date = date.today() + timedelta(30)
         foias = [f.pk for f in foias if f.has_perm(user, "embargo")]
-        FOIARequest.objects.filter(pk__in=foias).update(embargo=True)
+        FOIARequest.objects.filter(pk__in=foias).update(
+            embargo=True, datetime_changed=timezone.now()
+        )
+        FOIAVisibility.objects.update_for(foias)
+        changes.record(FOIARequest, foias)
+        page_cache.purge_pks(FOIARequest, foias)
         # only set date if in end state
         FOIARequest.objects.filter(pk__in=foias, status__in=END_STATUS).update(
-            date_embargo=end_date
+            date_embargo=end_date, datetime_changed=timezone.now()
         )
         return "Embargoes extended for 30 days"
 
     def _remove_embargo(self, foias, user, _post):
         """Remove the embargo on the selected requests"""
         foias = [f.pk for f in foias if f.has_perm(user, "embargo")]
-        FOIARequest.objects.filter(pk__in=foias).update(embargo=False)
+        FOIARequest.objects.filter(pk__in=foias).update(
+            embargo=False, datetime_changed=timezone.now()
+        )
+        FOIAVisibility.objects.update_for(foias)
+        changes.record(FOIARequest, foias)
+        page_cache.purge_pks(FOIARequest, foias)
         return "Embargoes removed"
 
     def _perm_embargo(self, foias, user, _post):
         """Permanently embargo the selected requests"""
         foias = [f.pk for f in foias if f.has_perm(user, "embargo_perm")]
-        FOIARequest.objects.filter(pk__in=foias).update(embargo=True)
+        FOIARequest.objects.filter(pk__in=foias).update(
+            embargo=True, datetime_changed=timezone.now()
+        )
+        FOIAVisibility.objects.update_for(foias)
+        changes.record(FOIARequest, foias)
+        page_cache.purge_pks(FOIARequest, foias)
         # only set permanent
         FOIARequest.objects.filter(pk__in=foias, status__in=END_STATUS).update(
-            permanent_embargo=True
+            permanent_embargo=True, datetime_changed=timezone.now()
         )
         return "Embargoes extended permanently"
 
@@ -439,7 +462,10 @@ class MyRequestList(RequestList):
     def _autofollowup(self, foias, user, disable):
         """Set autofollowups"""
         foias = [f.pk for f in foias if f.has_perm(user, "change")]
-        FOIARequest.objects.filter(pk__in=foias).update(disable_autofollowups=disable)
+        FOIARequest.objects.filter(pk__in=foias).update(
+            disable_autofollowups=disable, datetime_changed=timezone.now()
+        )
+        changes.record(FOIARequest, foias)
         action = "disabled" if disable else "enabled"
         return "Autofollowups {}".format(action)
 
@@ -492,10 +518,7 @@ class FollowingRequestList(RequestList):
     def get_queryset(self):
         """Limits FOIAs to those followed by the current user"""
         queryset = super(FollowingRequestList, self).get_queryset()
-        followed = [
-            f.pk for f in following(self.request.user, FOIARequest) if f is not None
-        ]
-        return queryset.filter(pk__in=followed)
+        return queryset.filter(pk__in=followed_pks(self.request.user, FOIARequest))
 
 
 class ProcessingRequestList(RequestList):
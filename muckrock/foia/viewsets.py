@@ -25,10 +25,13 @@ from rest_framework.response import Response
 
 # MuckRock
 from muckrock.agency.models import Agency
+from muckrock.core import conditional
+from muckrock.core.changes import ChangeFeedMixin
 from muckrock.foia.exceptions import InsufficientRequestsError
-from muckrock.foia.models import FOIACommunication, FOIAComposer, FOIARequest
+from muckrock.foia.models import FOIACommunication, FOIAComposer, FOIAFile, FOIARequest
 from muckrock.foia.serializers import (
     FOIACommunicationSerializer,
+    FOIAFileDetailSerializer,
     FOIAPermissions,
     FOIARequestSerializer,
     IsOwner,
@@ -38,7 +41,41 @@ from muckrock.task.models import ResponseTask
 logger = logging.getLogger(__name__)
 
 
-class FOIARequestViewSet(viewsets.ModelViewSet):
+class ConditionalRetrieveMixin:
+    """Answer retrieves of unchanged objects with a 304, without loading them
+
+    Subclasses override `get_validators`, returning the values which change
+    whenever the object does and its last modified time, or None if the user
+    may not view it, in which case the object is retrieved as usual
+    """
+
+    def get_validators(self, pk):
+        """The validators for the object"""
+        # pylint: disable=unused-argument
+        return None
+
+    def retrieve(self, request, *args, **kwargs):
+        """Check the validators before retrieving the object"""
+        pk = str(kwargs.get("pk", ""))
+        validators = self.get_validators(pk) if pk.isdigit() else None
+        if validators is None:
+            return super(ConditionalRetrieveMixin, self).retrieve(
+                request, *args, **kwargs
+            )
+        values, last_modified = validators
+        # the representation depends on the format as well as the object
+        etag = conditional.make_etag(request.user, request.accepted_media_type, *values)
+        response = conditional.get_not_modified(request, etag, last_modified)
+        if response is None:
+            response = super(ConditionalRetrieveMixin, self).retrieve(
+                request, *args, **kwargs
+            )
+        return conditional.set_validators(response, etag, last_modified)
+
+
+class FOIARequestViewSet(
+    ChangeFeedMixin, ConditionalRetrieveMixin, viewsets.ModelViewSet
+):
     """
     API views for FOIARequest
 
@@ -100,6 +137,24 @@ class FOIARequestViewSet(viewsets.ModelViewSet):
 
     filterset_class = Filter
 
+    def get_validators(self, pk):
+        """The validators for the request"""
+        validators = (
+            FOIARequest.objects.get_viewable(self.request.user)
+            .filter(pk=pk)
+            .get_validators()
+            .first()
+        )
+        if validators is None:
+            return None
+        last_modified = conditional.latest(
+            validators["datetime_changed"],
+            validators["comm_datetime"],
+            validators["file_datetime"],
+            validators["note_datetime"],
+        )
+        return tuple(validators.values()), last_modified
+
     def get_queryset(self):
         return (
             FOIARequest.objects.get_viewable(self.request.user)
@@ -363,7 +418,9 @@ DELIVERED_CHOICES = (
 )
 
 
-class FOIACommunicationViewSet(viewsets.ModelViewSet):
+class FOIACommunicationViewSet(
+    ChangeFeedMixin, ConditionalRetrieveMixin, viewsets.ModelViewSet
+):
     """API views for FOIACommunication"""
 
     # pylint: disable=too-many-public-methods
@@ -400,6 +457,19 @@ class FOIACommunicationViewSet(viewsets.ModelViewSet):
 
     filterset_class = Filter
 
+    def get_validators(self, pk):
+        """The validators for the communication - it has no last modified time,
+        as its files may be removed without recording when"""
+        validators = (
+            FOIACommunication.objects.get_viewable(self.request.user)
+            .filter(pk=pk)
+            .get_validators()
+            .first()
+        )
+        if validators is None:
+            return None
+        return tuple(validators.values()), None
+
     def get_queryset(self):
         return FOIACommunication.objects.prefetch_related(
             "files",
@@ -413,3 +483,15 @@ class FOIACommunicationViewSet(viewsets.ModelViewSet):
                 queryset=ResponseTask.objects.select_related("resolved_by"),
             ),
         ).get_viewable(self.request.user)
+
+
+class FOIAFileViewSet(ChangeFeedMixin, viewsets.ReadOnlyModelViewSet):
+    """API views for FOIAFile"""
+
+    serializer_class = FOIAFileDetailSerializer
+    permission_classes = (DjangoModelPermissions,)
+
+    def get_queryset(self):
+        return FOIAFile.objects.filter(
+            comm__in=FOIACommunication.objects.get_viewable(self.request.user)
+        ).order_by("pk")
@@ -16,5 +16,8 @@ class JurisdictionConfig(AppConfig):
         # pylint: disable=invalid-name, import-outside-toplevel
         from watson import search
 
+        from muckrock.core import page_cache
+
         Exemption = self.get_model("Exemption")
         search.register(Exemption)
+        page_cache.register(self.get_model("Jurisdiction"))
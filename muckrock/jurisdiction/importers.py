@@ -1,25 +1,21 @@
 """
 Custom importer for jurisdiction laws
 """
-# Django
-from django.conf import settings
-
 # Standard Library
 import csv
 
 # Third Party
-from boto.s3.connection import S3Connection
 from smart_open.smart_open_lib import smart_open
 
 # MuckRock
+from muckrock.core import s3
 from muckrock.jurisdiction.models import Jurisdiction, Law
 
 
 def import_laws(file_name):
     """Import laws from a spreadsheet"""
     # pylint: disable=too-many-locals
-    conn = S3Connection(settings.AWS_ACCESS_KEY_ID, settings.AWS_SECRET_ACCESS_KEY)
-    bucket = conn.get_bucket("muckrock")
+    bucket = s3.get_bucket("jurisdiction.importers", "muckrock")
     key = bucket.get_key(file_name)
     with smart_open(key) as law_file:
         law_reader = csv.reader(law_file)
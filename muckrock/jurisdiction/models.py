@@ -16,6 +16,7 @@ from taggit.managers import TaggableManager
 
 # MuckRock
 from muckrock.business_days.models import Calendar, Holiday, HolidayCalendar
+from muckrock.core import page_cache
 from muckrock.core.models import ExtractDay
 from muckrock.foia.models import END_STATUS, FOIARequest
 from muckrock.tags.models import TaggedItemBase
@@ -143,6 +144,7 @@ class Jurisdiction(models.Model, RequestHelper):
         self.slug = slugify(self.slug)
         self.name = self.name.strip()
         super(Jurisdiction, self).save(*args, **kwargs)
+        page_cache.purge(self)
 
     def get_url_flag(self):
         """So we can call from template"""
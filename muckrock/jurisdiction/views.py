@@ -19,6 +19,7 @@ from rest_framework import viewsets
 
 # MuckRock
 from muckrock.agency.models import Agency
+from muckrock.core import page_cache
 from muckrock.core.views import (
     MRAutocompleteView,
     MRFilterListView,
@@ -216,7 +217,9 @@ def detail(request, fed_slug, state_slug, local_slug):
         )
     collect_stats(jurisdiction, context)
 
-    return render(request, "jurisdiction/detail.html", context)
+    return page_cache.tag(
+        render(request, "jurisdiction/detail.html", context), jurisdiction
+    )
 
 
 class List(MRFilterListView):
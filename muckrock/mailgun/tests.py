@@ -6,7 +6,7 @@ Tests for mailgun
 from django.conf import settings
 from django.core import mail
 from django.template.loader import render_to_string
-from django.test import RequestFactory, TestCase
+from django.test import RequestFactory, TestCase, override_settings
 from django.urls import reverse
 
 # Standard Library
@@ -20,12 +20,14 @@ from io import StringIO
 # Third Party
 import nose.tools
 import pytz
+import requests_mock
 from freezegun import freeze_time
 
 # MuckRock
 from muckrock.communication.models import EmailAddress, EmailError, EmailOpen
 from muckrock.foia.factories import FOIACommunicationFactory, FOIARequestFactory
 from muckrock.foia.models import FOIACommunication
+from muckrock.mailgun.utils import download_links
 from muckrock.mailgun.views import bounces, delivered, opened, route_mailgun
 from muckrock.task.models import OrphanTask
 
@@ -371,3 +373,74 @@ class TestMailgunViewWebHooks(TestMailgunViews):
             comm.emails.first().confirmed_datetime,
             datetime(2017, 1, 2, 17, tzinfo=pytz.utc),
         )
+
+
+class TestDownloadLinks(TestCase):
+    """Tests for downloading files linked to from incoming mail"""
+
+    @override_settings(LINK_DOWNLOAD_MAX_SIZE=10)
+    @requests_mock.Mocker()
+    def test_download_links(self, mock_requests):
+        """Linked files should be attached, unless they are too large"""
+        small = "https://www.dropbox.com/s/small/file.pdf?dl=0"
+        large = "https://www.dropbox.com/s/large/file.zip?dl=0"
+        unknown = "https://www.dropbox.com/s/unknown/file.zip?dl=0"
+        mock_requests.get(
+            small.replace("dl=0", "dl=1"),
+            content=b"small",
+            headers={"content-disposition": 'attachment; filename="small.pdf"'},
+        )
+        mock_requests.get(
+            large.replace("dl=0", "dl=1"),
+            content=b"x" * 20,
+            headers={"content-length": "20"},
+        )
+        # the size is only discovered while downloading
+        mock_requests.get(unknown.replace("dl=0", "dl=1"), content=b"x" * 20)
+        comm = FOIACommunicationFactory(
+            communication="Files: {} {} {}".format(small, large, unknown)
+        )
+
+        download_links(comm)
+
+        files = list(comm.files.all())
+        nose.tools.eq_(len(files), 1)
+        nose.tools.eq_(files[0].title, "small")
+        nose.tools.eq_(files[0].ffile.read(), b"small")
+
+    @requests_mock.Mocker()
+    def test_download_google_drive(self, mock_requests):
+        """Large Google Drive files should be downloaded past the virus scan
+        warning, and pages which are not the file should not be attached"""
+        url = "https://drive.google.com/uc?export=download&id={}"
+        warning = (
+            '<html><a href="/uc?export=download&amp;confirm=abc123&amp;id=large">'
+            "Download anyway</a></html>"
+        )
+        mock_requests.get(
+            url.format("large"),
+            text=warning,
+            headers={"content-type": "text/html; charset=utf-8"},
+            complete_qs=True,
+        )
+        mock_requests.get(
+            url.format("large") + "&confirm=abc123",
+            content=b"large",
+            headers={"content-disposition": 'attachment; filename="large.pdf"'},
+        )
+        mock_requests.get(
+            url.format("missing"),
+            text="<html>Not found</html>",
+            headers={"content-type": "text/html; charset=utf-8"},
+        )
+        comm = FOIACommunicationFactory(
+            communication="Files: https://drive.google.com/file/d/large "
+            "https://drive.google.com/file/d/missing"
+        )
+
+        download_links(comm)
+
+        files = list(comm.files.all())
+        nose.tools.eq_(len(files), 1)
+        nose.tools.eq_(files[0].title, "large")
+        nose.tools.eq_(files[0].ffile.read(), b"large")
@@ -2,10 +2,18 @@
 Utilities for handling incoming mail
 """
 
+# Django
+from django.conf import settings
+from django.core.files import File
+
 # Standard Library
 import cgi
 import logging
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from html import unescape
+from tempfile import SpooledTemporaryFile
 
 # Third Party
 import requests
@@ -13,7 +21,80 @@ import requests
 logger = logging.getLogger(__name__)
 
 
-class DropboxDownloader:
+class DownloadError(Exception):
+    """A link could not be downloaded"""
+
+
+class LinkDownloader:
+    """Base download configuration for links to files in incoming mail
+
+    Subclasses set a `name` and a `p_link` regex matching the links they
+    handle, and may override `preprocess` to turn the link into a direct
+    download, or `get_name` to find the file name
+    """
+
+    name = None
+    p_link = None
+
+    @staticmethod
+    def preprocess(link):
+        """Turn the link into a direct download link"""
+        return link
+
+    @staticmethod
+    def get_name(response):
+        """Get the file name from the response"""
+        _, params = cgi.parse_header(response.headers.get("content-disposition", ""))
+        return params.get("filename", "Untitled")
+
+    @classmethod
+    def find_links(cls, text):
+        """Find all of the links this downloader handles in the text"""
+        return [cls.preprocess(link) for link in cls.p_link.findall(text)]
+
+    @staticmethod
+    def open(session, link):
+        """Start downloading the link, returning the streaming response"""
+        response = session.get(
+            link, stream=True, timeout=settings.LINK_DOWNLOAD_TIMEOUT
+        )
+        response.raise_for_status()
+        return response
+
+    @classmethod
+    def download(cls, link):
+        """Stream the link into a temporary file, spooled to disk once it is
+        large, enforcing the size and time limits
+
+        Returns the file, rewound and named
+        """
+        max_size = settings.LINK_DOWNLOAD_MAX_SIZE
+        deadline = time.monotonic() + settings.LINK_DOWNLOAD_TIME_LIMIT
+        try:
+            with requests.Session() as session, cls.open(session, link) as response:
+                length = response.headers.get("content-length")
+                if length and length.isdigit() and int(length) > max_size:
+                    raise DownloadError("File is too large: {} bytes".format(length))
+                file_ = SpooledTemporaryFile(max_size=settings.LINK_DOWNLOAD_SPOOL_SIZE)
+                try:
+                    size = 0
+                    for chunk in response.iter_content(chunk_size=1024 * 1024):
+                        size += len(chunk)
+                        if size > max_size:
+                            raise DownloadError("File is too large")
+                        if time.monotonic() > deadline:
+                            raise DownloadError("Download took too long")
+                        file_.write(chunk)
+                    file_.seek(0)
+                    return File(file_, name=cls.get_name(response))
+                except Exception:
+                    file_.close()
+                    raise
+        except requests.exceptions.RequestException as exc:
+            raise DownloadError(str(exc))
+
+
+class DropboxDownloader(LinkDownloader):
     """Download configuration for dropbox links"""
 
     name = "DropBox"
@@ -25,25 +106,94 @@ class DropboxDownloader:
         return link.replace("dl=0", "dl=1")
 
 
+class GoogleDriveDownloader(LinkDownloader):
+    """Download configuration for google drive file links"""
+
+    name = "Google Drive"
+    p_link = re.compile(r"https://drive.google.com/file/d/[a-zA-Z0-9_-]+")
+    p_form = re.compile(r'<form[^>]* id="download-form"[^>]*>')
+    p_action = re.compile(r'action="([^"]+)"')
+    p_input = re.compile(r'<input type="hidden" name="([^"]+)" value="([^"]*)"')
+    p_confirm = re.compile(r"confirm=([0-9A-Za-z_-]+)")
+
+    @staticmethod
+    def preprocess(link):
+        """Replace the file page with a direct download of the file"""
+        file_id = link.rsplit("/", 1)[-1]
+        return "https://drive.google.com/uc?export=download&id={}".format(file_id)
+
+    @staticmethod
+    def is_page(response):
+        """Is the response a page rather than the file"""
+        return response.headers.get("content-type", "").startswith(
+            "text/html"
+        ) and "attachment" not in response.headers.get("content-disposition", "")
+
+    @classmethod
+    def open(cls, session, link):
+        """Files too large to be virus scanned are served as a page asking to
+        confirm the download, so confirm it to get the file itself"""
+        response = super().open(session, link)
+        if not cls.is_page(response):
+            return response
+        with response:
+            page = response.text
+        form = cls.p_form.search(page)
+        action = cls.p_action.search(form.group(0)) if form else None
+        token = next(
+            (v for k, v in session.cookies.items() if k.startswith("download_warning")),
+            None,
+        )
+        confirm = cls.p_confirm.search(page)
+        if action:
+            link = unescape(action.group(1))
+            params = dict(cls.p_input.findall(page))
+        elif token or confirm:
+            params = {"confirm": token or confirm.group(1)}
+        else:
+            raise DownloadError("Google Drive returned a page instead of the file")
+        response = session.get(
+            link, params=params, stream=True, timeout=settings.LINK_DOWNLOAD_TIMEOUT
+        )
+        response.raise_for_status()
+        if cls.is_page(response):
+            response.close()
+            raise DownloadError("Google Drive returned a page instead of the file")
+        return response
+
+
+DOWNLOADERS = [DropboxDownloader, GoogleDriveDownloader]
+
+
 def download_links(communication):
-    """Download links from the communication"""
-    downloaders = [DropboxDownloader]
+    """Download links from the communication and attach them to it"""
     logger.info("Trying to download links for communication %s", communication.pk)
 
-    for downloader in downloaders:
+    links = []
+    for downloader in DOWNLOADERS:
         logger.info("[DL:%s] Looking for %s links", communication.pk, downloader.name)
-        for link in downloader.p_link.findall(communication.communication):
-            link = downloader.preprocess(link)
+        for link in downloader.find_links(communication.communication):
+            links.append((downloader, link))
+    if not links:
+        return
+
+    # the downloads are only network bound, so run them concurrently, but attach
+    # the files here as each finishes so the database is only used from one thread
+    with ThreadPoolExecutor(max_workers=settings.LINK_DOWNLOAD_CONCURRENCY) as pool:
+        futures = {}
+        for downloader, link in links:
             logger.info("[DL:%s] Trying to download %s", communication.pk, link)
+            futures[pool.submit(downloader.download, link)] = link
+        for future in as_completed(futures):
+            try:
+                file_ = future.result()
+            except DownloadError as exc:
+                logger.info(
+                    "[DL:%s] Error %s: %s", communication.pk, futures[future], exc
+                )
+                continue
+            logger.info("[DL:%s] Saving file %s", communication.pk, file_.name)
             try:
-                response = requests.get(link)
-                response.raise_for_status()
-            except requests.exceptions.RequestException as exc:
-                logger.info("[DL:%s] Error %s", communication.pk, exc)
-            _, params = cgi.parse_header(
-                response.headers.get("content-disposition", "")
-            )
-            name = params.get("filename", "Untitled")
-            logger.info("[DL:%s] Saving file %s", communication.pk, name)
-            content = response.content
-            communication.attach_file(content=content, name=name)
+                communication.attach_file(file_=file_, name=file_.name)
+            finally:
+                file_.close()
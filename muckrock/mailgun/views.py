@@ -197,9 +197,10 @@ def _parse_email_headers(post):
     from_ = post.get("From", "")
     to_ = post.get("To") or post.get("to", "")
     cc_ = post.get("Cc") or post.get("cc", "")
-    from_email = EmailAddress.objects.fetch(from_)
-    to_emails = EmailAddress.objects.fetch_many(to_)
-    cc_emails = EmailAddress.objects.fetch_many(cc_)
+    from_emails, to_emails, cc_emails = EmailAddress.objects.fetch_headers(
+        from_, to_, cc_
+    )
+    from_email = from_emails[0] if from_emails else None
     return from_email, to_emails, cc_emails
 
 
@@ -279,7 +280,7 @@ def _handle_request(request, mail_id):
                 % (post.get("message-headers", ""), post.get("body-plain", "")),
             )
             comm.process_attachments(request.FILES)
-            transaction.on_commit(lambda: download_links(comm.pk))
+            transaction.on_commit(lambda: download_links.delay(comm.pk))
 
             if foia.portal:
                 transaction.on_commit(lambda: foia.portal.receive_msg(comm))
@@ -4,7 +4,8 @@ Digest objects for the messages app
 
 # Django
 from django.contrib.auth.models import User
-from django.db.models import DurationField, F, Q
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import DurationField, F, Q, prefetch_related_objects
 from django.db.models.functions import Cast, Now
 from django.utils import timezone
 
@@ -13,7 +14,6 @@ from collections import OrderedDict
 from datetime import date, timedelta
 
 # Third Party
-from actstream.models import Action
 from dateutil.relativedelta import relativedelta
 
 # MuckRock
@@ -96,6 +96,145 @@ class Digest(TemplateEmail):
         return self.user
 
 
+# The verbs used by request actions, mapped to the digest category they are
+# listed under.  Notifications for requests with any other verb are not digested.
+REQUEST_VERB_CATEGORIES = {
+    "completed": "completed",
+    "partially completed": "completed",
+    "rejected": "rejected",
+    "has no responsive documents": "no_documents",
+    "requires payment": "require_payment",
+    "requires fix": "require_fix",
+    "is processing": "interim_response",
+    "acknowledged": "acknowledged",
+    "sent a communication": "received",
+}
+REQUEST_CATEGORIES = sorted(set(REQUEST_VERB_CATEGORIES.values()))
+
+
+class ActivityDigestBuilder:
+    """
+    Classifies the unread notifications for a batch of users at once.
+
+    Rather than running the ownership and verb filters once per user, the
+    notifications for every user in the batch are fetched in a single query,
+    ownership of the referenced requests and questions is resolved with one
+    query per model, and the verbs are classified in Python.  The result is a
+    JSON serializable dictionary of notification ids per user, which can be
+    handed off to a task which only needs to render and send the digest.
+    """
+
+    def __init__(self, duration):
+        self.duration = duration
+        self.content_types = {
+            ContentType.objects.get_for_model(FOIARequest).pk: "requests",
+            ContentType.objects.get_for_model(Question).pk: "questions",
+        }
+
+    @staticmethod
+    def empty():
+        """Classified notifications for a user with no activity"""
+        return {
+            "requests": {
+                "mine": {category: [] for category in REQUEST_CATEGORIES},
+                "following": {category: [] for category in REQUEST_CATEGORIES},
+            },
+            "questions": {"mine": [], "following": []},
+        }
+
+    @staticmethod
+    def count(classified):
+        """The number of notifications in a classified dictionary"""
+        return (
+            sum(
+                len(ids)
+                for ownership in classified["requests"].values()
+                for ids in ownership.values()
+            )
+            + len(classified["questions"]["mine"])
+            + len(classified["questions"]["following"])
+        )
+
+    def build(self, user_ids):
+        """Return a dictionary mapping the ids of users with activity to their
+        classified notification ids"""
+        content_type_ids = list(self.content_types)
+        notifications = list(
+            Notification.objects.filter(
+                user__in=user_ids, read=False, datetime__gte=self.duration
+            )
+            .filter(
+                Q(action__actor_content_type__in=content_type_ids)
+                | Q(action__target_content_type__in=content_type_ids)
+                | Q(action__action_object_content_type__in=content_type_ids)
+            )
+            .order_by("datetime")
+            .values_list(
+                "pk",
+                "user_id",
+                "action__verb",
+                "action__public",
+                "action__actor_content_type",
+                "action__actor_object_id",
+                "action__target_content_type",
+                "action__target_object_id",
+                "action__action_object_content_type",
+                "action__action_object_object_id",
+            )
+        )
+        owners = self._get_owners(notifications)
+
+        classified = {}
+        for (pk, user_id, verb, public, *references) in notifications:
+            sections = {}
+            for content_type, object_id in zip(references[::2], references[1::2]):
+                section = self.content_types.get(content_type)
+                if section is None:
+                    continue
+                owned = public and owners[section].get(object_id) == user_id
+                sections[section] = sections.get(section, False) or owned
+            for section, owned in sections.items():
+                ownership = "mine" if owned else "following"
+                if section == "requests":
+                    category = REQUEST_VERB_CATEGORIES.get(verb)
+                    if category is None:
+                        continue
+                    ids = classified.setdefault(user_id, self.empty())[section][
+                        ownership
+                    ][category]
+                else:
+                    ids = classified.setdefault(user_id, self.empty())[section][
+                        ownership
+                    ]
+                ids.append(pk)
+        return classified
+
+    def _get_owners(self, notifications):
+        """Map the object ids of the referenced requests and questions to the id
+        of their owner, with one query per model"""
+        object_ids = {"requests": set(), "questions": set()}
+        for (_, _, _, _, *references) in notifications:
+            for content_type, object_id in zip(references[::2], references[1::2]):
+                section = self.content_types.get(content_type)
+                if section is not None:
+                    object_ids[section].add(object_id)
+        # generic foreign key object ids are stored as strings
+        return {
+            "requests": {
+                str(pk): user_id
+                for pk, user_id in FOIARequest.objects.filter(
+                    pk__in=object_ids["requests"]
+                ).values_list("pk", "composer__user_id")
+            },
+            "questions": {
+                str(pk): user_id
+                for pk, user_id in Question.objects.filter(
+                    pk__in=object_ids["questions"]
+                ).values_list("pk", "user_id")
+            },
+        }
+
+
 class ActivityDigest(Digest):
     """
     An ActivityDigest describes a collection of activity over a duration, which
@@ -105,35 +244,24 @@ class ActivityDigest(Digest):
     text_template = "message/digest/digest.txt"
     html_template = "message/digest/digest.html"
 
-    # Here we scaffold out the activity dictionary.
-    # It is scaffolded to prevent key errors when counting
-    # activity, as well as to provide some guidance for
-    # which activities to filter from the global stream.
-
     # Activity is independent from template context because
     # we use activity counts to influence other parts of the
     # email, like the subject line and whether or not to
     # even send the email at all.
 
-    activity = {
-        "count": 0,
-        "requests": {"count": 0, "mine": None, "following": None},
-        "questions": {"count": 0, "mine": None, "following": None},
-    }
-
-    # Most of the work re: composing the email takes place
-    # at init. This is by design, since digests should require
-    # a minimum of configuration outside of their own configuration,
-    # which is their responsibility. In other words, a digest really
-    # only needs to know its user.
+    # The classified notification ids may be passed in when the digest
+    # is initialized, as computed for a batch of users by the
+    # ActivityDigestBuilder.  Otherwise they are computed for the
+    # single user when the digest is rendered.
 
-    # Question: should interval be made into a required init value?
-    # On the one hand, having interval hardcoded into subclasses is
-    # less flexible. On the other, this flexibility might not be required
-    # beyond specifically-defined subclasses.
-
-    def __init__(self, **kwargs):
+    def __init__(self, notifications=None, **kwargs):
         """Initialize the digest with a dynamic subject."""
+        self.notifications = notifications
+        self.activity = {
+            "count": 0,
+            "requests": {"count": 0, "mine": None, "following": None},
+            "questions": {"count": 0, "mine": None, "following": None},
+        }
         super(ActivityDigest, self).__init__(**kwargs)
         self.subject = self.get_subject()
 
@@ -144,95 +272,60 @@ class ActivityDigest(Digest):
         context["subject"] = self.get_subject()
         return context
 
-    def notifications_for_model(self, notifications, model):
-        """Filter a list of notifications for a specific model,
-        split between objects owned by the user and objects followed by the user."""
-        user = self.get_user()
-        model_notifications = notifications.for_model(model)
-        own_model_actions = Action.objects.owned_by(user, model)
-        own_model_notifications = model_notifications.filter(
-            action__in=own_model_actions
-        )
-        following_model_notifications = model_notifications.exclude(
-            action__in=own_model_actions
-        )
-        return {
-            "count": model_notifications.count(),
-            "mine": own_model_notifications,
-            "following": following_model_notifications,
-        }
+    def get_classified_notifications(self):
+        """Get the classified notification ids for the user"""
+        if self.notifications is None:
+            user = self.get_user()
+            builder = ActivityDigestBuilder(self.get_duration())
+            self.notifications = builder.build([user.pk]).get(user.pk, builder.empty())
+        return self.notifications
 
     def get_activity(self):
         """Returns a list of activities to be sent in the email"""
-        duration = self.get_duration()
-        user = self.get_user()
-        # get unread notifications for the user that are new since the last email
-        notifications = (
-            Notification.objects.for_user(user)
-            .get_unread()
-            .filter(datetime__gte=duration)
+        classified = self.get_classified_notifications()
+        requests = classified["requests"]
+        questions = classified["questions"]
+        notification_ids = (
+            [pk for ids in requests["mine"].values() for pk in ids]
+            + [pk for ids in requests["following"].values() for pk in ids]
+            + questions["mine"]
+            + questions["following"]
         )
-        self.activity["requests"] = self.foia_notifications(notifications)
-        self.activity["questions"] = self.notifications_for_model(
-            notifications, Question
+        notifications = Notification.objects.in_bulk(notification_ids)
+        if notifications:
+            # load the actions and their generic objects for all of the
+            # notifications at once for rendering
+            prefetch_related_objects(
+                list(notifications.values()),
+                "action__actor",
+                "action__target",
+                "action__action_object",
+            )
+
+        def load(ids):
+            """Load the notifications for a list of ids"""
+            return [notifications[pk] for pk in ids if pk in notifications]
+
+        for ownership in ("mine", "following"):
+            self.activity["requests"][ownership] = {
+                category: load(ids) for category, ids in requests[ownership].items()
+            }
+            self.activity["requests"][ownership]["count"] = sum(
+                len(value) for value in self.activity["requests"][ownership].values()
+            )
+            self.activity["questions"][ownership] = load(questions[ownership])
+        self.activity["requests"]["count"] = (
+            self.activity["requests"]["mine"]["count"]
+            + self.activity["requests"]["following"]["count"]
         )
+        self.activity["questions"]["count"] = len(
+            self.activity["questions"]["mine"]
+        ) + len(self.activity["questions"]["following"])
         self.activity["count"] = (
             self.activity["requests"]["count"] + self.activity["questions"]["count"]
         )
         return self.activity
 
-    def foia_notifications(self, notifications):
-        """Do some heavy filtering and classifying of foia notifications."""
-        filtered_notifications = self.notifications_for_model(
-            notifications, FOIARequest
-        )
-        filtered_notifications["mine"] = self.classify_request_notifications(
-            filtered_notifications["mine"],
-            [
-                ("completed", "completed"),
-                ("rejected", "rejected"),
-                ("no_documents", "no responsive documents"),
-                ("require_payment", "payment"),
-                ("require_fix", "require_fix"),
-                ("interim_response", "processing"),
-                ("acknowledged", "acknowledged"),
-                ("received", "sent a communication"),
-            ],
-        )
-        filtered_notifications["following"] = self.classify_request_notifications(
-            filtered_notifications["following"],
-            [
-                ("completed", "completed"),
-                ("rejected", "rejected"),
-                ("no_documents", "no responsive documents"),
-                ("require_payment", "payment"),
-                ("require_fix", "require_fix"),
-                ("interim_response", "processing"),
-                ("acknowledged", "acknowledged"),
-                ("received", "sent a communication"),
-            ],
-        )
-        filtered_notifications["count"] = (
-            filtered_notifications["mine"]["count"]
-            + filtered_notifications["following"]["count"]
-        )
-        return filtered_notifications
-
-    def classify_request_notifications(self, notifications, classifiers):
-        """Break a single list of notifications into a classified dictionary."""
-        classified = {}
-        # a classifier should be a tuple of a key and a verb phrase to filter by
-        # e.g. ('no_documents', 'no responsive documents')
-        for classifier in classifiers:
-            classified[classifier[0]] = notifications.filter(
-                action__verb__icontains=classifier[1]
-            )
-        activity_count = 0
-        for _, classified_stream in classified.items():
-            activity_count += len(classified_stream)
-        classified["count"] = activity_count
-        return classified
-
     def get_subject(self):
         """Summarizes the activities in the notification."""
         count = self.activity["count"]
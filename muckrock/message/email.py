@@ -3,10 +3,41 @@ Provides a base email class for messages.
 """
 
 # Django
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.template.loader import render_to_string
 
+# Standard Library
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def send_batch(messages, fail_silently=False):
+    """
+    Send many rendered messages over a single connection to the batch email
+    backend, instead of opening a connection per message.
+    Returns the number of messages sent and logs the throughput.
+    """
+    if not messages:
+        return 0
+    start = time.time()
+    connection = get_connection(
+        settings.BATCH_EMAIL_BACKEND, fail_silently=fail_silently
+    )
+    sent = connection.send_messages(messages) or 0
+    elapsed = time.time() - start
+    logger.info(
+        "Sent batch of %d/%d emails in %.2f seconds (%.1f messages per second)",
+        sent,
+        len(messages),
+        elapsed,
+        sent / elapsed if elapsed > 0 else sent,
+    )
+    return sent
+
 
 class TemplateEmail(EmailMultiAlternatives):
     """
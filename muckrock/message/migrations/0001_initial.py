@@ -0,0 +1,80 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestShard',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID'
+                    )
+                ),
+                ('preference', models.CharField(max_length=10)),
+                ('subject', models.CharField(max_length=255)),
+                ('shard', models.PositiveSmallIntegerField()),
+                (
+                    'shards',
+                    models.PositiveSmallIntegerField(
+                        help_text='The total number of shards in this run'
+                    )
+                ),
+                (
+                    'status',
+                    models.CharField(
+                        choices=[('scheduled', 'Scheduled'),
+                                 ('running', 'Running'),
+                                 ('complete', 'Complete'),
+                                 ('failed', 'Failed')],
+                        default='scheduled',
+                        max_length=9
+                    )
+                ),
+                (
+                    'duration',
+                    models.DateTimeField(
+                        help_text=
+                        'Notifications since this time are included in the digests'
+                    )
+                ),
+                ('datetime_scheduled', models.DateTimeField()),
+                (
+                    'datetime_updated',
+                    models.DateTimeField(blank=True, null=True)
+                ),
+                (
+                    'datetime_completed',
+                    models.DateTimeField(blank=True, null=True)
+                ),
+                (
+                    'cursor',
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text='The ID of the last user whose digest was sent'
+                    )
+                ),
+                ('sent', models.PositiveIntegerField(default=0)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ('-datetime_scheduled', 'shard'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='digestshard',
+            index=models.Index(
+                fields=['status', 'datetime_updated'],
+                name='message_dig_status_2d69e6_idx'
+            ),
+        ),
+    ]
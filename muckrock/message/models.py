@@ -0,0 +1,142 @@
+"""
+Models for the messages application
+"""
+
+# Django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import models
+from django.db.models.functions import Coalesce, Mod
+from django.utils import timezone
+
+# Standard Library
+import hashlib
+from datetime import timedelta
+
+# Third Party
+from dateutil.relativedelta import relativedelta
+
+# How digests are spread out, per email preference:
+# the interval covered by each digest, the number of shards users are split into,
+# and the window over which the shards are started
+DIGEST_SCHEDULES = {
+    "hourly": {
+        "interval": relativedelta(hours=1),
+        "shards": 6,
+        "spread": timedelta(minutes=30),
+    },
+    "daily": {
+        "interval": relativedelta(days=1),
+        "shards": 24,
+        "spread": timedelta(hours=2),
+    },
+    "weekly": {
+        "interval": relativedelta(weeks=1),
+        "shards": 48,
+        "spread": timedelta(hours=4),
+    },
+    "monthly": {
+        "interval": relativedelta(months=1),
+        "shards": 48,
+        "spread": timedelta(hours=4),
+    },
+}
+
+
+class DigestShardQuerySet(models.QuerySet):
+    """Object manager for digest shards"""
+
+    def schedule(self, preference, subject):
+        """Create the shards for a digest run, each with its own start time
+        within the spread window"""
+        schedule = DIGEST_SCHEDULES[preference]
+        num_shards = schedule["shards"]
+        slot = schedule["spread"] / num_shards
+        now = timezone.now()
+        shards = []
+        for shard in range(num_shards):
+            # the jitter is derived from the shard so each shard starts at the
+            # same offset on every run, keeping each user's digest windows contiguous
+            digest = hashlib.md5("{}:{}".format(preference, shard).encode("utf8"))
+            jitter = int(digest.hexdigest(), 16) % 1000 / 1000
+            datetime_scheduled = now + slot * (shard + jitter)
+            shards.append(
+                self.model(
+                    preference=preference,
+                    subject=subject,
+                    shard=shard,
+                    shards=num_shards,
+                    datetime_scheduled=datetime_scheduled,
+                    duration=datetime_scheduled - schedule["interval"],
+                )
+            )
+        return self.bulk_create(shards)
+
+    def get_stuck(self):
+        """Shards whose task has not made progress within the timeout"""
+        cutoff = timezone.now() - timedelta(seconds=settings.DIGEST_SHARD_TIMEOUT)
+        return self.annotate(
+            last_progress=Coalesce("datetime_updated", "datetime_scheduled")
+        ).filter(status__in=("scheduled", "running"), last_progress__lt=cutoff)
+
+
+class DigestShard(models.Model):
+    """Tracks the progress of sending one shard of a scheduled digest run"""
+
+    preference = models.CharField(max_length=10)
+    subject = models.CharField(max_length=255)
+    shard = models.PositiveSmallIntegerField()
+    shards = models.PositiveSmallIntegerField(
+        help_text="The total number of shards in this run"
+    )
+    status = models.CharField(
+        max_length=9,
+        default="scheduled",
+        choices=(
+            ("scheduled", "Scheduled"),
+            ("running", "Running"),
+            ("complete", "Complete"),
+            ("failed", "Failed"),
+        ),
+    )
+    duration = models.DateTimeField(
+        help_text="Notifications since this time are included in the digests"
+    )
+    datetime_scheduled = models.DateTimeField()
+    datetime_updated = models.DateTimeField(blank=True, null=True)
+    datetime_completed = models.DateTimeField(blank=True, null=True)
+    cursor = models.PositiveIntegerField(
+        default=0, help_text="The ID of the last user whose digest was sent"
+    )
+    sent = models.PositiveIntegerField(default=0)
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    objects = DigestShardQuerySet.as_manager()
+
+    def __str__(self):
+        return "{} digest shard {}/{} at {}".format(
+            self.preference.capitalize(),
+            self.shard + 1,
+            self.shards,
+            self.datetime_scheduled,
+        )
+
+    def get_user_ids(self, limit):
+        """Get the next batch of users in this shard who may need a digest"""
+        return list(
+            User.objects.annotate(digest_shard=Mod("pk", self.shards))
+            .filter(
+                digest_shard=self.shard,
+                pk__gt=self.cursor,
+                profile__email_pref=self.preference,
+                notifications__read=False,
+                notifications__datetime__gte=self.duration,
+            )
+            .order_by("pk")
+            .values_list("pk", flat=True)
+            .distinct()[:limit]
+        )
+
+    class Meta:
+        ordering = ("-datetime_scheduled", "shard")
+        indexes = [models.Index(fields=["status", "datetime_updated"])]
@@ -3,10 +3,12 @@ Tasks for the messages application.
 """
 
 # Django
-from celery.exceptions import SoftTimeLimitExceeded
 from celery.schedules import crontab
 from celery.task import periodic_task, task
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import F
 from django.utils import timezone
 
 # Standard Library
@@ -19,57 +21,154 @@ from dateutil.relativedelta import relativedelta
 from requests.exceptions import RequestException
 
 # MuckRock
-from muckrock.accounts.models import RecurringDonation
+from muckrock.accounts.models import Profile, RecurringDonation
 from muckrock.core.utils import stripe_retry_on_error
 from muckrock.crowdfund.models import RecurringCrowdfundPayment
 from muckrock.message import digests, receipts
-from muckrock.message.email import TemplateEmail
+from muckrock.message.email import TemplateEmail, send_batch
+from muckrock.message.models import DIGEST_SCHEDULES, DigestShard
 from muckrock.message.notifications import SlackNotification
 
 logger = logging.getLogger(__name__)
 
 
+# number of users to send digests to in a single batch
+DIGEST_BATCH_SIZE = 100
+
+DIGEST_IN_FLIGHT_KEY = "message:digest_shards_in_flight"
+
+
+def claim_in_flight_slot():
+    """Take one of the slots for running digest shards, returning False if
+    they are all taken"""
+    # the counter expires in case slots are lost by workers dying mid shard
+    cache.add(DIGEST_IN_FLIGHT_KEY, 0, settings.DIGEST_SHARD_TIMEOUT * 3)
+    try:
+        in_flight = cache.incr(DIGEST_IN_FLIGHT_KEY)
+    except ValueError:
+        # the counter is not being stored, so there is nothing to limit with
+        return True
+    if in_flight > settings.DIGEST_MAX_IN_FLIGHT:
+        release_in_flight_slot()
+        return False
+    return True
+
+
+def release_in_flight_slot():
+    """Give back a slot for running digest shards"""
+    try:
+        cache.decr(DIGEST_IN_FLIGHT_KEY)
+    except ValueError:
+        pass
+
+
+def send_activity_digest_batch(batch, subject, preference):
+    """Render a batch of activity digests and send them over a single connection.
+    The batch is a list of user ids paired with their classified notifications.
+    Returns the number of digests sent."""
+    notifications = dict(batch)
+    interval = DIGEST_SCHEDULES[preference]["interval"]
+    users = User.objects.filter(pk__in=notifications).select_related("profile")
+    Profile.objects.filter(user__in=users).prefetch_url_auth_tokens()
+    messages = []
+    for user in users:
+        email = digests.ActivityDigest(
+            user=user,
+            subject=subject,
+            interval=interval,
+            notifications=notifications[user.pk],
+        )
+        if email.activity["count"] > 0:
+            messages.append(email)
+    return send_batch(messages)
+
+
 @task(
     time_limit=600,
     soft_time_limit=570,
-    name="muckrock.message.tasks.send_activity_digest",
+    name="muckrock.message.tasks.send_digest_shard",
 )
-def send_activity_digest(user_id, subject, preference):
-    """Individual task to create and send an activity digest to a user."""
-    user = User.objects.get(id=user_id)
-    interval = {
-        "hourly": relativedelta(hours=1),
-        "daily": relativedelta(days=1),
-        "weekly": relativedelta(weeks=1),
-        "monthly": relativedelta(months=1),
-    }[preference]
-
-    logger.info(
-        "Starting activity digest at: %s User: %s Subject: %s Interval: %s",
-        timezone.now(),
-        user,
-        subject,
-        interval,
-    )
-    try:
-        email = digests.ActivityDigest(user=user, subject=subject, interval=interval)
-        email.send()
-    except SoftTimeLimitExceeded:
-        logger.error(
-            "Send Activity Digest took too long. " "User: %s, Subject: %s, Interval %s",
-            user,
-            subject,
-            interval,
-        )
+def send_digest_shard(shard_id, attempt):
+    """Send the next batch of digests for a shard, then queue the next batch
+    until every user in the shard has been handled"""
+    shard = DigestShard.objects.get(pk=shard_id)
+    if shard.attempts != attempt or shard.status in ("complete", "failed"):
+        # this shard has been re-run or is already finished
+        return
+    now = timezone.now()
+    if shard.status == "scheduled":
+        if not claim_in_flight_slot():
+            logger.info("Too many digest shards in flight, delaying %s", shard)
+            shard.datetime_updated = now
+            shard.save()
+            send_digest_shard.apply_async(args=[shard_id, attempt], countdown=60)
+            return
+        shard.status = "running"
+
+    user_ids = shard.get_user_ids(DIGEST_BATCH_SIZE)
+    # record progress before sending, so a failed batch is skipped
+    # instead of being sent twice when the shard is re-run
+    if user_ids:
+        shard.cursor = user_ids[-1]
+    if len(user_ids) < DIGEST_BATCH_SIZE:
+        shard.status = "complete"
+        shard.datetime_completed = now
+        release_in_flight_slot()
+    shard.datetime_updated = now
+    shard.save()
+
+    if user_ids:
+        builder = digests.ActivityDigestBuilder(shard.duration)
+        batch = [
+            (user_id, notifications)
+            for user_id, notifications in builder.build(user_ids).items()
+            if builder.count(notifications) > 0
+        ]
+        if batch:
+            sent = send_activity_digest_batch(batch, shard.subject, shard.preference)
+            DigestShard.objects.filter(pk=shard.pk).update(sent=F("sent") + sent)
+
+    if shard.status == "running":
+        send_digest_shard.delay(shard_id, attempt)
+    else:
+        logger.info("Finished %s", shard)
 
 
 def send_digests(preference, subject):
-    """Helper to send out timed digests"""
-    users = User.objects.filter(
-        profile__email_pref=preference, notifications__read=False
-    ).distinct()
-    for user in users:
-        send_activity_digest.delay(user.pk, subject, preference)
+    """Helper to send out timed digests
+    Users are split into shards, which are started at staggered times
+    across the schedule's spread window"""
+    for shard in DigestShard.objects.schedule(preference, subject):
+        send_digest_shard.apply_async(
+            args=[shard.pk, shard.attempts], eta=shard.datetime_scheduled
+        )
+
+
+@periodic_task(
+    run_every=crontab(minute="*/10"),
+    name="muckrock.message.tasks.retry_stuck_digest_shards",
+)
+def retry_stuck_digest_shards():
+    """Re-run digest shards which have stopped making progress"""
+    for shard in DigestShard.objects.get_stuck():
+        if shard.attempts + 1 >= settings.DIGEST_SHARD_MAX_ATTEMPTS:
+            logger.error(
+                "Giving up on stuck %s after %d attempts", shard, shard.attempts
+            )
+            if shard.status == "running":
+                release_in_flight_slot()
+            shard.status = "failed"
+            shard.save()
+        else:
+            logger.warning("Re-running stuck %s from user %d", shard, shard.cursor)
+            shard.attempts += 1
+            shard.datetime_updated = timezone.now()
+            shard.save()
+            send_digest_shard.delay(shard.pk, shard.attempts)
+    # clean up the history of old runs
+    DigestShard.objects.filter(
+        datetime_scheduled__lt=timezone.now() - relativedelta(months=2)
+    ).delete()
 
 
 # every hour
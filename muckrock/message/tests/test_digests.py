@@ -6,6 +6,7 @@ correctly grabbing site activity.
 
 # Django
 from django.test import TestCase
+from django.utils import timezone
 
 # Standard Library
 from datetime import date
@@ -94,8 +95,8 @@ class TestDailyDigest(TestCase):
             1,
             "There should be activity that is not user initiated.",
         )
-        eq_(email.activity["questions"]["mine"].first().action.actor, other_user)
-        eq_(email.activity["questions"]["mine"].first().action.verb, "answered")
+        eq_(email.activity["questions"]["mine"][0].action.actor, other_user)
+        eq_(email.activity["questions"]["mine"][0].action.verb, "answered")
         eq_(email.send(), 1, "The email should send.")
 
     def test_digest_follow_questions(self):
@@ -107,15 +108,75 @@ class TestDailyDigest(TestCase):
         answer = AnswerFactory(user=other_user, question=question)
         email = self.digest(user=self.user, interval=self.interval)
         eq_(email.activity["count"], 1, "There should be activity.")
-        eq_(email.activity["questions"]["following"].first().action.actor, other_user)
+        eq_(email.activity["questions"]["following"][0].action.actor, other_user)
         eq_(
-            email.activity["questions"]["following"].first().action.action_object,
-            answer,
+            email.activity["questions"]["following"][0].action.action_object, answer,
         )
-        eq_(email.activity["questions"]["following"].first().action.target, question)
+        eq_(email.activity["questions"]["following"][0].action.target, question)
         eq_(email.send(), 1, "The email should send.")
 
 
+class TestActivityDigestBuilder(TestCase):
+    """The builder classifies notifications for many users at once"""
+
+    def setUp(self):
+        self.builder = digests.ActivityDigestBuilder(
+            timezone.now() - relativedelta(days=1)
+        )
+
+    def test_build(self):
+        """Notifications should be classified by owner and verb"""
+        owner, follower, idle = UserFactory.create_batch(3)
+        foia = FOIARequestFactory(composer__user=owner)
+        completed = new_action(foia.agency, "completed", target=foia)
+        fix = new_action(foia.agency, "requires fix", target=foia)
+        owner_completed, follower_completed = notify([owner, follower], completed)
+        (owner_fix,) = notify(owner, fix)
+        # unclassified verbs are not included in the digest
+        notify(follower, new_action(owner, "embargoed", target=foia))
+        question = QuestionFactory(user=follower)
+        (question_notification,) = notify(
+            follower, new_action(owner, "answered", target=question)
+        )
+
+        classified = self.builder.build([owner.pk, follower.pk, idle.pk])
+        ok_(idle.pk not in classified)
+        eq_(classified[owner.pk]["requests"]["mine"]["completed"], [owner_completed.pk])
+        eq_(classified[owner.pk]["requests"]["mine"]["require_fix"], [owner_fix.pk])
+        eq_(self.builder.count(classified[owner.pk]), 2)
+        eq_(
+            classified[follower.pk]["requests"]["following"]["completed"],
+            [follower_completed.pk],
+        )
+        eq_(classified[follower.pk]["questions"]["mine"], [question_notification.pk])
+        eq_(self.builder.count(classified[follower.pk]), 2)
+
+    def test_read_notifications(self):
+        """Read notifications should not be included"""
+        user = UserFactory()
+        foia = FOIARequestFactory()
+        (notification,) = notify(
+            user, new_action(foia.agency, "completed", target=foia)
+        )
+        notification.mark_read()
+        eq_(self.builder.build([user.pk]), {})
+
+    def test_digest_from_builder(self):
+        """A digest may be rendered from the pre-classified notifications"""
+        user = UserFactory()
+        foia = FOIARequestFactory()
+        notify(user, new_action(foia.agency, "rejected", target=foia))
+        classified = self.builder.build([user.pk])
+        email = digests.ActivityDigest(
+            user=user,
+            interval=relativedelta(days=1),
+            notifications=classified[user.pk],
+        )
+        eq_(email.activity["count"], 1)
+        eq_(len(email.activity["requests"]["following"]["rejected"]), 1)
+        eq_(email.send(), 1)
+
+
 class TestStaffDigest(TestCase):
     """The Staff Digest updates us about the state of the website."""
 
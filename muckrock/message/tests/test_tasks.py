@@ -5,7 +5,13 @@ object cannot be instantiated.
 """
 
 # Django
-from django.test import TestCase
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+# Standard Library
+from datetime import timedelta
 
 # Third Party
 import mock
@@ -13,7 +19,11 @@ import nose.tools
 
 # MuckRock
 from muckrock.core.factories import NotificationFactory, ProjectFactory, UserFactory
+from muckrock.core.utils import new_action, notify
+from muckrock.foia.factories import FOIARequestFactory
 from muckrock.message import tasks
+from muckrock.message.digests import ActivityDigestBuilder
+from muckrock.message.models import DIGEST_SCHEDULES, DigestShard
 from muckrock.task.factories import FlaggedTaskFactory
 
 ok_ = nose.tools.ok_
@@ -27,19 +37,121 @@ class TestDailyTask(TestCase):
     def setUp(self):
         self.user = UserFactory()
 
-    @mock.patch("muckrock.message.tasks.send_activity_digest.delay")
+    @mock.patch("muckrock.message.tasks.send_activity_digest_batch", return_value=1)
     def test_when_unread(self, mock_send):
         """The send method should be called when a user has unread notifications."""
+        foia = FOIARequestFactory()
+        notification = NotificationFactory(
+            user=self.user, action=new_action(foia.agency, "completed", target=foia),
+        )
+        tasks.daily_digest()
+        notifications = ActivityDigestBuilder.empty()
+        notifications["requests"]["following"]["completed"] = [notification.pk]
+        mock_send.assert_called_once_with(
+            [(self.user.pk, notifications)], "Daily Digest", "daily"
+        )
+
+    @mock.patch("muckrock.message.tasks.send_activity_digest_batch")
+    def test_when_unread_not_digested(self, mock_send):
+        """The send method should not be called when a user's unread
+        notifications would not be included in the digest."""
         NotificationFactory(user=self.user)
         tasks.daily_digest()
-        mock_send.assert_called_with(self.user.pk, "Daily Digest", "daily")
+        mock_send.assert_not_called()
 
-    @mock.patch("muckrock.message.tasks.send_activity_digest.delay")
+    @mock.patch("muckrock.message.tasks.send_activity_digest_batch")
     def test_when_no_unread(self, mock_send):
         """The send method should not be called when a user does not have unread notifications."""
         tasks.daily_digest()
         mock_send.assert_not_called()
 
+    def test_send_batch(self):
+        """A batch of digests should be rendered and delivered together"""
+        users = UserFactory.create_batch(3)
+        foia = FOIARequestFactory()
+        notify(users, new_action(foia.agency, "completed", target=foia))
+        tasks.daily_digest()
+        eq_(len(mail.outbox), 3)
+        eq_({m.to[0] for m in mail.outbox}, {u.email for u in users})
+
+
+class TestDigestShards(TestCase):
+    """Tests the sharded scheduling of digests"""
+
+    def test_schedule(self):
+        """Shards should be spread out across the schedule's window"""
+        shards = DigestShard.objects.schedule("daily", "Daily Digest")
+        schedule = DIGEST_SCHEDULES["daily"]
+        eq_(len(shards), schedule["shards"])
+        times = [s.datetime_scheduled for s in shards]
+        eq_(times, sorted(times))
+        ok_(times[-1] - times[0] < schedule["spread"])
+        for shard in shards:
+            eq_(shard.duration, shard.datetime_scheduled - schedule["interval"])
+
+    def test_shard_users(self):
+        """Each user should belong to exactly one shard"""
+        foia = FOIARequestFactory()
+        users = UserFactory.create_batch(5)
+        notify(users, new_action(foia.agency, "completed", target=foia))
+        shards = DigestShard.objects.schedule("daily", "Daily Digest")
+        user_ids = [pk for shard in shards for pk in shard.get_user_ids(10)]
+        eq_(sorted(user_ids), sorted(u.pk for u in users))
+
+    def test_send_shard(self):
+        """Sending a shard should record its progress"""
+        foia = FOIARequestFactory()
+        users = UserFactory.create_batch(3)
+        notify(users, new_action(foia.agency, "completed", target=foia))
+        for shard in DigestShard.objects.schedule("daily", "Daily Digest"):
+            tasks.send_digest_shard(shard.pk, 0)
+        eq_(DigestShard.objects.exclude(status="complete").count(), 0)
+        eq_(sum(DigestShard.objects.values_list("sent", flat=True)), 3)
+        eq_(len(mail.outbox), 3)
+
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    )
+    @mock.patch("muckrock.message.tasks.send_digest_shard.apply_async")
+    def test_in_flight_cap(self, mock_apply):
+        """Shards should wait while too many shards are running"""
+        first, second = DigestShard.objects.schedule("hourly", "Hourly Digest")[:2]
+        cache.delete(tasks.DIGEST_IN_FLIGHT_KEY)
+        with self.settings(DIGEST_MAX_IN_FLIGHT=1):
+            ok_(tasks.claim_in_flight_slot())
+            tasks.send_digest_shard(second.pk, 0)
+            second.refresh_from_db()
+            eq_(second.status, "scheduled")
+            mock_apply.assert_called_once_with(args=[second.pk, 0], countdown=60)
+            # once the running shard finishes, the waiting one may start
+            tasks.release_in_flight_slot()
+            tasks.send_digest_shard(second.pk, 0)
+            second.refresh_from_db()
+            eq_(second.status, "complete")
+            eq_(cache.get(tasks.DIGEST_IN_FLIGHT_KEY), 0)
+
+    @mock.patch("muckrock.message.tasks.send_digest_shard.delay")
+    def test_retry_stuck(self, mock_delay):
+        """Stuck shards should be re-run, and given up on after too many attempts"""
+        stuck, failing = DigestShard.objects.schedule("hourly", "Hourly Digest")[:2]
+        past = timezone.now() - timedelta(hours=1)
+        DigestShard.objects.filter(pk=stuck.pk).update(
+            status="running", datetime_updated=past
+        )
+        DigestShard.objects.filter(pk=failing.pk).update(
+            status="running", datetime_updated=past, attempts=2
+        )
+        with self.settings(DIGEST_SHARD_MAX_ATTEMPTS=3):
+            tasks.retry_stuck_digest_shards()
+        mock_delay.assert_called_once_with(stuck.pk, 1)
+        failing.refresh_from_db()
+        eq_(failing.status, "failed")
+        # a task from the previous attempt should no longer do anything
+        stuck.refresh_from_db()
+        tasks.send_digest_shard(stuck.pk, 0)
+        eq_(stuck.cursor, DigestShard.objects.get(pk=stuck.pk).cursor)
+        eq_(stuck.status, DigestShard.objects.get(pk=stuck.pk).status)
+
 
 class TestStaffTask(TestCase):
     """Tests the daily staff digest task."""
@@ -17,6 +17,10 @@ class NewsConfig(AppConfig):
         from actstream import registry as action
         from watson import search
 
+        from muckrock.core import page_cache, related
+
         Article = self.get_model("Article")
         action.register(Article)
         search.register(Article.objects.get_published())
+        related.register(Article, user="authors", project="projects")
+        page_cache.register(Article)
@@ -16,6 +16,7 @@ from easy_thumbnails.fields import ThumbnailerImageField
 from taggit.managers import TaggableManager
 
 # MuckRock
+from muckrock.core import page_cache
 from muckrock.foia.models import FOIARequest
 from muckrock.tags.models import TaggedItemBase
 
@@ -102,9 +103,10 @@ class Article(models.Model):
         super(Article, self).save(*args, **kwargs)
 
     def clear_cache(self):
-        """Clear the template cache"""
+        """Clear the template and page caches"""
         if self.pk:
             cache.delete(make_template_fragment_key("article_detail_1", [self.pk]))
+            page_cache.purge(self)
 
     def get_authors_names(self):
         """Get all authors names for a byline"""
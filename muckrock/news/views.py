@@ -5,7 +5,7 @@ Views for the news application
 # Django
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.db.models import Prefetch, Q
+from django.db.models import Prefetch
 from django.http import Http404, HttpResponseForbidden
 from django.shortcuts import redirect
 from django.urls import reverse
@@ -18,6 +18,7 @@ from django.views.generic.dates import (
 )
 
 # MuckRock
+from muckrock.core import page_cache, related
 from muckrock.core.utils import cache_get_or_set
 from muckrock.core.views import (
     MRAutocompleteView,
@@ -53,29 +54,21 @@ class NewsDetail(DateDetailView):
         """Can future posts be seen?"""
         return self.request.user.is_staff
 
+    def get(self, request, *args, **kwargs):
+        """Allow the page to be cached for anonymous visitors"""
+        response = super(NewsDetail, self).get(request, *args, **kwargs)
+        return page_cache.tag(response, self.object)
+
     def get_related_articles(self, article):
         """Get articles related to the current one."""
-        projects = list(article.projects.all())
-        tags = list(article.tags.all())
-        # articles in the same project as this one
-        project_filter = Q(projects__in=projects)
-        # articles with the same tag as this one
-        tag_filter = Q(tags__in=tags)
-        # articles in projects with the same tag as this one
-        project_tag_filter = Q(projects__tags__in=tags)
-        published = (
+        # articles sharing the most projects, tags and authors with this one
+        return related.suggest(
+            article,
             Article.objects.get_published()
             .only("image", "title", "slug", "pub_date")
-            .exclude(pk=article.pk)
-            .order_by()
-        )
-        related_articles = (
-            published.filter(project_filter)
-            .union(published.filter(tag_filter), published.filter(project_tag_filter))
-            .order_by("-pub_date")
-            .prefetch_authors()
+            .prefetch_authors(),
+            4,
         )
-        return related_articles[:4]
 
     def get_context_data(self, **kwargs):
         context = super(NewsDetail, self).get_context_data(**kwargs)
@@ -0,0 +1,79 @@
+# Django
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("organization", "0032_auto_20200806_1115")]
+
+    operations = [
+        migrations.CreateModel(
+            name="RequestLedgerEntry",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "monthly_requests",
+                    models.IntegerField(
+                        help_text="The change in monthly requests, negative for "
+                        "requests made"
+                    ),
+                ),
+                (
+                    "number_requests",
+                    models.IntegerField(
+                        help_text="The change in regular requests, negative for "
+                        "requests made"
+                    ),
+                ),
+                (
+                    "monthly_balance",
+                    models.IntegerField(
+                        help_text="The monthly requests left after this change"
+                    ),
+                ),
+                (
+                    "number_balance",
+                    models.IntegerField(
+                        help_text="The regular requests left after this change"
+                    ),
+                ),
+                (
+                    "reason",
+                    models.CharField(
+                        choices=[
+                            ("make", "Requests made"),
+                            ("return", "Requests returned"),
+                            ("add", "Requests added"),
+                            ("update", "Subscription updated"),
+                        ],
+                        max_length=6,
+                    ),
+                ),
+                (
+                    "datetime",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ledger_entries",
+                        to="organization.Organization",
+                    ),
+                ),
+            ],
+            options={"verbose_name_plural": "request ledger entries"},
+        )
+    ]
@@ -5,10 +5,9 @@ Models for the organization application
 # Django
 from django.contrib.auth.models import User
 from django.contrib.postgres.fields import JSONField
-from django.db import models, transaction
-from django.db.models.expressions import F
-from django.db.models.functions import Greatest
+from django.db import connection, models, transaction
 from django.urls import reverse
+from django.utils import timezone
 
 # Standard Library
 import logging
@@ -69,6 +68,9 @@ class Organization(models.Model):
 
     payment_failed = models.BooleanField(default=False)
 
+    # how many times to try deducting requests if the balance keeps changing
+    MAX_BALANCE_ATTEMPTS = 10
+
     def __str__(self):
         if self.individual:
             return "{} (Individual)".format(self.name)
@@ -129,21 +131,6 @@ class Organization(models.Model):
         # calc reqs/month in case it has changed
         self.requests_per_month = self.entitlement.requests_per_month(data["max_users"])
 
-        # if date update has changed, then this is a monthly restore of the
-        # subscription, and we should restore monthly requests.  If not, requests
-        # per month may have changed if they changed their plan or their user count,
-        # in which case we should add the difference to their monthly requests
-        # if requests per month increased
-        if self.date_update == date_update:
-            # add additional monthly requests immediately
-            self.monthly_requests = F("monthly_requests") + Greatest(
-                self.requests_per_month - F("requests_per_month"), 0
-            )
-        else:
-            # reset monthly requests when date_update is updated
-            self.monthly_requests = self.requests_per_month
-            self.date_update = date_update
-
         # update the remaining fields
         fields = [
             "name",
@@ -157,38 +144,142 @@ class Organization(models.Model):
         for field in fields:
             if field in data:
                 setattr(self, field, data[field])
-        self.save()
 
-    @transaction.atomic
-    def make_requests(self, amount):
-        """Try to deduct requests from the organization's balance"""
-        request_count = {"monthly": 0, "regular": 0}
-        organization = Organization.objects.select_for_update().get(pk=self.pk)
-
-        request_count["monthly"] = min(amount, organization.monthly_requests)
-        amount -= request_count["monthly"]
-
-        request_count["regular"] = min(amount, organization.number_requests)
-        amount -= request_count["regular"]
+        with transaction.atomic():
+            # lock the balance, so that no requests are made or added between
+            # reading it and recording the change in the ledger
+            current = (
+                Organization.objects.select_for_update()
+                .values("monthly_requests", "number_requests", "requests_per_month")
+                .get(pk=self.pk)
+            )
+            monthly = current["monthly_requests"]
+            self.number_requests = current["number_requests"]
+
+            # if date update has changed, then this is a monthly restore of the
+            # subscription, and we should restore monthly requests.  If not,
+            # requests per month may have changed if they changed their plan or
+            # their user count, in which case we should add the difference to
+            # their monthly requests if requests per month increased
+            if self.date_update == date_update:
+                # add additional monthly requests immediately
+                self.monthly_requests = monthly + max(
+                    self.requests_per_month - current["requests_per_month"], 0
+                )
+            else:
+                # reset monthly requests when date_update is updated
+                self.monthly_requests = self.requests_per_month
+                self.date_update = date_update
+
+            # the purchased requests are never set from squarelet, and are left
+            # out so this does not overwrite any requests added concurrently
+            fields += [
+                "entitlement",
+                "requests_per_month",
+                "monthly_requests",
+                "date_update",
+            ]
+            self.save(update_fields=fields)
+            if self.monthly_requests != monthly:
+                self.ledger_entries.create(
+                    monthly_requests=self.monthly_requests - monthly,
+                    number_requests=0,
+                    monthly_balance=self.monthly_requests,
+                    number_balance=self.number_requests,
+                    reason="update",
+                )
 
-        if amount > 0:
-            raise InsufficientRequestsError(amount)
+    def make_requests(self, amount):
+        """Try to deduct requests from the organization's balance
+
+        Monthly requests are used before regular requests.  The balance is
+        read without locking, and then deducted with a conditional update which
+        only succeeds if the balance still covers the deduction, retrying if it
+        has changed in between.  If it keeps changing, the balance is locked
+        for the last attempt, so only an insufficient balance is an error.
+        """
+        for _ in range(self.MAX_BALANCE_ATTEMPTS - 1):
+            monthly, regular = Organization.objects.values_list(
+                "monthly_requests", "number_requests"
+            ).get(pk=self.pk)
+            request_count = self._split_requests(amount, monthly, regular)
+            # only dip into regular requests while monthly requests are used up
+            if request_count["regular"] > 0:
+                condition = "monthly_requests = %s AND number_requests >= %s"
+            else:
+                condition = "monthly_requests >= %s AND number_requests >= %s"
+            if self._change_balance(
+                -request_count["monthly"],
+                -request_count["regular"],
+                "make",
+                condition,
+                [request_count["monthly"], request_count["regular"]],
+            ):
+                return request_count
+        with transaction.atomic():
+            monthly, regular = (
+                Organization.objects.select_for_update()
+                .values_list("monthly_requests", "number_requests")
+                .get(pk=self.pk)
+            )
+            request_count = self._split_requests(amount, monthly, regular)
+            self._change_balance(
+                -request_count["monthly"], -request_count["regular"], "make"
+            )
+        return request_count
 
-        organization.monthly_requests -= request_count["monthly"]
-        organization.number_requests -= request_count["regular"]
-        organization.save()
+    @staticmethod
+    def _split_requests(amount, monthly, regular):
+        """Split the requests to make between the monthly and regular balances,
+        raising an error if they do not cover them"""
+        if monthly + regular < amount:
+            raise InsufficientRequestsError(amount - monthly - regular)
+        request_count = {"monthly": min(amount, monthly)}
+        request_count["regular"] = amount - request_count["monthly"]
         return request_count
 
     def return_requests(self, amounts):
         """Return requests to the organization's balance"""
-        self.monthly_requests = F("monthly_requests") + amounts["monthly"]
-        self.number_requests = F("number_requests") + amounts["regular"]
-        self.save()
+        self._change_balance(amounts["monthly"], amounts["regular"], "return")
 
     def add_requests(self, amount):
         """Add requests"""
-        self.number_requests = F("number_requests") + amount
-        self.save()
+        self._change_balance(0, amount, "add")
+
+    def _change_balance(self, monthly, regular, reason, condition="TRUE", params=()):
+        """Change the request balance and record the change in the ledger with a
+        single statement, if the condition holds
+
+        Returns whether the balance was changed
+        """
+        # pylint: disable=too-many-arguments
+        sql = """
+            WITH changed AS (
+                UPDATE organization_organization
+                SET monthly_requests = monthly_requests + %s,
+                    number_requests = number_requests + %s
+                WHERE id = %s AND {condition}
+                RETURNING id, monthly_requests, number_requests
+            ), entry AS (
+                INSERT INTO organization_requestledgerentry
+                    (organization_id, monthly_requests, number_requests,
+                    monthly_balance, number_balance, reason, datetime)
+                SELECT id, %s, %s, monthly_requests, number_requests, %s, %s
+                FROM changed
+            )
+            SELECT monthly_requests, number_requests FROM changed
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                sql.format(condition=condition),
+                [monthly, regular, self.pk, *params]
+                + [monthly, regular, reason, timezone.now()],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            return False
+        self.monthly_requests, self.number_requests = row
+        return True
 
     def pay(self, amount, description, token, save_card, fee_amount=0):
         """Pay via Squarelet API"""
@@ -212,6 +303,43 @@ class Organization(models.Model):
             self.save()
 
 
+class RequestLedgerEntry(models.Model):
+    """A change to an organization's request balance"""
+
+    REASONS = (
+        ("make", "Requests made"),
+        ("return", "Requests returned"),
+        ("add", "Requests added"),
+        ("update", "Subscription updated"),
+    )
+
+    organization = models.ForeignKey(
+        Organization, on_delete=models.CASCADE, related_name="ledger_entries"
+    )
+    monthly_requests = models.IntegerField(
+        help_text="The change in monthly requests, negative for requests made"
+    )
+    number_requests = models.IntegerField(
+        help_text="The change in regular requests, negative for requests made"
+    )
+    monthly_balance = models.IntegerField(
+        help_text="The monthly requests left after this change"
+    )
+    number_balance = models.IntegerField(
+        help_text="The regular requests left after this change"
+    )
+    reason = models.CharField(max_length=6, choices=REASONS)
+    datetime = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name_plural = "request ledger entries"
+
+    def __str__(self):
+        return "{}: {:+d} monthly, {:+d} regular".format(
+            self.get_reason_display(), self.monthly_requests, self.number_requests
+        )
+
+
 class Membership(models.Model):
     """Through table for organization membership"""
 
@@ -3,9 +3,11 @@ Tests the models of the organization application
 """
 
 # Django
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
 
 # Standard Library
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 
 # Third Party
@@ -73,6 +75,60 @@ class TestOrganization(TestCase):
         eq_(org.monthly_requests, 0)
         eq_(org.number_requests, 1)
 
+        eq_(
+            list(
+                org.ledger_entries.order_by("pk").values_list(
+                    "monthly_requests", "number_requests", "reason"
+                )
+            ),
+            [(-5, 0, "make"), (-5, -5, "make"), (0, -4, "make")],
+        )
+
+    def test_return_add_requests(self):
+        """Test returning and adding requests"""
+        org = OrganizationFactory(monthly_requests=1, number_requests=2)
+        org.return_requests({"monthly": 3, "regular": 4})
+        eq_((org.monthly_requests, org.number_requests), (4, 6))
+        org.add_requests(5)
+        org.refresh_from_db()
+        eq_((org.monthly_requests, org.number_requests), (4, 11))
+        eq_(
+            list(
+                org.ledger_entries.order_by("pk").values_list(
+                    "monthly_balance", "number_balance", "reason"
+                )
+            ),
+            [(4, 6, "return"), (4, 11, "add")],
+        )
+
+
+class TestOrganizationConcurrency(TransactionTestCase):
+    """Test making requests from many connections at once"""
+
+    def test_make_requests_concurrently(self):
+        """The balance is never overdrawn by concurrent submissions"""
+        org = OrganizationFactory(monthly_requests=15, number_requests=15)
+
+        def make_requests():
+            """Make requests from a fresh database connection"""
+            try:
+                return org.make_requests(2)
+            except InsufficientRequestsError:
+                return None
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: make_requests(), range(20)))
+
+        made = [r for r in results if r is not None]
+        eq_(len(made), 15)
+        eq_(sum(r["monthly"] for r in made), 15)
+        eq_(sum(r["regular"] for r in made), 15)
+        org.refresh_from_db()
+        eq_((org.monthly_requests, org.number_requests), (0, 0))
+        eq_(org.ledger_entries.count(), 15)
+
 
 def ent_json(entitlement, date_update):
     """Helper function for serializing entitlement data"""
@@ -256,3 +312,11 @@ class TestSquareletUpdateData(TestCase):
         organization.refresh_from_db()
         eq_(organization.requests_per_month, 50)
         eq_(organization.monthly_requests, 50)
+        eq_(
+            list(
+                organization.ledger_entries.values_list(
+                    "monthly_requests", "monthly_balance", "reason"
+                )
+            ),
+            [(17, 50, "update")],
+        )
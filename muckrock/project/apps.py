@@ -17,6 +17,10 @@ class ProjectConfig(AppConfig):
         from actstream import registry as action
         from watson import search
 
+        from muckrock.core import page_cache, related
+
         Project = self.get_model("Project")
         action.register(Project)
         search.register(Project.objects.get_public())
+        related.register(Project, user="contributors", project="pk")
+        page_cache.register(Project)
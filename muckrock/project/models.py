@@ -16,6 +16,7 @@ from datetime import date
 import taggit
 
 # MuckRock
+from muckrock.core import page_cache, related
 from muckrock.crowdfund.models import Crowdfund
 from muckrock.foia.models import FOIARequest
 from muckrock.news.models import Article
@@ -149,6 +150,7 @@ class Project(models.Model):
         # pylint: disable=signature-differs
         self.slug = slugify(self.title) or "project"
         super(Project, self).save(*args, **kwargs)
+        page_cache.purge(self)
 
     def get_absolute_url(self):
         """Returns the project URL as a string"""
@@ -176,24 +178,22 @@ class Project(models.Model):
         """Return all the active crowdfunds on this project."""
         return self.crowdfunds.filter(closed=False)
 
-    def suggest_requests(self):
-        """Returns a list of requests that may be related to this project."""
-        requests = list(
-            FOIARequest.objects.filter(
-                composer__user__in=self.contributors.all(),
-                tags__name__in=self.tags.names(),
-            ).exclude(projects=self)
+    def suggest_requests(self, count=10):
+        """Returns a list of requests that may be related to this project,
+        made by its contributors and sharing its tags."""
+        return related.suggest(
+            self,
+            FOIARequest.objects.exclude(projects=self),
+            count,
+            require=("user", "tag"),
         )
-        return requests
-
-    def suggest_articles(self):
-        """Returns a list of articles that may be related to this project."""
-        articles = list(
-            Article.objects.filter(
-                authors__in=self.contributors.all(), tags__name__in=self.tags.names()
-            ).exclude(projects=self)
+
+    def suggest_articles(self, count=10):
+        """Returns a list of articles that may be related to this project,
+        written by its contributors and sharing its tags."""
+        return related.suggest(
+            self, Article.objects.exclude(projects=self), count, require=("user", "tag")
         )
-        return articles
 
     def publish(self, notes):
         """Publishing a project sets it public and returns a ProjectReviewTask."""
@@ -201,9 +201,10 @@ class Project(models.Model):
         return ProjectReviewTask.objects.create(project=self, notes=notes)
 
     def clear_cache(self):
-        """Clear the template cache for this project"""
+        """Clear the template and page caches for this project"""
         key = make_template_fragment_key("project_detail_objects", [self.pk])
         cache.delete(key)
+        page_cache.purge(self)
 
 
 class ProjectCrowdfunds(models.Model):
@@ -13,6 +13,7 @@ from nose.tools import eq_, ok_
 
 # MuckRock
 from muckrock.core.factories import ArticleFactory, ProjectFactory, UserFactory
+from muckrock.core.test_utils import RunCommitHooksMixin
 from muckrock.foia.factories import FOIARequestFactory
 from muckrock.task.models import ProjectReviewTask
 
@@ -33,7 +34,7 @@ test_image = SimpleUploadedFile(
 )
 
 
-class TestProject(TestCase):
+class TestProject(RunCommitHooksMixin, TestCase):
     """Projects are a mixture of general and specific information on a broad subject."""
 
     def setUp(self):
@@ -143,6 +144,8 @@ class TestProject(TestCase):
         self.project.tags.add(tags)
         test_request = FOIARequestFactory(composer__user=user)
         test_request.tags.add(tags)
+        # index the project and request
+        self.run_commit_hooks()
         # since they have the same user and tags, the project should suggest the request
         ok_(test_request in self.project.suggest_requests())
         # add the request to the project, then try again. it should not be suggested
@@ -164,6 +167,8 @@ class TestProject(TestCase):
         test_article = ArticleFactory()
         test_article.authors.add(user)
         test_article.tags.add(tags)
+        # index the project and article
+        self.run_commit_hooks()
         # since they have the same user and tags, the project should suggest the article.
         ok_(test_article in self.project.suggest_articles())
         # add the article to the project, then try again. it should not be suggested
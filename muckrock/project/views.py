@@ -22,11 +22,10 @@ from django.views.generic import (
 # Standard Library
 from datetime import date, timedelta
 
-# Third Party
-from actstream.models import followers
-
 # MuckRock
 from muckrock.accounts.utils import mixpanel_event
+from muckrock.core import page_cache
+from muckrock.core.follow import followers_of
 from muckrock.core.utils import new_action
 from muckrock.core.views import MRAutocompleteView, MRSearchFilterListView
 from muckrock.crowdfund.forms import CrowdfundForm
@@ -147,6 +146,11 @@ class ProjectDetailView(DetailView):
         self._obj = super(ProjectDetailView, self).get_object(queryset=queryset)
         return self._obj
 
+    def get(self, request, *args, **kwargs):
+        """Allow the page to be cached for anonymous visitors"""
+        response = super(ProjectDetailView, self).get(request, *args, **kwargs)
+        return page_cache.tag(response, self.object)
+
     def get_context_data(self, **kwargs):
         """Adds visible requests and followers to project context"""
         context = super(ProjectDetailView, self).get_context_data(**kwargs)
@@ -165,7 +169,7 @@ class ProjectDetailView(DetailView):
         )
         context["articles"] = articles[:3]
         context["articles_count"] = articles.count()
-        context["followers"] = followers(project)
+        context["followers"] = followers_of(project)
         context["contributors"] = project.contributors.select_related("profile")
         context["user_is_experimental"] = (
             user.is_authenticated and user.profile.experimental
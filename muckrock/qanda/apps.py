@@ -17,8 +17,11 @@ class QuestionConfig(AppConfig):
         from actstream import registry
         from watson import search
 
+        from muckrock.core import related
+
         Question = self.get_model("Question")
         Answer = self.get_model("Answer")
         registry.register(Question)
         registry.register(Answer)
         search.register(Question)
+        related.register(Question, user="user")
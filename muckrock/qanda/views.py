@@ -95,11 +95,7 @@ class Detail(DetailView):
         user = request.user
         if user.is_authenticated:
             question = self.get_object()
-            notifications = (
-                Notification.objects.for_user(user).for_object(question).get_unread()
-            )
-            for notification in notifications:
-                notification.mark_read()
+            Notification.objects.for_user(user).for_object(question).mark_read()
         return super(Detail, self).get(request, *args, **kwargs)
 
     def post(self, request, **kwargs):
@@ -167,6 +167,8 @@ MIDDLEWARE = (
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "muckrock.core.middleware.PermissionCacheMiddleware",
+    "muckrock.core.middleware.AnonymousPageCacheMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.flatpages.middleware.FlatpageFallbackMiddleware",
@@ -297,6 +299,37 @@ CELERY_REDIS_MAX_CONNECTIONS = os.environ.get("CELERY_REDIS_MAX_CONNECTIONS")
 if CELERY_REDIS_MAX_CONNECTIONS is not None:
     CELERY_REDIS_MAX_CONNECTIONS = int(CELERY_REDIS_MAX_CONNECTIONS)
 CELERY_TIMEZONE = TIME_ZONE
+# the number of requests from a multirequest created by each task
+COMPOSER_CREATE_CHUNK_SIZE = int(os.environ.get("COMPOSER_CREATE_CHUNK_SIZE", 25))
+# autosaved changes to a draft are written out together this many seconds after
+# the first of them
+COMPOSER_AUTOSAVE_DELAY = int(os.environ.get("COMPOSER_AUTOSAVE_DELAY", 10))
+
+# the maximum number of digest shards sending at once
+DIGEST_MAX_IN_FLIGHT = int(os.environ.get("DIGEST_MAX_IN_FLIGHT", 8))
+# seconds without progress before a digest shard is considered stuck
+DIGEST_SHARD_TIMEOUT = int(os.environ.get("DIGEST_SHARD_TIMEOUT", 20 * 60))
+# number of times to re-run a stuck digest shard before giving up
+DIGEST_SHARD_MAX_ATTEMPTS = int(os.environ.get("DIGEST_SHARD_MAX_ATTEMPTS", 3))
+# number of statistics metric groups to query concurrently, each on its own
+# database connection
+STATISTICS_CONCURRENCY = int(os.environ.get("STATISTICS_CONCURRENCY", 4))
+
+# limits for downloading files linked to from incoming mail
+LINK_DOWNLOAD_MAX_SIZE = int(
+    os.environ.get("LINK_DOWNLOAD_MAX_SIZE", 2 * 1024 * 1024 * 1024)
+)
+# seconds allowed for the whole download, and to connect or wait for data
+LINK_DOWNLOAD_TIME_LIMIT = int(os.environ.get("LINK_DOWNLOAD_TIME_LIMIT", 30 * 60))
+LINK_DOWNLOAD_TIMEOUT = int(os.environ.get("LINK_DOWNLOAD_TIMEOUT", 60))
+# downloads are held in memory up to this size, then written to disk
+LINK_DOWNLOAD_SPOOL_SIZE = int(
+    os.environ.get("LINK_DOWNLOAD_SPOOL_SIZE", 16 * 1024 * 1024)
+)
+LINK_DOWNLOAD_CONCURRENCY = int(os.environ.get("LINK_DOWNLOAD_CONCURRENCY", 4))
+
+# seconds to remember recently resolved email addresses and phone numbers
+ADDRESS_CACHE_TIMEOUT = int(os.environ.get("ADDRESS_CACHE_TIMEOUT", 60))
 
 AUTHENTICATION_BACKENDS = (
     "rules.permissions.ObjectPermissionBackend",
@@ -408,6 +441,11 @@ MAILGUN_SERVER_NAME = "requests.muckrock.com"
 
 EMAIL_SUBJECT_PREFIX = "[Muckrock]"
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+# backend used by workers to deliver batches of rendered emails, such as digests,
+# over a single connection
+BATCH_EMAIL_BACKEND = EMAIL_BACKEND
+# how long to cache the autologin tokens prefetched for a batch of emails
+URL_AUTH_TOKEN_BATCH_TIMEOUT = 5 * 60
 
 DOCUMENTCLOUD_USERNAME = os.environ.get("DOCUMENTCLOUD_USERNAME")
 DOCUMENTCLOUD_PASSWORD = os.environ.get("DOCUMENTCLOUD_PASSWORD")
@@ -457,6 +495,26 @@ CACHES = {
     },
 }
 DEFAULT_CACHE_TIMEOUT = 15 * 60
+# full pages are cached for anonymous visitors for this long, unless purged
+PAGE_CACHE_TIMEOUT = int(os.environ.get("PAGE_CACHE_TIMEOUT", DEFAULT_CACHE_TIMEOUT))
+# and may be cached by a CDN for this long
+PAGE_CACHE_CDN_TIMEOUT = int(os.environ.get("PAGE_CACHE_CDN_TIMEOUT", 60))
+
+# the change feeds only list changes older than this many seconds, to give
+# transactions which are still open time to commit
+CHANGE_FEED_DELAY = int(os.environ.get("CHANGE_FEED_DELAY", 60))
+# and list at most this many changes at a time
+CHANGE_FEED_PAGE_SIZE = int(os.environ.get("CHANGE_FEED_PAGE_SIZE", 100))
+
+# notifications are inserted this many at a time
+NOTIFICATION_BATCH_SIZE = int(os.environ.get("NOTIFICATION_BATCH_SIZE", 1000))
+# notifying more users than this is done in a background task
+NOTIFICATION_ASYNC_THRESHOLD = int(os.environ.get("NOTIFICATION_ASYNC_THRESHOLD", 500))
+# read notifications, and actions with no notifications, are moved to archive
+# tables once they are older than this many days
+NOTIFICATION_RETENTION_DAYS = int(os.environ.get("NOTIFICATION_RETENTION_DAYS", 90))
+ACTION_RETENTION_DAYS = int(os.environ.get("ACTION_RETENTION_DAYS", 365))
+ARCHIVE_BATCH_SIZE = int(os.environ.get("ARCHIVE_BATCH_SIZE", 5000))
 
 REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "muckrock.core.pagination.StandardPagination",
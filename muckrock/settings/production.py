@@ -26,5 +26,7 @@ if boolcheck(os.environ.get("USE_CELERY_EMAIL", True)):
     EMAIL_BACKEND = "djcelery_email.backends.CeleryEmailBackend"
 else:
     EMAIL_BACKEND = "django_mailgun.MailgunBackend"
+# batches are already sent from a worker, so bypass celery email
+BATCH_EMAIL_BACKEND = "django_mailgun.MailgunBackend"
 
 SCOUT_NAME = "MuckRock"
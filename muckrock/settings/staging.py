@@ -28,6 +28,7 @@ class HijackMailgunBackend(HijackBackendMixin, MailgunBackend):
 
 
 EMAIL_BACKEND = "muckrock.settings.staging.HijackMailgunBackend"
+BATCH_EMAIL_BACKEND = EMAIL_BACKEND
 
 # set proxy for static outgoing IP address, so we can cross
 # white list muckrock and squarelet staging sites
@@ -29,6 +29,7 @@ MIDDLEWARE = (
     "django.middleware.common.CommonMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "muckrock.core.middleware.PermissionCacheMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.contrib.flatpages.middleware.FlatpageFallbackMiddleware",
 )
@@ -39,6 +40,24 @@ CELERY_TASK_EAGER_PROPAGATES = True
 
 DEFAULT_FILE_STORAGE = "inmemorystorage.InMemoryStorage"
 
+# local stand in for the batch email backend, collects into django.core.mail.outbox
+BATCH_EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+
+# collect statistics on the test connection so test data is visible
+STATISTICS_CONCURRENCY = 1
+
+# test transactions are rolled back, so do not remember addresses across them
+ADDRESS_CACHE_TIMEOUT = 0
+
+# the test cache does not store anything, so write autosaves straight through
+COMPOSER_AUTOSAVE_DELAY = 0
+
+# render every page, so tests see the current data
+PAGE_CACHE_TIMEOUT = 0
+
+# list changes as soon as they are made
+CHANGE_FEED_DELAY = 0
+
 LOGGING = {}
 
 TEMPLATES[0]["OPTIONS"]["debug"] = True
@@ -5,6 +5,7 @@ from django.conf import settings
 from django.contrib.auth.forms import AuthenticationForm
 
 # MuckRock
+from muckrock.accounts.models import Notification
 from muckrock.core.utils import cache_get_or_set
 from muckrock.foia.models import FOIAComposer, FOIARequest
 from muckrock.news.models import Article
@@ -25,12 +26,12 @@ def get_actionable_requests(user):
     return {"started": started, "payment": payment, "fix": fix}
 
 
-def get_unread_notifications(user):
-    """Gets unread notifiations for user, if they're logged in."""
+def get_unread_notifications_count(user):
+    """Gets the number of unread notifiations for user, if they're logged in."""
     if user.is_authenticated:
-        return user.notifications.get_unread()
+        return Notification.objects.unread_count(user)
     else:
-        return None
+        return 0
 
 
 def get_organization(user):
@@ -66,7 +67,9 @@ def sidebar_info(request):
         # content for logged in users
         sidebar_info_dict.update(
             {
-                "unread_notifications": get_unread_notifications(request.user),
+                "unread_notifications_count": get_unread_notifications_count(
+                    request.user
+                ),
                 "actionable_requests": get_actionable_requests(request.user),
                 "user_organization": get_organization(request.user),
                 "organizations": get_organizations(request.user),
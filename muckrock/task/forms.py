@@ -4,6 +4,7 @@ Forms for Task app
 
 # Django
 from django import forms
+from django.utils import timezone
 
 # Standard Library
 import logging
@@ -16,10 +17,10 @@ from dal_select2.widgets import ListSelect2
 from muckrock.accounts.models import Notification
 from muckrock.agency.models import Agency
 from muckrock.communication.utils import get_email_or_fax
-from muckrock.core import autocomplete
+from muckrock.core import autocomplete, changes
 from muckrock.core.utils import generate_status_action
 from muckrock.foia.codes import CODE_CHOICES, CODES
-from muckrock.foia.models import STATUS
+from muckrock.foia.models import STATUS, FOIAFile
 from muckrock.jurisdiction.models import Jurisdiction
 
 
@@ -223,7 +224,8 @@ class ResponseTaskForm(forms.Form):
             if body is not None:
                 comm.communication = body
             if title is not None and comm.files.count() == 1:
-                comm.files.update(title=title)
+                changes.record(FOIAFile, comm.files.values_list("pk", flat=True))
+                comm.files.update(title=title, datetime_changed=timezone.now())
             comm.save()
             # save foia next, unless just updating comm status
             if set_foia:
@@ -239,13 +241,9 @@ class ResponseTaskForm(forms.Form):
                 foia.notify(action)
                 # Mark generic '<Agency> sent a communication to <FOIARequest> as read.'
                 # https://github.com/MuckRock/muckrock/issues/1003
-                generic_notifications = (
-                    Notification.objects.for_object(foia)
-                    .get_unread()
-                    .filter(action__verb="sent a communication")
-                )
-                for generic_notification in generic_notifications:
-                    generic_notification.mark_read()
+                Notification.objects.for_object(foia).filter(
+                    action__verb="sent a communication"
+                ).mark_read()
 
     def set_code(self, code, set_foia, comms):
         """Sets status of comm and foia based on scan code"""
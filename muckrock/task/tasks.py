@@ -14,7 +14,6 @@ from io import BytesIO
 from random import randint
 
 # Third Party
-from boto.s3.connection import S3Connection
 from boto.s3.key import Key
 from fpdf import FPDF
 from PyPDF2 import PdfFileMerger, PdfFileReader
@@ -22,6 +21,7 @@ from requests.exceptions import RequestException
 from zenpy.lib.exception import APIException, ZenpyException
 
 # MuckRock
+from muckrock.core import s3
 from muckrock.foia.models import FOIACommunication, FOIARequest
 from muckrock.task.filters import SnailMailTaskFilterSet
 from muckrock.task.models import FlaggedTask, SnailMailTask
@@ -96,8 +96,7 @@ def snail_mail_bulk_pdf_task(pdf_name, get, **kwargs):
     bulk_merger.write(bulk_pdf)
     bulk_pdf.seek(0)
 
-    conn = S3Connection(settings.AWS_ACCESS_KEY_ID, settings.AWS_SECRET_ACCESS_KEY)
-    bucket = conn.get_bucket(settings.AWS_STORAGE_BUCKET_NAME)
+    bucket = s3.get_bucket("task.tasks.snail_mail_bulk_pdf_task")
     key = Key(bucket)
     key.key = pdf_name
     key.set_contents_from_file(bulk_pdf)